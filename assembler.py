@@ -1,8 +1,104 @@
-import yaml
+import os
 import sys
 import argparse
 
 
+# Допустимые операции в выражениях полей макросов и блоков repeat
+EXPRESSION_OPERATORS = {
+    'Add': lambda a, b: a + b,
+    'Sub': lambda a, b: a - b,
+    'Mult': lambda a, b: a * b,
+    'FloorDiv': lambda a, b: a // b,
+    'Mod': lambda a, b: a % b,
+    'USub': lambda a: -a,
+    'UAdd': lambda a: a,
+}
+
+MAX_MACRO_DEPTH = 64
+
+# Объектный файл: код с нулями на месте адресов данных и список перемещений,
+# которые заполняет компоновщик (linker.py)
+OBJECT_FORMAT = 'uvm-object'
+OBJECT_VERSION = 1
+
+# Поля, в которых допустима ссылка на символ данных (@имя+смещение), и вид перемещения
+RELOCATABLE_FIELDS = {
+    ('load', 'constant'): 'load_const',
+    ('pow', 'value1_addr'): 'pow_addr',
+}
+
+
+def contains_symbol_reference(value):
+    # Ссылка @имя в любом поле программы, включая тела макросов и repeat
+    if isinstance(value, str):
+        return value.startswith('@')
+    if isinstance(value, dict):
+        return any(contains_symbol_reference(item) for item in value.values())
+    if isinstance(value, list):
+        return any(contains_symbol_reference(item) for item in value)
+    return False
+
+
+def evaluate_expression(node, scope):
+    # Вычисление разобранного выражения без eval: целые числа, имена из scope,
+    # арифметика и индексация списков-аргументов
+    kind = type(node).__name__
+    if kind == 'Expression':
+        return evaluate_expression(node.body, scope)
+    if kind == 'Constant' and type(node.value) is int:
+        return node.value
+    if kind == 'Name':
+        if node.id not in scope:
+            raise ValueError(f"Неизвестное имя в выражении: {node.id}")
+        return scope[node.id]
+    if kind == 'BinOp' and type(node.op).__name__ in EXPRESSION_OPERATORS:
+        operator = EXPRESSION_OPERATORS[type(node.op).__name__]
+        return operator(evaluate_expression(node.left, scope), evaluate_expression(node.right, scope))
+    if kind == 'UnaryOp' and type(node.op).__name__ in EXPRESSION_OPERATORS:
+        return EXPRESSION_OPERATORS[type(node.op).__name__](evaluate_expression(node.operand, scope))
+    if kind == 'Subscript':
+        return evaluate_expression(node.value, scope)[evaluate_expression(node.slice, scope)]
+    raise ValueError(f"Недопустимое выражение: {kind}")
+
+
+class AtomicFile:
+    # Запись результата через временный файл рядом с целевым: файл подменяется
+    # только при успешном завершении блока with, иначе временный файл удаляется.
+    # Временный файл создается через os.open с правами 0o666, поэтому система
+    # применяет umask так же, как для обычного open(filename, 'wb')
+    def __init__(self, filename):
+        self.filename = filename
+        self.temp_name = None
+        self.file = None
+
+    def __enter__(self):
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+        attempt = 0
+        while True:
+            temp_name = f"{self.filename}.{os.getpid()}.{attempt}.tmp"
+            try:
+                fd = os.open(temp_name, flags, 0o666)
+                break
+            except FileExistsError:
+                attempt += 1
+
+        self.temp_name = temp_name
+        self.file = os.fdopen(fd, 'wb')
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.file.close()
+            if exc_type is None:
+                os.replace(self.temp_name, self.filename)
+                return False
+        except BaseException:
+            os.remove(self.temp_name)
+            raise
+        os.remove(self.temp_name)
+        return False
+
+
 class Assembler:
     def __init__(self):
         self.command_codes = {
@@ -11,17 +107,33 @@ class Assembler:
             'write': 26,
             'pow': 42
         }
+        self.macros = {}
+        self.data = {}
+        self.expressions = {}
 
     def parse_arguments(self):
         parser = argparse.ArgumentParser(description='Ассемблер УВМ')
         parser.add_argument('input_file', help='Путь к исходному файлу YAML')
         parser.add_argument('output_file', help='Путь к двоичному файлу-результату')
         parser.add_argument('--test', action='store_true', help='Режим тестирования')
+        parser.add_argument('--object', action='store_true',
+                            help='Перемещаемый объектный файл (JSON) для компоновки linker.py')
         return parser.parse_args()
 
     def load_program(self, filename):
-        with open(filename, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        with open(filename, 'rb') as f:
+            return self.parse_program(f.read(), filename)
+
+    def parse_program(self, data, filename):
+        # Формат определяется по расширению: программа в JSON (подмножество YAML)
+        # читается без импорта yaml, который занимает большую часть запуска
+        if filename.endswith('.json'):
+            import json
+            return json.loads(data.decode('utf-8'))
+
+        # Загрузчик на libyaml разбирает файл в разы быстрее чистого Python
+        import yaml
+        return yaml.load(data.decode('utf-8'), Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
 
     def assemble_load(self, command):
         a = self.command_codes['load']
@@ -112,6 +224,21 @@ class Assembler:
 
         return bytes_list, {'A': a, 'B': b, 'C': c, 'D': d}
 
+    def command_error(self, number, command, error):
+        # Ссылка на символ в обычной сборке дает TypeError при сравнении строки
+        # с числом; вместо него сообщается, что модуль собирается с --object
+        for key, value in command.items():
+            if isinstance(value, str) and value.startswith('@'):
+                return ValueError(f"Ошибка в команде {number}: ссылка на символ {value} в поле {key} "
+                                  f"допустима только в объектном модуле (--object)")
+        return ValueError(f"Ошибка в команде {number}: {error}")
+
+    def is_module(self, program):
+        # Модуль объявляет данные или ссылается на символы: он собирается
+        # в объектный файл и компонуется linker.py
+        return any(isinstance(item, dict) and 'data' in item for item in program) \
+            or contains_symbol_reference(program)
+
     def assemble_command(self, command):
         cmd_type = command['command']
 
@@ -126,11 +253,129 @@ class Assembler:
         else:
             raise ValueError(f"Неизвестная команда: {cmd_type}")
 
+    def evaluate(self, value, scope):
+        # Строковые значения полей - выражения; разбор кэшируется, так как
+        # тело repeat вычисляется с теми же строками на каждой итерации
+        if not isinstance(value, str):
+            return value
+        if value.startswith('@'):
+            name, addend = self.symbol_reference(value, scope)
+            return f"@{name}{addend:+d}"
+        tree = self.expressions.get(value)
+        if tree is None:
+            import ast
+            try:
+                tree = ast.parse(value, mode='eval')
+            except SyntaxError:
+                raise ValueError(f"Некорректное выражение: {value}")
+            self.expressions[value] = tree
+        try:
+            return evaluate_expression(tree, scope)
+        except (LookupError, NameError, TypeError, ZeroDivisionError) as e:
+            raise ValueError(f"Ошибка вычисления выражения {value}: {e!r}")
+
+    def symbol_reference(self, value, scope):
+        # "@имя", "@имя + выражение" или "@имя - выражение" -> (имя, смещение)
+        text = value[1:].strip()
+        end = 0
+        while end < len(text) and (text[end].isalnum() or text[end] == '_'):
+            end += 1
+        name, rest = text[:end], text[end:].strip()
+        if not name or (rest and rest[0] not in '+-'):
+            raise ValueError(f"Некорректная ссылка на символ: {value}")
+        addend = self.evaluate('0' + rest, scope) if rest else 0
+        return name, addend
+
+    def expand(self, program):
+        # Ленивое раскрытие макросов и блоков repeat: команды выдаются по одной,
+        # полный раскрытый список программы в памяти не строится.
+        # Программа без макросов и repeat возвращается как есть
+        self.macros = {}
+        self.data = {}
+        plain = True
+        for number, item in enumerate(program, 1):
+            if not isinstance(item, dict):
+                raise ValueError(f"Ошибка в элементе программы {number}: элемент должен быть словарем: {item}")
+            if 'command' not in item:
+                plain = False
+                if 'macro' in item:
+                    if item['macro'] in self.macros:
+                        raise ValueError(f"Ошибка в элементе программы {number}: "
+                                         f"повторное определение макроса {item['macro']}")
+                    self.macros[item['macro']] = item
+                elif 'data' in item:
+                    if item['data'] in self.data:
+                        raise ValueError(f"Ошибка в элементе программы {number}: "
+                                         f"повторное определение данных {item['data']}")
+                    size = item.get('size', 1)
+                    if type(size) is not int or size < 1:
+                        raise ValueError(f"Ошибка в элементе программы {number}: "
+                                         f"некорректный размер данных {item['data']}: {size}")
+                    self.data[item['data']] = size
+
+        if plain:
+            return iter(program)
+        return self.expand_program(program)
+
+    def expand_program(self, program):
+        # Ошибка раскрытия сообщается с номером элемента программы верхнего уровня,
+        # в котором она возникла: команды после раскрытия нумеруются иначе
+        for number, item in enumerate(program, 1):
+            try:
+                yield from self.expand_items([item], {}, 0)
+            except Exception as e:
+                raise ValueError(f"Ошибка в элементе программы {number}: {e}")
+
+    def expand_items(self, program, scope, depth):
+        if depth > MAX_MACRO_DEPTH:
+            raise ValueError(f"Превышена глубина вложенности макросов ({MAX_MACRO_DEPTH})")
+
+        for item in program:
+            if not isinstance(item, dict):
+                raise ValueError(f"Элемент программы должен быть словарем: {item}")
+            if 'command' in item:
+                # Выражения вычисляются только в телах макросов и repeat
+                if depth:
+                    item = {key: value if key == 'command' else self.evaluate(value, scope)
+                            for key, value in item.items()}
+                yield item
+            elif 'repeat' in item:
+                count = self.evaluate(item['repeat'], scope)
+                var = item.get('var', 'i')
+                body = item.get('body', [])
+                for index in range(count):
+                    yield from self.expand_items(body, {**scope, var: index}, depth + 1)
+            elif 'call' in item:
+                yield from self.expand_call(item, scope, depth)
+            elif 'macro' in item or 'data' in item:
+                if depth > 0:
+                    name = item.get('macro', item.get('data'))
+                    raise ValueError(f"{name} должен быть определен на верхнем уровне")
+            else:
+                raise ValueError(f"Неизвестный элемент программы: {item}")
+
+    def expand_call(self, item, scope, depth):
+        name = item['call']
+        macro = self.macros.get(name)
+        if macro is None:
+            raise ValueError(f"Неизвестный макрос: {name}")
+
+        args = item.get('args', {})
+        params = macro.get('params', [])
+        missing = [param for param in params if param not in args]
+        extra = [arg for arg in args if arg not in params]
+        if missing or extra:
+            raise ValueError(f"Макрос {name}: не заданы параметры {missing}, лишние параметры {extra}")
+
+        # Аргументы вычисляются в области видимости вызывающего
+        call_scope = {param: self.evaluate(args[param], scope) for param in params}
+        yield from self.expand_items(macro.get('body', []), call_scope, depth + 1)
+
     def assemble(self, program):
         binary_code = []
         intermediate_representation = []
 
-        for i, command in enumerate(program):
+        for i, command in enumerate(self.expand(program)):
             try:
                 bytes_list, fields = self.assemble_command(command)
 
@@ -148,12 +393,77 @@ class Assembler:
                 })
 
             except Exception as e:
-                raise ValueError(f"Ошибка в команде {i + 1}: {e}")
+                raise self.command_error(i + 1, command, e)
 
         return binary_code, intermediate_representation
 
+    def assemble_to_file(self, program, filename):
+        # Потоковая сборка: раскрытые команды кодируются и пишутся сразу,
+        # без списка байт и промежуточного представления всей программы.
+        # Результат подменяет целевой файл только после успешной сборки:
+        # прежний двоичный файл при ошибке остается
+        count = 0
+        size = 0
+        with AtomicFile(filename) as f:
+            for count, command in enumerate(self.expand(program), 1):
+                try:
+                    bytes_list, _ = self.assemble_command(command)
+                except Exception as e:
+                    raise self.command_error(count, command, e)
+                f.write(bytes(bytes_list))
+                size += len(bytes_list)
+        return count, size
+
+    def assemble_object(self, program):
+        # Перемещаемый модуль: данные (- data: имя, size: N) размещает компоновщик,
+        # а ссылки @имя+k в LOAD и POW записываются как перемещения
+        code = bytearray()
+        relocations = []
+
+        for i, command in enumerate(self.expand(program)):
+            references = []
+            for key, value in command.items():
+                if isinstance(value, str) and value.startswith('@'):
+                    kind = RELOCATABLE_FIELDS.get((command['command'], key))
+                    if kind is None:
+                        raise ValueError(f"Ошибка в команде {i + 1}: ссылка на символ недопустима в поле {key}")
+                    references.append((key, kind, self.symbol_reference(value, {})))
+            if references:
+                command = dict(command)
+                for key, _, _ in references:
+                    command[key] = 0
+
+            try:
+                bytes_list, _ = self.assemble_command(command)
+            except Exception as e:
+                raise ValueError(f"Ошибка в команде {i + 1}: {e}")
+
+            for _, kind, (symbol, addend) in references:
+                relocations.append({'offset': len(code), 'kind': kind, 'symbol': symbol, 'addend': addend})
+            code.extend(bytes_list)
+
+        symbols = {}
+        data_size = 0
+        for name, size in self.data.items():
+            symbols[name] = {'offset': data_size, 'size': size}
+            data_size += size
+
+        return {
+            'format': OBJECT_FORMAT,
+            'version': OBJECT_VERSION,
+            'code': code.hex(),
+            'data_size': data_size,
+            'symbols': symbols,
+            'relocations': relocations
+        }
+
+    def save_object(self, obj, filename):
+        import json
+        with AtomicFile(filename) as f:
+            f.write(json.dumps(obj, indent=1).encode('utf-8'))
+
     def save_binary(self, binary_code, filename):
-        with open(filename, 'wb') as f:
+        with AtomicFile(filename) as f:
             f.write(bytes(binary_code))
 
     def display_test_output(self, intermediate_repr, binary_code):
@@ -180,17 +490,24 @@ def main():
 
     try:
         program = assembler.load_program(args.input_file)
-        binary_code, intermediate_repr = assembler.assemble(program)
 
-        # Запись в двоичный файл
-        assembler.save_binary(binary_code, args.output_file)
+        if args.object:
+            obj = assembler.assemble_object(program)
+            assembler.save_object(obj, args.output_file)
+            print(f"Ассемблировано байт кода: {len(obj['code']) // 2}, символов: {len(obj['symbols'])}, "
+                  f"перемещений: {len(obj['relocations'])}")
+        elif args.test:
+            binary_code, intermediate_repr = assembler.assemble(program)
+
+            # Запись в двоичный файл
+            assembler.save_binary(binary_code, args.output_file)
 
-        if args.test:
             # Расширенный вывод в тестовом режиме
             assembler.display_test_output(intermediate_repr, binary_code)
         else:
-            # Только число команд в обычном режиме
-            print(f"Ассемблировано команд: {len(intermediate_repr)}")
+            # Только число команд в обычном режиме: сборка сразу в файл
+            count, _ = assembler.assemble_to_file(program, args.output_file)
+            print(f"Ассемблировано команд: {count}")
 
     except Exception as e:
         print(f"Ошибка ассемблирования: {e}")
@@ -0,0 +1,340 @@
+import os
+import sys
+import json
+import mmap
+import time
+import marshal
+import argparse
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+from interpreter import (UVMInterpreter, decode_program, map_memory_file,
+                         MEMORY_SIZE, MEMORY_CELL_FORMAT, MEMORY_CELL_SIZE)
+from cost import estimate_cost, estimate_patched, simulate_makespan
+
+
+MEMORY_BYTES = MEMORY_SIZE * MEMORY_CELL_SIZE
+SCHEDULES = ('fifo', 'ljf')
+
+# Число групп заданий на процесс при планировании по оценке стоимости
+BATCHES_PER_WORKER = 8
+
+# Сегменты, к которым подключен процесс-исполнитель, и уже разобранные программы
+_segments = {}
+_programs = {}
+
+
+def parse_range(text):
+    if isinstance(text, (list, tuple)):
+        return int(text[0]), int(text[1])
+    start, end = map(int, text.split('-'))
+    return start, end
+
+
+def load_jobs(filename):
+    # Задания: JSON-список или {"jobs": [...]}; пути к программам - относительно файла заданий.
+    # Некорректное задание не прерывает загрузку: ошибка сохраняется в поле error
+    # и выдается как результат этого задания (см. run_batch)
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    jobs = data['jobs'] if isinstance(data, dict) else data
+
+    base = os.path.dirname(os.path.abspath(filename))
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict):
+            jobs[index] = {'id': index, 'error': f"ValueError: задание должно быть объектом JSON: {job!r}"}
+            continue
+        job.setdefault('id', index)
+        try:
+            missing = [field for field in ('binary', 'dump_range') if field not in job]
+            if missing:
+                raise ValueError(f"нет полей {', '.join(missing)}")
+            job['binary'] = os.path.join(base, job['binary'])
+            job['dump_range'] = parse_range(job['dump_range'])
+        except (TypeError, ValueError, AttributeError) as e:
+            job['error'] = f"{type(e).__name__}: {e}"
+    return jobs
+
+
+class SharedImages:
+    # Базовые образы памяти и декодированные программы в multiprocessing.shared_memory:
+    # создаются один раз в родительском процессе, исполнители подключаются к ним по имени
+    def __init__(self, base_image=None):
+        self.base_image = base_image
+        self.segments = []
+        self.registry = {}
+        self.images = {}
+        self.programs = {}
+        self.profiles = {}
+
+    def add(self, binary_file):
+        if binary_file in self.registry:
+            return
+        with open(binary_file, 'rb') as f:
+            binary = f.read()
+        if len(binary) > MEMORY_SIZE:
+            # Обрезанный образ - уже другая программа, чем файл на диске
+            raise ValueError(f"{binary_file}: программа длиннее памяти ({len(binary)} > {MEMORY_SIZE} байт)")
+
+        image = self.create(MEMORY_BYTES)
+        cells = image.buf.cast(MEMORY_CELL_FORMAT)
+        if self.base_image:
+            memory_map, base = map_memory_file(self.base_image)
+            cells[:] = base
+            base.release()
+            memory_map.close()
+        cells[:len(binary)] = array(MEMORY_CELL_FORMAT, list(binary))
+        cells.release()
+
+        decoded = decode_program(binary)
+        code = marshal.dumps(decoded)
+        program = self.create(len(code))
+        program.buf[:len(code)] = code
+        self.registry[binary_file] = (image.name, program.name, len(code))
+        self.images[binary_file] = image
+        self.programs[binary_file] = decoded
+
+    def create(self, size):
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        self.segments.append(segment)
+        return segment
+
+    def estimate(self, job):
+        # Оценка по образу памяти задания: общий образ программы и входные данные поверх него.
+        # Профиль стоимости строится при первой оценке и один раз на программу:
+        # задания с разными входными данными пересчитывают по нему только затронутые POW
+        binary_file = job['binary']
+        memory = self.images[binary_file].buf.cast(MEMORY_CELL_FORMAT)
+        try:
+            profile = self.profiles.get(binary_file)
+            if profile is None:
+                profile = self.profiles[binary_file] = estimate_cost(self.programs[binary_file], memory)
+            return estimate_patched(profile, self.programs[binary_file], memory, job.get('patches', []))
+        finally:
+            memory.release()
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+
+def attach(registry):
+    # Инициализатор процесса-исполнителя: подключение без копирования
+    detach()
+    for binary_file, (image_name, program_name, program_size) in registry.items():
+        _segments[binary_file] = (shared_memory.SharedMemory(image_name),
+                                  shared_memory.SharedMemory(program_name), program_size)
+
+
+def detach():
+    for image, program, _ in _segments.values():
+        image.close()
+        program.close()
+    _segments.clear()
+    _programs.clear()
+
+
+def overlay_memory(segment):
+    # Частное отображение сегмента с копированием при записи: ядро копирует
+    # только изменяемые страницы, остальная память общая для всех заданий.
+    # Без файла сегмента в /dev/shm образ копируется в array целиком
+    path = os.path.join('/dev/shm', segment.name.lstrip('/'))
+    try:
+        with open(path, 'rb') as f:
+            memory_map = mmap.mmap(f.fileno(), MEMORY_BYTES, access=mmap.ACCESS_COPY)
+        return memory_map, memoryview(memory_map).cast(MEMORY_CELL_FORMAT)
+    except OSError:
+        memory = array(MEMORY_CELL_FORMAT)
+        memory.frombytes(segment.buf[:MEMORY_BYTES])
+        return None, memory
+
+
+def shared_program(binary_file):
+    # Программа разбирается из общей памяти один раз на процесс
+    program = _programs.get(binary_file)
+    if program is None:
+        _, segment, size = _segments[binary_file]
+        program = marshal.loads(segment.buf[:size])
+        _programs[binary_file] = program
+    return program
+
+
+def apply_patches(memory, patches):
+    # Входные данные задания: [{"address": A, "values": [...]}, ...]
+    lowest = MEMORY_SIZE
+    for patch in patches:
+        address = patch['address']
+        values = patch['values']
+        if address < 0 or address + len(values) > MEMORY_SIZE:
+            raise ValueError(f"Входные данные {address}+{len(values)} выходят за пределы памяти")
+        memory[address:address + len(values)] = array(MEMORY_CELL_FORMAT, values)
+        lowest = min(lowest, address)
+    return lowest
+
+
+def execute_job(job):
+    # Выполнение задания на частной копии общего образа программы. Интерпретатор
+    # получает готовую память, а не создает свою; после чтения результатов
+    # ее освобождает release_memory
+    binary_file = job['binary']
+    image, _, _ = _segments[binary_file]
+    program = shared_program(binary_file)
+
+    memory_map, memory = overlay_memory(image)
+    interpreter = UVMInterpreter(memory, memory_map)
+    try:
+        lowest = apply_patches(interpreter.memory, job.get('patches', []))
+        # Входные данные поверх кода делают декодированную программу недействительной
+        if lowest < program[0]:
+            interpreter.execute()
+        else:
+            interpreter.execute_decoded(program)
+    except BaseException:
+        release_memory(interpreter)
+        raise
+    return interpreter
+
+
+def release_memory(interpreter):
+    # Без повторного выделения списка, как в UVMInterpreter.close
+    if interpreter.memory_map is not None:
+        interpreter.memory.release()
+        interpreter.memory_map.close()
+        interpreter.memory_map = None
+
+
+def run_job(job):
+    start = time.perf_counter()
+    try:
+        interpreter = execute_job(job)
+        try:
+            dump_start, dump_end = job['dump_range']
+            values = list(interpreter.memory[max(dump_start, 0):min(dump_end + 1, MEMORY_SIZE)])
+        finally:
+            release_memory(interpreter)
+        result = {'id': job['id'], 'steps': interpreter.steps, 'dump_start': dump_start, 'values': values}
+    except Exception as e:
+        result = {'id': job['id'], 'error': f"{type(e).__name__}: {e}"}
+
+    result['seconds'] = time.perf_counter() - start
+    if 'estimate' in job:
+        result['estimate'] = job['estimate']
+    return result
+
+
+def run_jobs(jobs):
+    return [run_job(job) for job in jobs]
+
+
+def plan_batches(jobs, workers):
+    # Самые долгие задания первыми (LJF): пул раздает группы освободившимся
+    # процессам, поэтому длинные задания начинаются сразу, а короткие
+    # заполняют остаток. Короткие задания объединяются в группы не дороже
+    # доли общей стоимости, чтобы не передавать их в процессы по одному
+    ordered = sorted(jobs, key=lambda job: job['estimate'], reverse=True)
+    target = sum(job['estimate'] for job in ordered) / (workers * BATCHES_PER_WORKER)
+    batches = []
+    current = []
+    current_cost = 0.0
+    for job in ordered:
+        if current and current_cost + job['estimate'] > target:
+            batches.append(current)
+            current = []
+            current_cost = 0.0
+        current.append(job)
+        current_cost += job['estimate']
+    if current:
+        batches.append(current)
+    return batches
+
+
+def run_batch(jobs, workers, base_image=None, chunksize=None, schedule='fifo'):
+    images = SharedImages(base_image)
+    try:
+        # Задания, которые нельзя запустить, выдаются сразу как ошибки и не планируются
+        runnable = []
+        for job in jobs:
+            error = job.get('error')
+            if error is None:
+                try:
+                    images.add(job['binary'])
+                except (OSError, ValueError) as e:
+                    error = f"{type(e).__name__}: {e}"
+            if error is None:
+                runnable.append(job)
+            else:
+                yield {'id': job['id'], 'error': error, 'seconds': 0.0}
+        jobs = runnable
+
+        if schedule == 'ljf':
+            for job in jobs:
+                try:
+                    job['estimate'] = images.estimate(job)
+                except Exception:
+                    # Некорректные входные данные: задание завершится ошибкой
+                    # в исполнителе, как при fifo, и ставится в конец очереди
+                    job['estimate'] = 0.0
+            batches = plan_batches(jobs, workers)
+        else:
+            chunksize = chunksize or max(1, len(jobs) // (workers * BATCHES_PER_WORKER))
+            batches = [jobs[start:start + chunksize] for start in range(0, len(jobs), chunksize)]
+
+        if workers == 1:
+            attach(images.registry)
+            for batch in batches:
+                yield from run_jobs(batch)
+            return
+
+        with multiprocessing.Pool(workers, initializer=attach, initargs=(images.registry,)) as pool:
+            for results in pool.imap_unordered(run_jobs, batches):
+                yield from results
+    finally:
+        detach()
+        images.close()
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Пакетное выполнение программ УВМ с общей памятью')
+    parser.add_argument('jobs_file', help='JSON-файл с заданиями (binary, patches, dump_range)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Число процессов')
+    parser.add_argument('--base-image', help='Файл памяти (см. --memory-file) с начальным образом для всех программ')
+    parser.add_argument('--output', help='Путь к файлу результатов (JSON Lines)')
+    parser.add_argument('--schedule', choices=SCHEDULES, default='ljf',
+                        help='Порядок заданий: fifo - как в файле, ljf - по убыванию оценки времени (cost.py)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    jobs = load_jobs(args.jobs_file)
+
+    start = time.perf_counter()
+    failed = 0
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for result in run_batch(jobs, args.workers, args.base_image, schedule=args.schedule):
+            if 'error' in result:
+                failed += 1
+                print(f"Задание {result['id']}: {result['error']}")
+            if output:
+                output.write(json.dumps(result) + '\n')
+    finally:
+        if output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    programs = len({job['binary'] for job in jobs if 'error' not in job})
+    rate = len(jobs) / elapsed if elapsed > 0 else 0
+    print(f"Заданий: {len(jobs)}, программ: {programs}, процессов: {args.workers}, "
+          f"ошибок: {failed}, за {elapsed:.2f} с ({rate:.0f} заданий/с)")
+    if args.schedule == 'ljf':
+        costs = sorted((job['estimate'] for job in jobs if 'estimate' in job), reverse=True)
+        print(f"Оценка: сумма {sum(costs):.3f} с, расписание на {args.workers} процессов "
+              f"{simulate_makespan(costs, args.workers):.3f} с")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
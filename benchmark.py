@@ -0,0 +1,395 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import platform
+import shutil
+import subprocess
+import tempfile
+from assembler import Assembler
+from interpreter import UVMInterpreter, InstructionStream, decode_program
+
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+# Данные синтетических программ лежат выше кода, адрес задается через LOAD (до 4095)
+DATA_BASE = 4000
+DATA_SIZE = 256
+
+# Программа интерпретатора исполняется блоками, чтобы код не пересекался с данными
+BLOCK_SIZE = 600
+
+# Короткие замеры повторяются, пока суммарное время не достигнет этой величины
+MIN_SAMPLE_TIME = 0.2
+MAX_RUNS = 1000
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Веса команд для смесей с преобладанием POW, копирования и LOAD
+MIX_WEIGHTS = {
+    'pow': {'pow': 8, 'load': 1, 'write': 1},
+    'copy': {'read': 1, 'write': 1},
+    'load': {'load': 1},
+}
+
+
+def make_program(size, mix):
+    from generator import ProgramGenerator
+
+    generator = ProgramGenerator(MIX_WEIGHTS[mix], footprint=DATA_SIZE, data_base=DATA_BASE, seed=size)
+    return list(generator.commands(size))
+
+
+def program_to_yaml(program):
+    from generator import command_to_yaml
+
+    return ''.join(command_to_yaml(command) for command in program)
+
+
+def measure(func, repeat, setup=None):
+    # Лучшее время из не менее repeat запусков; setup выполняется вне замера
+    best = None
+    total = 0.0
+    runs = 0
+    while runs < repeat or (total < MIN_SAMPLE_TIME and runs < MAX_RUNS):
+        # Печать load_program и create_memory_dump в замер не попадает
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            func(state) if setup else func()
+            elapsed = time.perf_counter() - start
+        total += elapsed
+        runs += 1
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_blocks(interpreter, size, execute):
+    # Блок повторяется с нулевыми регистрами и данными, пока не наберется size команд
+    executed = 0
+    while executed < size:
+        interpreter.pc = 0
+        interpreter.halted = False
+        interpreter.registers[:] = [0] * 32
+        interpreter.memory[DATA_BASE:DATA_BASE + DATA_SIZE] = [0] * DATA_SIZE
+        executed += execute()
+    return executed
+
+
+class Benchmark:
+    def __init__(self, sizes, repeat, workdir):
+        self.sizes = sizes
+        self.repeat = repeat
+        self.workdir = workdir
+        self.results = {}
+
+    def record(self, name, seconds, operations=None):
+        entry = {'seconds': seconds}
+        if operations:
+            entry['operations'] = operations
+            entry['ops_per_sec'] = operations / seconds if seconds > 0 else None
+        self.results[name] = entry
+        rate = f"  ({entry['ops_per_sec']:.0f} оп/с)" if operations and seconds > 0 else ""
+        print(f"  {name:<36} {seconds * 1000:10.3f} мс{rate}")
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def write_binary(self, program, name):
+        binary_code, _ = Assembler().assemble(program)
+        filename = self.path(name)
+        with open(filename, 'wb') as f:
+            f.write(bytes(binary_code))
+        return filename, len(binary_code)
+
+    def bench_assembler(self):
+        print("Ассемблер:")
+        for size in self.sizes:
+            yaml_file = self.path(f"asm_{size}.yaml")
+            with open(yaml_file, 'w', encoding='utf-8') as f:
+                f.write(program_to_yaml(make_program(size, 'copy')))
+
+            assembler = Assembler()
+            seconds = measure(lambda: assembler.load_program(yaml_file), self.repeat)
+            self.record(f"assembler/load_yaml/{size}", seconds, size)
+
+            program = assembler.load_program(yaml_file)
+            seconds = measure(lambda: assembler.assemble(program), self.repeat)
+            self.record(f"assembler/assemble/{size}", seconds, size)
+
+    def bench_interpreter(self):
+        print("Интерпретатор:")
+        for mix in MIX_WEIGHTS:
+            for size in self.sizes:
+                block = make_program(min(size, BLOCK_SIZE), mix)
+                bin_file, _ = self.write_binary(block, f"{mix}_{size}.bin")
+
+                def setup():
+                    interpreter = UVMInterpreter()
+                    interpreter.load_program(bin_file)
+                    return interpreter
+
+                steps = []
+
+                def run(interpreter):
+                    steps.append(run_blocks(interpreter, size, interpreter.execute))
+
+                seconds = measure(run, self.repeat, setup)
+                self.record(f"interpreter/{mix}/{size}", seconds, steps[-1])
+
+    def bench_stream(self):
+        from generator import ProgramGenerator, write_outputs
+
+        print("Потоковое выполнение:")
+        for mix, weights in MIX_WEIGHTS.items():
+            for size in self.sizes:
+                bin_file = self.path(f"stream_{mix}_{size}.bin")
+                generator = ProgramGenerator(weights, footprint=DATA_SIZE, data_base=DATA_BASE, seed=size)
+                write_outputs(generator, size, binary_file=bin_file)
+
+                def run(interpreter):
+                    interpreter.execute_stream(InstructionStream(bin_file))
+
+                seconds = measure(run, self.repeat, UVMInterpreter)
+                self.record(f"stream/{mix}/{size}", seconds, size)
+
+    def bench_load_program(self):
+        print("Загрузка программы:")
+        for size in self.sizes:
+            bin_file, _ = self.write_binary(make_program(size, 'load'), f"image_{size}.bin")
+
+            def load():
+                UVMInterpreter().load_program(bin_file)
+
+            self.record(f"load_program/{size}", measure(load, self.repeat))
+
+        # Полный образ памяти: чтение с копированием в список против отображения файла
+        image_file = self.path("image_full.bin")
+        with open(image_file, 'wb') as f:
+            f.write(bytes(range(256)) * 256)
+        self.record("load_program/full_image", measure(lambda: UVMInterpreter().load_program(image_file),
+                                                       self.repeat))
+
+        memory_file = self.path("image.mem")
+
+        def attach():
+            interpreter = UVMInterpreter()
+            interpreter.attach_memory_file(memory_file)
+            interpreter.close()
+
+        attach()
+        self.record("load_program/memory_file", measure(attach, self.repeat))
+
+    def bench_cache(self):
+        from program_cache import ProgramCache
+
+        print("Кэш декодированных программ:")
+        cache = ProgramCache(self.path("cache"))
+        for size in self.sizes:
+            bin_file, _ = self.write_binary(make_program(min(size, BLOCK_SIZE), 'copy'), f"cache_{size}.bin")
+            with open(bin_file, 'rb') as f:
+                binary = f.read()
+
+            self.record(f"cache/decode/{size}", measure(lambda: decode_program(binary), self.repeat))
+            program = cache.load(binary)
+            self.record(f"cache/hit/{size}", measure(lambda: cache.load(binary), self.repeat))
+            # Путь командной строки: ключ берется из индекса файла без хеширования
+            cache.load_file(bin_file, binary)
+            self.record(f"cache/hit_file/{size}", measure(lambda: cache.load_file(bin_file, binary), self.repeat))
+
+            def setup():
+                interpreter = UVMInterpreter()
+                interpreter.load_bytes(binary)
+                return interpreter
+
+            steps = []
+
+            def run(interpreter):
+                steps.append(run_blocks(interpreter, size, lambda: interpreter.execute_decoded(program)))
+
+            seconds = measure(run, self.repeat, setup)
+            self.record(f"cache/execute_decoded/{size}", seconds, steps[-1])
+
+    def bench_batch(self):
+        import batch
+
+        print("Пакетное выполнение (задание целиком на короткой программе):")
+        # Программа короткая, чтобы время задания определяла подготовка памяти;
+        # оба варианта создают интерпретатор, записывают входные данные,
+        # выполняют программу и читают диапазон дампа
+        bin_file, _ = self.write_binary(make_program(10, 'copy'), "batch.bin")
+        job = {'id': 0, 'binary': bin_file, 'patches': [{'address': DATA_BASE, 'values': [1, 2, 3]}],
+               'dump_range': (DATA_BASE, DATA_BASE + 15)}
+
+        def load():
+            interpreter = UVMInterpreter()
+            interpreter.load_program(bin_file)
+            batch.apply_patches(interpreter.memory, job['patches'])
+            interpreter.execute()
+            return interpreter.memory[DATA_BASE:DATA_BASE + 16]
+
+        self.record("batch/job/load_program", measure(load, self.repeat))
+
+        images = batch.SharedImages()
+        try:
+            images.add(bin_file)
+            batch.attach(images.registry)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                assert batch.run_job(job)['values'] == load()
+            self.record("batch/job/shared_overlay", measure(lambda: batch.run_job(job), self.repeat))
+        finally:
+            batch.detach()
+            images.close()
+
+    def bench_dump(self):
+        print("Дамп памяти:")
+        interpreter = UVMInterpreter()
+        dump_file = self.path("dump.xml")
+        for name, start, end in [('small', 1000, 1100), ('full', 0, len(interpreter.memory) - 1)]:
+            seconds = measure(lambda: interpreter.create_memory_dump(start, end, dump_file), self.repeat)
+            self.record(f"dump/{name}", seconds, end - start + 1)
+
+        # Автоматический дамп: статический проход по программе и дамп записанных ячеек
+        binary_code, _ = Assembler().assemble(make_program(1000, 'copy'))
+        interpreter.load_bytes(bytes(binary_code))
+        program = decode_program(bytes(binary_code))
+
+        def auto_dump():
+            interpreter.track_writes(program)
+            interpreter.create_ranges_dump(interpreter.written_ranges(), dump_file)
+
+        seconds = measure(auto_dump, self.repeat)
+        cells = sum(end - start + 1 for start, end in interpreter.written_ranges())
+        self.record("dump/auto/infer", seconds, cells)
+
+    def bench_cli(self):
+        print("Командная строка:")
+        yaml_file = self.path("cli.yaml")
+        bin_file = self.path("cli.bin")
+        dump_file = self.path("cli.xml")
+        with open(yaml_file, 'w', encoding='utf-8') as f:
+            f.write(program_to_yaml(make_program(10, 'copy')))
+
+        commands = {
+            'cli/assembler': [sys.executable, os.path.join(HERE, 'assembler.py'), yaml_file, bin_file],
+            'cli/interpreter': [sys.executable, os.path.join(HERE, 'interpreter.py'), bin_file, dump_file,
+                                '--dump-range', f"{DATA_BASE}-{DATA_BASE + 255}", '--quiet'],
+        }
+        for name, cmd in commands.items():
+            seconds = measure(lambda: subprocess.run(cmd, capture_output=True, check=True), self.repeat)
+            self.record(name, seconds)
+
+        # Попадание в кэш должно обходиться дешевле декодирования заново:
+        # промах каждый раз начинается с пустого каталога кэша
+        cache_dir = self.path("cli_cache")
+        cache_cmd = commands['cli/interpreter'] + ['--cache-dir', cache_dir]
+
+        def clear_cache():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        seconds = measure(lambda _: subprocess.run(cache_cmd, capture_output=True, check=True),
+                          self.repeat, setup=clear_cache)
+        self.record('cli/interpreter/cache_miss', seconds)
+        seconds = measure(lambda: subprocess.run(cache_cmd, capture_output=True, check=True), self.repeat)
+        self.record('cli/interpreter/cache_hit', seconds)
+
+    def run(self, groups):
+        for group in groups:
+            getattr(self, f"bench_{group}")()
+        return self.results
+
+
+GROUPS = ['assembler', 'interpreter', 'stream', 'load_program', 'cache', 'batch', 'dump', 'cli']
+
+
+def compare_results(baseline, current, threshold, min_delta):
+    regressions = []
+    print(f"Сравнение с базовыми результатами (порог {threshold:.0%}, "
+          f"не менее {min_delta * 1000:.1f} мс):")
+
+    for name, entry in current.items():
+        base = baseline.get(name)
+        if not base or 'seconds' not in base:
+            continue
+
+        ratio = entry['seconds'] / base['seconds'] if base['seconds'] > 0 else 1.0
+        delta = entry['seconds'] - base['seconds']
+        status = ""
+        if ratio > 1 + threshold and delta > min_delta:
+            status = " РЕГРЕССИЯ"
+            regressions.append(name)
+        elif ratio < 1 - threshold and -delta > min_delta:
+            status = " ускорение"
+        print(f"  {name:<36} {ratio:6.2f}x{status}")
+
+    missing = [name for name, entry in baseline.items()
+               if 'seconds' in entry and 'seconds' not in current.get(name, {})]
+    for name in missing:
+        print(f"  {name:<36} отсутствует в текущем прогоне")
+
+    return regressions, missing
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Бенчмарки ассемблера и интерпретатора УВМ')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Размеры синтетических программ через запятую (10-1000000)')
+    parser.add_argument('--groups', default=','.join(GROUPS),
+                        help=f"Группы бенчмарков через запятую ({', '.join(GROUPS)})")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Минимальное число повторов, берется лучшее время')
+    parser.add_argument('--output', help='Путь к JSON-файлу для сохранения результатов')
+    parser.add_argument('--compare', help='JSON-файл с базовыми результатами для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Допустимое замедление относительно базы (доля, по умолчанию 0.10)')
+    parser.add_argument('--min-delta', type=float, default=0.0005,
+                        help='Минимальное абсолютное замедление в секундах для регрессии')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    groups = args.groups.split(',')
+    for group in groups:
+        if group not in GROUPS:
+            print(f"Неизвестная группа бенчмарков: {group}")
+            sys.exit(2)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        benchmark = Benchmark(sizes, args.repeat, workdir)
+        results = benchmark.run(groups)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'sizes': sizes,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Результаты сохранены в {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions, missing = compare_results(baseline, results, args.threshold, args.min_delta)
+        if missing:
+            print(f"Не измерено относительно базы: {len(missing)}")
+        if regressions:
+            print(f"Обнаружено регрессий: {len(regressions)}")
+            sys.exit(1)
+        print("Регрессий не обнаружено")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from assembler import Assembler, AtomicFile
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATE_VERSION = 1
+DEFAULT_STATE_FILE = '.uvm_build_state.json'
+SOURCE_SUFFIXES = ('.yaml', '.yml', '.json')
+OBJECT_SUFFIX = '.uvmo'
+
+
+def file_sha256(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def assembler_fingerprint():
+    # Изменение самого ассемблера делает недействительными все результаты сборки
+    return file_sha256(os.path.join(HERE, 'assembler.py'))
+
+
+def write_atomic(filename, data):
+    # Прерванная сборка не оставляет недописанных файлов
+    with AtomicFile(filename) as f:
+        f.write(data)
+
+
+def is_program_source(source):
+    # Программа в JSON - список команд; объекты JSON (манифесты, файлы
+    # состояния сборки) программами не являются
+    if not source.endswith('.json'):
+        return True
+    with open(source, 'rb') as f:
+        head = f.read(256).lstrip(b'\xef\xbb\xbf \t\r\n')
+    return not head.startswith(b'{')
+
+
+def collect_directory(directory, output_dir, exclude=()):
+    # Каталог вывода (он может лежать внутри исходного) и файлы exclude пропускаются
+    directory = os.path.abspath(directory)
+    output_dir = os.path.abspath(output_dir)
+    exclude = {os.path.abspath(filename) for filename in exclude}
+    targets = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if os.path.join(root, name) != output_dir)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            if (not name.endswith(SOURCE_SUFFIXES) or name == DEFAULT_STATE_FILE
+                    or source in exclude or not is_program_source(source)):
+                continue
+            relative = os.path.relpath(source, directory)
+            targets.append((source, os.path.join(output_dir, os.path.splitext(relative)[0] + '.bin')))
+    return output_dir, targets
+
+
+def collect_manifest(manifest_file, output_dir=None):
+    # Манифест: {"output_dir": "...", "programs": ["a.yaml", {"source": "b.yaml", "output": "b.bin"}]};
+    # относительные пути отсчитываются от каталога манифеста
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(manifest_file))
+    output_dir = os.path.abspath(output_dir or os.path.join(base, manifest.get('output_dir', 'build')))
+    targets = []
+    for entry in manifest['programs']:
+        if isinstance(entry, str):
+            entry = {'source': entry}
+        source = os.path.join(base, entry['source'])
+        if 'output' in entry:
+            output = os.path.join(output_dir, entry['output'])
+        else:
+            output = os.path.join(output_dir, os.path.splitext(os.path.basename(source))[0] + '.bin')
+        targets.append((source, output))
+    return output_dir, targets
+
+
+def load_state(state_file, fingerprint):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get('version') != STATE_VERSION or state.get('assembler') != fingerprint:
+        return {}
+    return state.get('entries', {})
+
+
+def save_state(state_file, fingerprint, entries):
+    state = {'version': STATE_VERSION, 'assembler': fingerprint, 'entries': entries}
+    write_atomic(state_file, json.dumps(state, indent=1, sort_keys=True).encode('utf-8'))
+
+
+def object_path(output):
+    # Модуль с данными и ссылками на символы собирается в объектный файл рядом
+    # с местом двоичного файла; компонует модули linker.py
+    return os.path.splitext(output)[0] + OBJECT_SUFFIX
+
+
+def is_up_to_date(source, output, entry, stat):
+    # Быстрая проверка по времени изменения и размеру; при их расхождении
+    # сравнивается хэш содержимого, чтобы простое касание файла не вело к сборке
+    if entry is None or entry['output'] != output:
+        return False
+    if not os.path.exists(object_path(output) if entry.get('object') else output):
+        return False
+    if entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+        return True
+    if entry['size'] != stat.st_size:
+        return False
+    if file_sha256(source) != entry['sha256']:
+        return False
+    entry['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+def assemble_file(task):
+    # Выполняется в процессе пула: файл читается один раз, и хэш берется
+    # от тех же байт, что ассемблируются
+    source, output = task
+    try:
+        stat = os.stat(source)
+        with open(source, 'rb') as f:
+            data = f.read()
+        assembler = Assembler()
+        program = assembler.parse_program(data, source)
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        if assembler.is_module(program):
+            obj = assembler.assemble_object(program)
+            write_atomic(object_path(output), json.dumps(obj, indent=1).encode('utf-8'))
+            result = {'object': True, 'bytes': len(obj['code']) // 2}
+        else:
+            binary_code, intermediate_repr = assembler.assemble(program)
+            write_atomic(output, bytes(binary_code))
+            result = {'commands': len(intermediate_repr), 'bytes': len(binary_code)}
+    except Exception as e:
+        return source, None, f"{type(e).__name__}: {e}"
+
+    entry = {'output': output, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+             'sha256': hashlib.sha256(data).hexdigest(), **result}
+    return source, entry, None
+
+
+def build(targets, state_file, workers=None, force=False):
+    fingerprint = assembler_fingerprint()
+    entries = {} if force else load_state(state_file, fingerprint)
+    new_entries = {}
+    pending = []
+    missing = []
+
+    for source, output in targets:
+        try:
+            stat = os.stat(source)
+        except OSError:
+            missing.append(source)
+            continue
+        entry = entries.get(source)
+        if is_up_to_date(source, output, entry, stat):
+            new_entries[source] = entry
+        else:
+            pending.append((source, output))
+
+    built = []
+    errors = [(source, "файл не найден") for source in missing]
+    workers = workers or os.cpu_count() or 1
+    if pending:
+        if workers == 1 or len(pending) == 1:
+            for source, entry, error in map(assemble_file, pending):
+                collect_result(source, entry, error, new_entries, built, errors)
+        else:
+            chunksize = max(1, len(pending) // (workers * 4))
+            with ProcessPoolExecutor(workers) as pool:
+                for source, entry, error in pool.map(assemble_file, pending, chunksize=chunksize):
+                    collect_result(source, entry, error, new_entries, built, errors)
+
+    # Записи удаленных источников и неудачных сборок в состояние не попадают
+    save_state(state_file, fingerprint, new_entries)
+    return {'built': built, 'unchanged': len(targets) - len(pending) - len(missing), 'errors': errors}
+
+
+def collect_result(source, entry, error, new_entries, built, errors):
+    if error is None:
+        new_entries[source] = entry
+        built.append(source)
+    else:
+        errors.append((source, error))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Параллельная инкрементальная сборка программ УВМ')
+    parser.add_argument('source', help='Каталог с исходными файлами (.yaml, .json) или JSON-манифест')
+    parser.add_argument('--out-dir', help='Каталог для двоичных файлов (по умолчанию build)')
+    parser.add_argument('--state', help=f'Файл состояния сборки (по умолчанию {DEFAULT_STATE_FILE} в каталоге вывода)')
+    parser.add_argument('--workers', type=int, help='Число процессов (по умолчанию по числу процессоров)')
+    parser.add_argument('--force', action='store_true', help='Пересобрать все программы')
+    parser.add_argument('--verbose', action='store_true', help='Перечислить собранные программы')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    start = time.perf_counter()
+
+    if os.path.isdir(args.source):
+        output_dir, targets = collect_directory(args.source, args.out_dir or 'build',
+                                                 [args.state] if args.state else [])
+    else:
+        output_dir, targets = collect_manifest(args.source, args.out_dir)
+
+    os.makedirs(output_dir, exist_ok=True)
+    state_file = args.state or os.path.join(output_dir, DEFAULT_STATE_FILE)
+    result = build(targets, state_file, args.workers, args.force)
+
+    if args.verbose:
+        for source in result['built']:
+            print(f"  собрано: {source}")
+    for source, error in result['errors']:
+        print(f"  ошибка: {source}: {error}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Программ: {len(targets)}, собрано: {len(result['built'])}, без изменений: {result['unchanged']}, "
+          f"ошибок: {len(result['errors'])} за {elapsed:.2f} с")
+    sys.exit(1 if result['errors'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from assembler import Assembler
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_PROGRAM = os.path.join(HERE, 'examples', 'vector_pow_working.yaml')
+
+# Бюджет времени импорта (мс) сверх модулей, которые загружает сам Python
+# при запуске, и модули, которые точка входа не должна загружать на этом пути.
+# Бюджет чуть выше медианы (интерпретатор около 14 мс, ассемблер 16 мс
+# с JSON и 28 мс с YAML) с запасом на разброс между запусками: возврат
+# прежних импортов (интерпретатор до правки - 23 мс) выходит за него,
+# запрещенные модули проверяются отдельно
+BUDGETS = {
+    'interpreter': {'imports_ms': 20, 'forbidden': ['xml', 'yaml', 'array', 'tempfile', 'hashlib']},
+    'assembler-json': {'imports_ms': 20, 'forbidden': ['yaml', 'tempfile']},
+    'assembler-yaml': {'imports_ms': 40, 'forbidden': []},
+}
+
+
+def parse_importtime(stderr):
+    # Строка -X importtime: "import time: self [us] | cumulative | имя";
+    # отступ в имени показывает вложенность импорта
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        modules[name.strip()] = (int(parts[1]), not name.startswith(' '))
+    return modules
+
+
+def import_report(cmd, repeat, startup_modules=()):
+    # Медиана времени из repeat запусков, без модулей запуска самого Python;
+    # медиана устойчива к отдельным медленным и случайно быстрым запускам
+    totals = []
+    loaded = set()
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + cmd,
+                                capture_output=True, text=True, check=True)
+        modules = parse_importtime(result.stderr)
+        totals.append(sum(cumulative for name, (cumulative, top_level) in modules.items()
+                          if top_level and name not in startup_modules))
+        loaded |= set(modules)
+    return statistics.median(totals) / 1000, loaded
+
+
+def wall_time(cmd, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + cmd, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def entry_points(workdir):
+    json_file = os.path.join(workdir, 'program.json')
+    bin_file = os.path.join(workdir, 'program.bin')
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(Assembler().load_program(SAMPLE_PROGRAM), f)
+
+    assembler = os.path.join(HERE, 'assembler.py')
+    interpreter = os.path.join(HERE, 'interpreter.py')
+    return {
+        'assembler-yaml': [assembler, SAMPLE_PROGRAM, bin_file],
+        'assembler-json': [assembler, json_file, bin_file],
+        'interpreter': [interpreter, bin_file, os.path.join(workdir, 'dump.xml'),
+                        '--dump-range', '3000-3006', '--quiet'],
+    }
+
+
+def check_startup(repeat=10, scale=1.0):
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        commands = entry_points(workdir)
+        base = wall_time(['-c', 'pass'], repeat)
+        _, startup_modules = import_report(['-c', 'pass'], 1)
+        print(f"Запуск пустого интерпретатора Python: {base:.1f} мс")
+
+        # assembler-yaml выполняется первым и создает двоичный файл для интерпретатора
+        for name, cmd in commands.items():
+            budget = BUDGETS[name]
+            imports_ms, modules = import_report(cmd, repeat, startup_modules)
+            wall_ms = wall_time(cmd, repeat)
+            limit = budget['imports_ms'] * scale
+            status = "OK" if imports_ms <= limit else "ПРЕВЫШЕН"
+            print(f"  {name:<16} импорт {imports_ms:6.1f} мс (бюджет {limit:.0f}) {status}, "
+                  f"запуск {wall_ms:6.1f} мс (+{wall_ms - base:.1f} к пустому)")
+
+            if imports_ms > limit:
+                failures.append(f"{name}: импорт {imports_ms:.1f} мс > {limit:.0f} мс")
+            for forbidden in budget['forbidden']:
+                loaded = sorted(module for module in modules
+                                if module == forbidden or module.startswith(forbidden + '.'))
+                if loaded:
+                    failures.append(f"{name}: загружены {', '.join(loaded)}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка бюджета времени запуска ассемблера и интерпретатора')
+    parser.add_argument('--repeat', type=int, default=10, help='Число запусков для замера, берется медиана')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Множитель бюджетов для медленных машин')
+    args = parser.parse_args()
+
+    failures = check_startup(args.repeat, args.scale)
+    for failure in failures:
+        print(f"Нарушение: {failure}")
+    if failures:
+        sys.exit(1)
+    print("Бюджет запуска соблюден")
+
+
+if __name__ == "__main__":
+    main()
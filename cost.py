@@ -0,0 +1,265 @@
+import sys
+import math
+import argparse
+from bisect import bisect_left
+from heapq import heappop, heappush
+from interpreter import decode_program, map_memory_file, MEMORY_SIZE
+
+
+# Время выполнения команды без длинной арифметики POW (с); замерено на
+# синтетических программах benchmark.py --groups interpreter
+COMMAND_COSTS = {'load': 0.45e-6, 'read': 0.55e-6, 'write': 0.6e-6, 'pow': 0.8e-6}
+
+# Время value1 ** value2 определяется последними умножениями Карацубы:
+# t ~ POW_BIT_COST * bits ** POW_BIT_EXPONENT, где bits - длина результата
+# в битах (результат обрезается до 0xFFFFFFFF уже после вычисления).
+# Степень двойки - это сдвиг, ее время линейно по длине результата
+POW_BIT_COST = 1.5e-11
+POW_BIT_EXPONENT = 1.585
+POW_SHIFT_COST = 5e-9
+
+# Операнды POW, неизвестные до выполнения, оцениваются как результат такой длины
+UNKNOWN_POW_BITS = 64
+
+MAX_CELL = 0xFFFFFFFF
+
+
+def pow_bits(value1, value2):
+    if value1 <= 1 or value2 == 0:
+        return 0
+    return value2 * math.log2(value1)
+
+
+def pow_cost(value1, value2):
+    bits = pow_bits(value1, value2)
+    if bits == 0:
+        return 0.0
+    if value1 & (value1 - 1) == 0:
+        return POW_SHIFT_COST * bits
+    return POW_BIT_COST * bits ** POW_BIT_EXPONENT
+
+
+def pow_result(value1, value2):
+    # То же, что execute_pow, но без вычисления заведомо обрезаемых степеней
+    if pow_bits(value1, value2) > 40:
+        return MAX_CELL
+    return min(value1 ** value2, MAX_CELL)
+
+
+def estimate_cost(program, memory, overlay=None):
+    # Оценка времени выполнения декодированной программы без ее выполнения.
+    # Проход линейный, как и выполнение: значения регистров и ячеек памяти
+    # отслеживаются, пока известны, чтобы найти операнды POW. memory - начальный
+    # образ памяти с загруженной программой (None - неизвестен до запуска),
+    # overlay - {адрес: значение} поверх него.
+    # Значение хранится вместе с источником: None - не зависит от начального
+    # образа, ('input', адрес) - ячейка образа, ('pow', номер) - результат POW.
+    # Источники операндов POW позволяют оценить задание с другими входными
+    # данными без нового прохода (см. estimate_patched)
+    code_end, instructions = program
+    unknown = (None, None)
+    registers = [(0, None)] * 32
+    overlay = overlay or {}
+    written = {}
+    clobbered = False
+    counts = dict.fromkeys(COMMAND_COSTS, 0)
+    pows = []
+    pow_inputs = []
+    dependents = {}
+    address_inputs = set()
+    pow_seconds = 0.0
+    pow_known = 0
+    pow_unknown = 0
+
+    def inputs_of(source):
+        if source is None:
+            return ()
+        if source[0] == 'input':
+            return (source[1],)
+        return pow_inputs[source[1]]
+
+    def address_of(term):
+        # Адрес из регистра: если он зависит от входных данных, другие входные
+        # данные меняют сам ход анализа, и задание оценивается заново
+        value, source = term
+        address_inputs.update(inputs_of(source))
+        return value
+
+    def cell(address):
+        if address in written:
+            return written[address]
+        if address >= MEMORY_SIZE:
+            return 0, None
+        if clobbered:
+            return unknown
+        if address in overlay:
+            return overlay[address], ('input', address)
+        return (None if memory is None else memory[address]), ('input', address)
+
+    for next_pc, command_type, params in instructions:
+        if command_type == 'load':
+            registers[params['address']] = (params['constant'], None)
+        elif command_type == 'read':
+            base = address_of(registers[params['address_reg']])
+            if base is None:
+                registers[params['result_reg']] = unknown
+            elif base + params['offset'] < MEMORY_SIZE:
+                registers[params['result_reg']] = cell(base + params['offset'])
+        elif command_type == 'write':
+            base = address_of(registers[params['address_reg']])
+            if base is None:
+                # Запись по неизвестному адресу могла изменить любую ячейку
+                clobbered = True
+                written = {}
+            elif base + params['offset'] < MEMORY_SIZE:
+                written[base + params['offset']] = registers[params['value_reg']]
+        else:
+            if params['value2_reg'] >= 32 or params['result_reg'] >= 32:
+                break
+            index = len(pows)
+            first = cell(params['value1_addr'])
+            value2_addr = address_of(registers[params['value2_reg']])
+            second = unknown if value2_addr is None else cell(value2_addr)
+            cost, result = pow_estimate(first[0], second[0])
+            if result is None:
+                pow_unknown += 1
+            else:
+                pow_known += 1
+            pow_seconds += cost
+            pows.append((first, second, cost, result))
+            pow_inputs.append(frozenset(inputs_of(first[1])) | frozenset(inputs_of(second[1])))
+            for source in {first[1], second[1]} - {None}:
+                dependents.setdefault(source, []).append(index)
+            registers[params['result_reg']] = (result, ('pow', index))
+        counts[command_type] += 1
+
+    seconds = sum(counts[name] * COMMAND_COSTS[name] for name in counts) + pow_seconds
+    inputs = sorted(source[1] for source in dependents if source[0] == 'input')
+    return {'seconds': seconds, 'commands': counts, 'pow_seconds': pow_seconds,
+            'pow_known': pow_known, 'pow_unknown': pow_unknown,
+            'pows': pows, 'dependents': dependents, 'inputs': inputs,
+            'address_inputs': sorted(address_inputs)}
+
+
+def pow_estimate(value1, value2):
+    # Время и результат одной команды POW; None - операнды неизвестны
+    if value1 is None or value2 is None:
+        return POW_BIT_COST * UNKNOWN_POW_BITS ** POW_BIT_EXPONENT, None
+    return pow_cost(value1, value2), pow_result(value1, value2)
+
+
+def patched_cells(addresses, patches):
+    # Ячейки из отсортированного списка addresses, которые задают входные данные
+    # задания ([{"address": A, "values": [...]}]); поздние данные перекрывают ранние
+    cells = {}
+    for patch in patches:
+        start, values = patch['address'], patch['values']
+        index = bisect_left(addresses, start)
+        while index < len(addresses) and addresses[index] < start + len(values):
+            cells[addresses[index]] = values[addresses[index] - start]
+            index += 1
+    return cells
+
+
+def estimate_patched(profile, program, memory, patches):
+    # Оценка задания по профилю программы (estimate_cost без overlay): входные
+    # данные меняют только операнды POW, которые их читают, и зависящие от
+    # результатов этих POW. Пересчитываются только такие команды POW, а полный
+    # проход нужен, лишь когда входные данные задают адреса чтения или записи
+    if not patches:
+        return profile['seconds']
+    if patched_cells(profile['address_inputs'], patches):
+        overlay = {}
+        for patch in patches:
+            for index, value in enumerate(patch['values']):
+                overlay[patch['address'] + index] = value
+        return estimate_cost(program, memory, overlay)['seconds']
+
+    inputs = patched_cells(profile['inputs'], patches)
+    pows = profile['pows']
+    dependents = profile['dependents']
+    pending = sorted({index for address in inputs for index in dependents[('input', address)]})
+    results = {}
+    seconds = profile['seconds']
+
+    def value(term):
+        value, source = term
+        if source is None:
+            return value
+        if source[0] == 'input':
+            return inputs.get(source[1], value)
+        return results.get(source[1], pows[source[1]][3])
+
+    # Результат POW влияет только на POW дальше по программе: номера
+    # обрабатываются по возрастанию
+    while pending:
+        index = heappop(pending)
+        if pending and pending[0] == index:
+            continue
+        first, second, cost, result = pows[index]
+        new_cost, new_result = pow_estimate(value(first), value(second))
+        seconds += new_cost - cost
+        if new_result != result:
+            results[index] = new_result
+            for dependent in dependents.get(('pow', index), ()):
+                heappush(pending, dependent)
+    return seconds
+
+
+def initial_memory(binary, base_image=None):
+    if base_image:
+        memory_map, base = map_memory_file(base_image)
+        memory = base.tolist()
+        base.release()
+        memory_map.close()
+    else:
+        memory = [0] * MEMORY_SIZE
+    size = min(len(binary), MEMORY_SIZE)
+    memory[:size] = binary[:size]
+    return memory
+
+
+def estimate_file(binary_file, base_image=None):
+    with open(binary_file, 'rb') as f:
+        binary = f.read()
+    return estimate_cost(decode_program(binary), initial_memory(binary, base_image))
+
+
+def simulate_makespan(costs, workers):
+    # Списочное расписание: очередная задача достается первому освободившемуся
+    # процессу, как в пуле; возвращает время завершения последней задачи
+    finish = [0.0] * workers
+    for cost in costs:
+        index = finish.index(min(finish))
+        finish[index] += cost
+    return max(finish)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Статическая оценка времени выполнения программ УВМ')
+    parser.add_argument('binary_files', nargs='+', help='Двоичные файлы программ')
+    parser.add_argument('--base-image', help='Файл памяти с начальным образом (см. --memory-file)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    estimates = []
+    for binary_file in args.binary_files:
+        try:
+            estimates.append((binary_file, estimate_file(binary_file, args.base_image)))
+        except (OSError, ValueError) as e:
+            print(f"Ошибка: {binary_file}: {e}")
+            sys.exit(1)
+
+    # Самые долгие программы первыми
+    estimates.sort(key=lambda item: item[1]['seconds'], reverse=True)
+    for binary_file, estimate in estimates:
+        counts = ', '.join(f"{name} {count}" for name, count in estimate['commands'].items())
+        print(f"{binary_file}: {estimate['seconds'] * 1000:.3f} мс ({counts}; "
+              f"POW: известных операндов {estimate['pow_known']}, неизвестных {estimate['pow_unknown']}, "
+              f"{estimate['pow_seconds'] * 1000:.3f} мс)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import sys
+import argparse
+from interpreter import UVMInterpreter
+
+
+HELP_TEXT = """Команды отладчика:
+  s, step [n]                 выполнить n команд (по умолчанию 1)
+  c, continue                 выполнять до точки останова или конца программы
+  b, break PC [условие]       точка останова (условие: выражение над R, M, pc)
+  ub, unbreak PC              удалить точку останова
+  w, watch START-END [rwp] [break|log]
+                              точка наблюдения за диапазоном памяти
+  uw, unwatch ID              удалить точку наблюдения
+  i, info                     список точек останова и наблюдения
+  r, regs                     состояние регистров
+  m, mem START-END            содержимое памяти
+  l, list [n]                 показать следующие n команд
+  q, quit                     выход"""
+
+
+class Debugger:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def parse_range(self, text):
+        if '-' in text:
+            start, end = map(int, text.split('-'))
+        else:
+            start = end = int(text)
+        return start, end
+
+    def peek_commands(self, count):
+        vm = self.interpreter
+        saved_pc = vm.pc
+        lines = []
+        try:
+            for _ in range(count):
+                pc = vm.pc
+                command_type, params = vm.decode_command()
+                if command_type is None:
+                    break
+                marker = '*' if pc in vm.breakpoints else ' '
+                lines.append(f"{marker} {pc:5d}: {command_type.upper()} {params}")
+        finally:
+            vm.pc = saved_pc
+        return lines
+
+    def report_stop(self):
+        vm = self.interpreter
+        if vm.paused:
+            reason = vm.pause_reason
+            if 'breakpoint' in reason:
+                print(f"Остановка в точке останова {reason['breakpoint']}")
+            else:
+                print(vm.format_watch_hit(reason))
+        elif vm.halted:
+            print(f"Программа завершена, выполнено команд: {vm.steps}")
+
+        for line in self.peek_commands(1):
+            print(line)
+
+    def resume(self, max_commands=None):
+        vm = self.interpreter
+        if vm.halted:
+            print("Программа уже завершена")
+            return
+
+        # Команду под точкой останова, на которой стоим, выполняем без повторной
+        # остановки; после остановки по точке наблюдения точка останова срабатывает
+        executed = 0
+        if vm.paused and vm.pause_reason == {'breakpoint': vm.pc}:
+            vm.paused = False
+            vm.pause_reason = None
+            if not vm.step():
+                self.report_stop()
+                return
+            executed = 1
+            if vm.paused:
+                self.report_stop()
+                return
+
+        if max_commands is None:
+            vm.execute()
+        elif max_commands > executed:
+            vm.execute(max_commands - executed)
+        self.report_stop()
+
+    def show_registers(self):
+        registers = self.interpreter.registers
+        for i in range(0, 32, 8):
+            regs = [f"R[{i + j}]=0x{registers[i + j]:02x}" for j in range(8)]
+            print("  " + " | ".join(regs))
+
+    def show_memory(self, start, end):
+        memory = self.interpreter.memory
+        for addr in range(start, min(end, len(memory) - 1) + 1):
+            print(f"  [{addr}] = {memory[addr]} (0x{memory[addr]:02x})")
+
+    def show_info(self):
+        vm = self.interpreter
+        if not vm.breakpoints and not vm.watchpoints:
+            print("Точек останова и наблюдения нет")
+        for pc, (condition, _) in sorted(vm.breakpoints.items()):
+            suffix = f" если {condition}" if condition else ""
+            print(f"  Точка останова: {pc}{suffix}")
+        for wp in vm.watchpoints:
+            print(f"  Точка наблюдения {wp['id']}: {wp['start']}-{wp['end']} "
+                  f"[{wp['access']}] {wp['action']}")
+
+    def execute_line(self, line):
+        parts = line.split()
+        if not parts:
+            return True
+
+        command, args = parts[0], parts[1:]
+        vm = self.interpreter
+
+        try:
+            if command in ('q', 'quit'):
+                return False
+            elif command in ('h', 'help'):
+                print(HELP_TEXT)
+            elif command in ('s', 'step'):
+                self.resume(int(args[0]) if args else 1)
+            elif command in ('c', 'continue'):
+                self.resume()
+            elif command in ('b', 'break'):
+                vm.add_breakpoint(int(args[0]), ' '.join(args[1:]) or None)
+                print(f"Точка останова установлена: {args[0]}")
+            elif command in ('ub', 'unbreak'):
+                vm.remove_breakpoint(int(args[0]))
+            elif command in ('w', 'watch'):
+                start, end = self.parse_range(args[0])
+                access = args[1] if len(args) > 1 else 'rwp'
+                action = args[2] if len(args) > 2 else 'break'
+                watch_id = vm.add_watchpoint(start, end, access, action)
+                print(f"Точка наблюдения {watch_id} установлена: {start}-{end}")
+            elif command in ('uw', 'unwatch'):
+                vm.remove_watchpoint(int(args[0]))
+            elif command in ('i', 'info'):
+                self.show_info()
+            elif command in ('r', 'regs'):
+                self.show_registers()
+            elif command in ('m', 'mem'):
+                self.show_memory(*self.parse_range(args[0]))
+            elif command in ('l', 'list'):
+                for text in self.peek_commands(int(args[0]) if args else 5):
+                    print(text)
+            else:
+                print(f"Неизвестная команда: {command} (help - список команд)")
+        except (ValueError, IndexError, SyntaxError) as e:
+            print(f"Ошибка: {e}")
+        except Exception as e:
+            print(f"Ошибка выполнения команды по адресу {vm.pc}: {e}")
+
+        return True
+
+    def interact(self, stream=None):
+        stream = stream or sys.stdin
+        interactive = stream.isatty()
+
+        while True:
+            if interactive:
+                print(f"(uvm pc={self.interpreter.pc}) ", end='', flush=True)
+            line = stream.readline()
+            if not line:
+                break
+            if not self.execute_line(line.strip()):
+                break
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Пошаговый отладчик УВМ')
+    parser.add_argument('binary_file', help='Путь к бинарному файлу с программой')
+    parser.add_argument('--break', dest='breaks', action='append', default=[],
+                        help='Точка останова PC[:условие] (можно указывать несколько раз)')
+    parser.add_argument('--watch', action='append', default=[],
+                        help='Точка наблюдения START-END[:rwp[:break|log]]')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    interpreter = UVMInterpreter()
+    interpreter.load_program(args.binary_file)
+    debugger = Debugger(interpreter)
+
+    try:
+        for spec in args.breaks:
+            pc, _, condition = spec.partition(':')
+            interpreter.add_breakpoint(int(pc), condition or None)
+        for spec in args.watch:
+            fields = spec.split(':')
+            start, end = debugger.parse_range(fields[0])
+            access = fields[1] if len(fields) > 1 else 'rwp'
+            action = fields[2] if len(fields) > 2 else 'break'
+            interpreter.add_watchpoint(start, end, access, action)
+    except (ValueError, SyntaxError) as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+
+    print("Отладчик УВМ (help - список команд)")
+    for line in debugger.peek_commands(1):
+        print(line)
+    debugger.interact()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import io
+import os
+import sys
+import time
+import tempfile
+import random
+import argparse
+import multiprocessing
+from assembler import Assembler
+from interpreter import UVMInterpreter, InstructionStream, MEMORY_SIZE
+from program_cache import ProgramCache
+from batch import SharedImages, attach, detach, execute_job, release_memory
+from generator import ProgramGenerator, DEFAULT_MIX, MAX_REACHABLE_ADDRESS, command_to_yaml, pow_result
+
+
+# Код программы не длиннее 6 байт на команду и должен помещаться ниже области данных
+MAX_PROGRAM_SIZE = (MAX_REACHABLE_ADDRESS - 256 + 1) // 6
+
+# Ограничение на стоимость POW при сокращении программ: число бит результата до насыщения
+POW_BITS_LIMIT = 4096
+
+
+def state_from_interpreter(interpreter, code_size):
+    # Ячейки кода не сравниваются: движки с раздельной памятью кода их не содержат
+    return {'registers': list(interpreter.registers), 'memory': list(interpreter.memory[code_size:]),
+            'code_size': code_size, 'steps': interpreter.steps}
+
+
+def run_reference(commands, binary):
+    interpreter = UVMInterpreter()
+    interpreter.memory[:len(binary)] = binary
+    interpreter.execute()
+    return state_from_interpreter(interpreter, len(binary))
+
+
+def run_checked(commands, binary):
+    # Цикл с отладочными проверками должен давать тот же результат, что и обычный
+    interpreter = UVMInterpreter()
+    interpreter.memory[:len(binary)] = binary
+    interpreter.execute_checked()
+    return state_from_interpreter(interpreter, len(binary))
+
+
+def run_stream(commands, binary):
+    # Маленький блок чтения проверяет склейку команд на границах блоков
+    interpreter = UVMInterpreter()
+    interpreter.execute_stream(InstructionStream(io.BytesIO(binary), chunk_size=7))
+    return state_from_interpreter(interpreter, len(binary))
+
+
+def run_stream_mmap(commands, binary):
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'program.bin')
+        with open(filename, 'wb') as f:
+            f.write(binary)
+        interpreter = UVMInterpreter()
+        interpreter.execute_stream(InstructionStream(filename, use_mmap=True))
+    return state_from_interpreter(interpreter, len(binary))
+
+
+def run_memory_file(commands, binary):
+    # Память данных в отображаемом файле вместо списка
+    with tempfile.TemporaryDirectory() as workdir:
+        interpreter = UVMInterpreter()
+        interpreter.attach_memory_file(os.path.join(workdir, 'memory.mem'))
+        try:
+            interpreter.load_bytes(binary)
+            interpreter.execute()
+            return state_from_interpreter(interpreter, len(binary))
+        finally:
+            interpreter.close()
+
+
+def run_cached(commands, binary):
+    # Вторая загрузка берет декодированную программу из дискового кэша
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = ProgramCache(workdir)
+        cache.load(binary)
+        program = cache.load(binary)
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary)
+    interpreter.execute_decoded(program)
+    return state_from_interpreter(interpreter, len(binary))
+
+
+def run_overlay(commands, binary):
+    # Путь batch.py: образ программы в общей памяти, задание выполняется
+    # на частной копии страниц, переданной интерпретатору готовой
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'program.bin')
+        with open(filename, 'wb') as f:
+            f.write(binary)
+        images = SharedImages()
+        try:
+            images.add(filename)
+            attach(images.registry)
+            interpreter = execute_job({'id': 0, 'binary': filename})
+            try:
+                return state_from_interpreter(interpreter, len(binary))
+            finally:
+                release_memory(interpreter)
+        finally:
+            detach()
+            images.close()
+
+
+def run_oracle(commands, binary):
+    model = ProgramGenerator(data_base=0, footprint=1)
+    for command in commands:
+        model.emit(command)
+    cells = [0] * (MEMORY_SIZE - len(binary))
+    for address, value in model.memory.items():
+        if len(binary) <= address < MEMORY_SIZE:
+            cells[address - len(binary)] = value
+    return {'registers': list(model.registers), 'memory': cells,
+            'code_size': len(binary), 'steps': model.count}
+
+
+ENGINES = {
+    'reference': run_reference,
+    'checked': run_checked,
+    'oracle': run_oracle,
+    'stream': run_stream,
+    'stream-mmap': run_stream_mmap,
+    'memory-file': run_memory_file,
+    'cached': run_cached,
+    'overlay': run_overlay,
+}
+
+
+def random_program(seed, size):
+    rng = random.Random(seed)
+    mix = {name: rng.choice([0, 1, 2, 4]) for name in DEFAULT_MIX}
+    if not any(mix.values()):
+        mix['load'] = 1
+
+    footprint = rng.choice([1, 8, 64, 256])
+    # Область данных размещается строго выше кода и ячейки за ним, которую
+    # интерпретатор читает как код, чтобы эталонная модель оставалась точной
+    data_base = rng.randint(size * 6 + 1, MAX_REACHABLE_ADDRESS - footprint + 1)
+    generator = ProgramGenerator(mix, footprint, data_base, locality=rng.random(),
+                                 pow_base_max=rng.choice([1, 4, 16, 255]),
+                                 pow_exp_max=rng.choice([0, 2, 4, 8]), seed=seed)
+    return list(generator.commands(rng.randint(1, size)))
+
+
+def encode(commands):
+    assembler = Assembler()
+    binary = bytearray()
+    for command in commands:
+        bytes_list, _ = assembler.assemble_command(command)
+        binary.extend(bytes_list)
+    return bytes(binary)
+
+
+def is_safe(commands):
+    # Сокращенная программа допустима, если обращается только к памяти данных
+    # за кодом и не вычисляет слишком больших степеней. Ячейка code_size сразу
+    # за кодом читается интерпретатором как код следующей команды, поэтому
+    # данные начинаются с code_size + 1
+    code_size = sum(6 if command['command'] == 'pow' else 3 for command in commands)
+    registers = [0] * 32
+    memory = {}
+
+    for command in commands:
+        kind = command['command']
+        if kind == 'load':
+            registers[command['address']] = command['constant']
+            continue
+        if kind in ('read', 'write'):
+            address = registers[command['address_reg']] + command['offset']
+            if not code_size < address < MEMORY_SIZE:
+                return False
+            if kind == 'read':
+                registers[command['result_reg']] = memory.get(address, 0)
+            else:
+                memory[address] = registers[command['value_reg']]
+            continue
+
+        value1_addr = command['value1_addr']
+        value2_addr = registers[command['value2_reg']]
+        for address in (value1_addr, value2_addr):
+            if not code_size < address < MEMORY_SIZE:
+                return False
+        value1 = memory.get(value1_addr, 0)
+        value2 = memory.get(value2_addr, 0)
+        if value1 > 1 and value1.bit_length() * value2 > POW_BITS_LIMIT:
+            return False
+        registers[command['result_reg']] = pow_result(value1, value2)
+
+    return True
+
+
+def compare_states(states):
+    names = list(states)
+    reference = states[names[0]]
+    for name in names[1:]:
+        state = states[name]
+        for field in ('steps', 'registers', 'memory'):
+            if state[field] != reference[field]:
+                return describe_difference(names[0], name, field, reference, state)
+    return None
+
+
+def describe_difference(first, second, field, reference, state):
+    expected, actual = reference[field], state[field]
+    if field == 'registers':
+        index = next(i for i in range(len(expected)) if expected[i] != actual[i])
+        detail = f"R[{index}]: {expected[index]} != {actual[index]}"
+    elif field == 'memory':
+        index = next(i for i in range(len(expected)) if expected[i] != actual[i])
+        detail = f"адрес {reference['code_size'] + index}: {expected[index]} != {actual[index]}"
+    else:
+        detail = f"{expected} != {actual}"
+    return f"{first} и {second} расходятся в {field}: {detail}"
+
+
+def check_program(commands, engines):
+    binary = encode(commands)
+    states = {}
+    for name in engines:
+        try:
+            states[name] = ENGINES[name](commands, binary)
+        except Exception as e:
+            return f"{name}: исключение {type(e).__name__}: {e}"
+    return compare_states(states)
+
+
+def shrink(commands, engines):
+    # Дельта-отладка: удаляем все более мелкие куски, пока расхождение сохраняется
+    def failing(candidate):
+        return candidate and is_safe(candidate) and check_program(candidate, engines) is not None
+
+    chunk = len(commands) // 2
+    while chunk >= 1:
+        start = 0
+        while start < len(commands):
+            candidate = commands[:start] + commands[start + chunk:]
+            if failing(candidate):
+                commands = candidate
+            else:
+                start += chunk
+        chunk //= 2
+    return commands
+
+
+def check_seed(task):
+    seed, size, engines = task
+    commands = random_program(seed, size)
+    return seed, check_program(commands, engines)
+
+
+def run_campaign(seeds, size, engines, workers):
+    tasks = ((seed, size, engines) for seed in seeds)
+    if workers == 1:
+        yield from map(check_seed, tasks)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(check_seed, tasks, chunksize=64)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Дифференциальное тестирование движков УВМ')
+    parser.add_argument('--programs', type=int, default=1000, help='Число проверяемых программ')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение для первой программы')
+    parser.add_argument('--size', type=int, default=200, help='Максимальная длина программы в командах')
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help=f"Движки через запятую ({', '.join(ENGINES)})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Число процессов')
+    parser.add_argument('--max-failures', type=int, default=1,
+                        help='Остановиться после указанного числа расхождений')
+    parser.add_argument('--save-dir', help='Каталог для сохранения сокращенных контрпримеров (YAML)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    engines = args.engines.split(',')
+    for name in engines:
+        if name not in ENGINES:
+            print(f"Неизвестный движок: {name}")
+            sys.exit(2)
+    if not 1 <= args.size <= MAX_PROGRAM_SIZE:
+        print(f"Длина программы должна быть в диапазоне 1-{MAX_PROGRAM_SIZE}")
+        sys.exit(2)
+    if len(engines) < 2:
+        print("Для сравнения нужно не менее двух движков")
+        sys.exit(2)
+
+    start = time.perf_counter()
+    checked = 0
+    failures = []
+    seeds = range(args.seed, args.seed + args.programs)
+
+    for seed, difference in run_campaign(seeds, args.size, engines, args.workers):
+        checked += 1
+        if difference:
+            failures.append(seed)
+            print(f"Расхождение на программе seed={seed}: {difference}")
+            if len(failures) >= args.max_failures:
+                break
+
+    elapsed = time.perf_counter() - start
+    rate = checked / elapsed * 3600 if elapsed > 0 else 0
+    print(f"Проверено программ: {checked} за {elapsed:.1f} с ({rate:.0f} программ/ч), "
+          f"движки: {', '.join(engines)}")
+
+    for seed in failures:
+        commands = shrink(random_program(seed, args.size), engines)
+        print(f"\nМинимальный контрпример для seed={seed} ({len(commands)} команд):")
+        print(check_program(commands, engines))
+        text = ''.join(command_to_yaml(command) for command in commands)
+        print(text)
+        if args.save_dir:
+            os.makedirs(args.save_dir, exist_ok=True)
+            filename = os.path.join(args.save_dir, f"counterexample_{seed}.yaml")
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(text)
+            print(f"Сохранено в {filename}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import os
+import sys
+import argparse
+from interpreter import map_memory_file, MEMORY_SIZE, MEMORY_CELL_SIZE
+
+
+# Размер блока при сравнении двоичных файлов памяти: равные блоки
+# сравниваются целиком на уровне C, поячеечно разбираются только различные
+COMPARE_BLOCK = 4096
+
+KIND_NAMES = {
+    'value': 'различаются значения',
+    'only_first': 'только в первом дампе',
+    'only_second': 'только во втором дампе',
+}
+
+
+def detect_format(filename):
+    with open(filename, 'rb') as f:
+        head = f.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+    if head.startswith(b'<'):
+        return 'xml'
+    if os.path.getsize(filename) == MEMORY_SIZE * MEMORY_CELL_SIZE:
+        return 'memory'
+    raise ValueError(f"{filename}: неизвестный формат дампа (ожидается XML-дамп или файл памяти)")
+
+
+def dump_coverage(filename, dump_format):
+    # Адреса, которые дамп покрывает, - список интервалов (start, end).
+    # Автоматический дамп перечисляет их в атрибуте ranges (пустой дамп - ranges=""),
+    # дамп --dump-range задает start и end, файл памяти покрывает всю память
+    full = [(0, MEMORY_SIZE - 1)]
+    if dump_format == 'memory':
+        return full
+
+    from xml.etree.ElementTree import iterparse
+
+    with open(filename, 'rb') as f:
+        _, root = next(iterparse(f, events=('start',)))
+    if 'ranges' in root.attrib:
+        coverage = []
+        for interval in filter(None, root.get('ranges').split(',')):
+            start, end = map(int, interval.split('-'))
+            coverage.append((start, end))
+        return coverage
+    if 'start' in root.attrib and 'end' in root.attrib:
+        # Ячейки за концом памяти в дамп не попадают
+        start, end = int(root.get('start')), min(int(root.get('end')), MEMORY_SIZE - 1)
+        return [(start, end)] if start <= end else []
+    return full
+
+
+def coverage_checker(coverage):
+    # Адреса при слиянии возрастают, поэтому интервалы проходятся один раз
+    index = 0
+
+    def covered(address):
+        nonlocal index
+        while index < len(coverage) and coverage[index][1] < address:
+            index += 1
+        return index < len(coverage) and coverage[index][0] <= address
+
+    return covered
+
+
+def iter_xml_cells(filename):
+    # Потоковый разбор: обработанные элементы сразу удаляются из дерева,
+    # поэтому расход памяти не зависит от размера дампа
+    from xml.etree.ElementTree import iterparse
+
+    root = None
+    for event, elem in iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag == 'byte':
+            yield int(elem.get('address')), int(elem.get('value'))
+            elem.clear()
+            root.clear()
+
+
+def iter_memory_cells(filename, coverage=None):
+    # coverage ограничивает выборку адресами, которые покрывает другой дамп
+    memory_map, memory = map_memory_file(filename)
+    try:
+        for start, end in [(0, MEMORY_SIZE - 1)] if coverage is None else coverage:
+            for address in range(start, end + 1):
+                yield address, memory[address]
+    finally:
+        memory.release()
+        memory_map.close()
+
+
+def iter_cells(filename, dump_format, coverage=None):
+    if dump_format == 'xml':
+        return iter_xml_cells(filename)
+    return iter_memory_cells(filename, coverage)
+
+
+def diff_cells(first, second, stats, first_covered=None, second_covered=None):
+    # Слияние двух упорядоченных по адресу потоков (адрес, значение): выдает
+    # адреса, где дампы расходятся, с видом расхождения и парой значений.
+    # Ячейка только одного дампа - расхождение, если другой дамп покрывает
+    # ее адрес (проверка first_covered/second_covered) или проверки не заданы
+    missing = (None, None)
+    a_address, a_value = next(first, missing)
+    b_address, b_value = next(second, missing)
+
+    while a_address is not None or b_address is not None:
+        if b_address is None or (a_address is not None and a_address < b_address):
+            if second_covered is None or second_covered(a_address):
+                stats['only_first'] += 1
+                yield a_address, 'only_first', a_value, None
+            a_address, a_value = next(first, missing)
+        elif a_address is None or b_address < a_address:
+            if first_covered is None or first_covered(b_address):
+                stats['only_second'] += 1
+                yield b_address, 'only_second', None, b_value
+            b_address, b_value = next(second, missing)
+        else:
+            stats['compared'] += 1
+            if a_value != b_value:
+                stats['different'] += 1
+                yield a_address, 'value', a_value, b_value
+            a_address, a_value = next(first, missing)
+            b_address, b_value = next(second, missing)
+
+
+def diff_memory_files(first_file, second_file, stats):
+    # Оба дампа - файлы памяти: сравнение блоками без разбора каждой ячейки
+    first_map, first = map_memory_file(first_file)
+    second_map, second = map_memory_file(second_file)
+    try:
+        for start in range(0, MEMORY_SIZE, COMPARE_BLOCK):
+            end = min(start + COMPARE_BLOCK, MEMORY_SIZE)
+            stats['compared'] += end - start
+            if first[start:end] == second[start:end]:
+                continue
+            for address in range(start, end):
+                if first[address] != second[address]:
+                    stats['different'] += 1
+                    yield address, 'value', first[address], second[address]
+    finally:
+        first.release()
+        second.release()
+        first_map.close()
+        second_map.close()
+
+
+def diff_ranges(first_file, second_file, stats=None, missing=False):
+    # Расходящиеся адреса группируются в непрерывные диапазоны одного вида;
+    # каждый диапазон выдается сразу, как только закончился. По умолчанию
+    # сравниваются только адреса, которые покрывают оба дампа; с missing
+    # ячейки вне покрытия другого дампа тоже считаются расхождениями.
+    # В stats['first_covered'] и stats['second_covered'] - число адресов,
+    # которые покрывает каждый дамп (без missing покрытие не вычисляется)
+    if stats is None:
+        stats = {}
+    for key in ('compared', 'different', 'only_first', 'only_second', 'first_covered', 'second_covered'):
+        stats.setdefault(key, 0)
+
+    first_format, second_format = detect_format(first_file), detect_format(second_file)
+    if first_format == second_format == 'memory':
+        stats['first_covered'] = stats['second_covered'] = MEMORY_SIZE
+        cells = diff_memory_files(first_file, second_file, stats)
+    elif missing:
+        cells = diff_cells(iter_cells(first_file, first_format), iter_cells(second_file, second_format), stats)
+    else:
+        first_coverage = dump_coverage(first_file, first_format)
+        second_coverage = dump_coverage(second_file, second_format)
+        stats['first_covered'] = sum(end - start + 1 for start, end in first_coverage)
+        stats['second_covered'] = sum(end - start + 1 for start, end in second_coverage)
+        cells = diff_cells(iter_cells(first_file, first_format, second_coverage),
+                           iter_cells(second_file, second_format, first_coverage), stats,
+                           coverage_checker(first_coverage), coverage_checker(second_coverage))
+
+    current = None
+    for address, kind, a_value, b_value in cells:
+        if current and current['kind'] == kind and current['end'] == address - 1:
+            current['end'] = address
+            continue
+        if current:
+            yield current
+        current = {'start': address, 'end': address, 'kind': kind, 'first': a_value, 'second': b_value}
+    if current:
+        yield current
+
+
+def format_range(diff_range):
+    start, end = diff_range['start'], diff_range['end']
+    span = f"{start}" if start == end else f"{start}-{end}"
+    text = f"  {span}: {KIND_NAMES[diff_range['kind']]}"
+    if diff_range['kind'] == 'value':
+        text += f" (с адреса {start}: {diff_range['first']} -> {diff_range['second']})"
+    return text
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Сравнение дампов памяти УВМ (XML или файлы памяти)')
+    parser.add_argument('first', help='Первый дамп')
+    parser.add_argument('second', help='Второй дамп')
+    parser.add_argument('--first-only', action='store_true',
+                        help='Остановиться на первом расхождении')
+    parser.add_argument('--missing', action='store_true',
+                        help='Сообщать о ячейках вне диапазона другого дампа (по умолчанию '
+                             'сравниваются только адреса, которые есть в обоих дампах)')
+    parser.add_argument('--max-ranges', type=int, default=100,
+                        help='Максимальное число выводимых диапазонов (остальные только считаются)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    stats = {}
+    shown = 0
+    ranges = 0
+
+    try:
+        for diff_range in diff_ranges(args.first, args.second, stats, args.missing):
+            ranges += 1
+            if shown < args.max_ranges:
+                print(format_range(diff_range))
+                shown += 1
+            if args.first_only:
+                break
+    except (OSError, ValueError, SyntaxError) as e:
+        print(f"Ошибка: {e}")
+        sys.exit(2)
+
+    if ranges == 0:
+        if stats['compared'] == 0 and stats['first_covered'] and stats['second_covered']:
+            # Оба дампа непусты, но общих адресов нет: вероятно, сравниваются не те дампы
+            print(f"Дампы не пересекаются по адресам (покрыто ячеек: {stats['first_covered']} "
+                  f"и {stats['second_covered']}), сравнивать нечего; --missing покажет все ячейки")
+            sys.exit(2)
+        print(f"Дампы совпадают (сравнено ячеек: {stats['compared']})")
+        sys.exit(0)
+
+    if args.first_only:
+        print("Найдено расхождение, сравнение остановлено")
+    else:
+        if ranges > shown:
+            print(f"  ... еще диапазонов: {ranges - shown}")
+        print(f"Сравнено ячеек: {stats['compared']}, различных значений: {stats['different']}, "
+              f"только в первом: {stats['only_first']}, только во втором: {stats['only_second']}, "
+              f"диапазонов: {ranges}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import sys
+import json
+import random
+import argparse
+from assembler import Assembler
+
+
+# Адрес в памяти задается регистром 0-7 (LOAD до 4095) и смещением до 255
+MAX_LOAD_CONSTANT = 4095
+MAX_REACHABLE_ADDRESS = MAX_LOAD_CONSTANT + 255
+POW_RESULT_LIMIT = 0xFFFFFFFF
+LOCALITY_WINDOW = 8
+
+DEFAULT_MIX = {'load': 1, 'read': 1, 'write': 1, 'pow': 1}
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Неизвестная команда в смеси: {name}")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def pow_result(value1, value2):
+    # Повторяет семантику UVMInterpreter.execute_pow
+    if value1 < 0 or value2 < 0:
+        return 0
+    if value1 == 0 and value2 == 0:
+        return 1
+    return min(value1 ** value2, POW_RESULT_LIMIT)
+
+
+class ProgramGenerator:
+    def __init__(self, mix=None, footprint=256, data_base=2048, locality=0.5,
+                 pow_base_max=16, pow_exp_max=4, seed=None):
+        mix = mix or DEFAULT_MIX
+        if footprint < 1:
+            raise ValueError("Размер области данных должен быть положительным")
+        if data_base < 0 or data_base + footprint - 1 > MAX_REACHABLE_ADDRESS:
+            raise ValueError(f"Область данных {data_base}-{data_base + footprint - 1} "
+                             f"выходит за адресуемый диапазон 0-{MAX_REACHABLE_ADDRESS}")
+        if not 0 <= locality <= 1:
+            raise ValueError(f"Локальность {locality} должна быть в диапазоне 0-1")
+
+        self.opcodes = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.opcodes]
+        if not self.opcodes:
+            raise ValueError("Смесь команд пуста")
+
+        self.footprint = footprint
+        self.data_base = data_base
+        self.locality = locality
+        self.pow_base_max = pow_base_max
+        self.pow_exp_max = pow_exp_max
+        self.rng = random.Random(seed)
+
+        # Модель состояния УВМ: область данных считается изначально нулевой
+        self.registers = [0] * 32
+        self.memory = {}
+        self.last_address = data_base
+        self.count = 0
+        self.code_size = 0
+        self.opcode_counts = {name: 0 for name in DEFAULT_MIX}
+
+    def in_footprint(self, address):
+        return self.data_base <= address < self.data_base + self.footprint
+
+    def pick_address(self):
+        if self.rng.random() < self.locality:
+            low = max(self.data_base, self.last_address - LOCALITY_WINDOW)
+            high = min(self.data_base + self.footprint - 1, self.last_address + LOCALITY_WINDOW)
+            address = self.rng.randint(low, high)
+        else:
+            address = self.data_base + self.rng.randrange(self.footprint)
+        self.last_address = address
+        return address
+
+    def pick_constant(self):
+        if self.rng.random() < 0.5:
+            return self.rng.randint(0, max(self.pow_base_max, self.pow_exp_max))
+        return self.rng.randint(0, MAX_LOAD_CONSTANT)
+
+    def address_register_for(self, address):
+        candidates = [r for r in range(8) if 0 <= address - self.registers[r] <= 255]
+        return self.rng.choice(candidates) if candidates else None
+
+    def emit(self, command):
+        if command['command'] == 'load':
+            self.registers[command['address']] = command['constant']
+        elif command['command'] == 'read':
+            address = self.registers[command['address_reg']] + command['offset']
+            self.registers[command['result_reg']] = self.memory.get(address, 0)
+        elif command['command'] == 'write':
+            address = self.registers[command['address_reg']] + command['offset']
+            self.memory[address] = self.registers[command['value_reg']]
+        else:
+            value1 = self.memory.get(command['value1_addr'], 0)
+            value2 = self.memory.get(self.registers[command['value2_reg']], 0)
+            self.registers[command['result_reg']] = pow_result(value1, value2)
+
+        self.count += 1
+        self.opcode_counts[command['command']] += 1
+        self.code_size += 6 if command['command'] == 'pow' else 3
+        return command
+
+    def load_pointer(self, address):
+        # Настройка адресного регистра: сама является командой LOAD
+        register = self.rng.randrange(8)
+        offset = self.rng.randint(max(0, address - MAX_LOAD_CONSTANT), min(255, address))
+        return {'command': 'load', 'constant': address - offset, 'address': register}
+
+    def next_command(self):
+        opcode = self.rng.choices(self.opcodes, self.weights)[0]
+
+        if opcode == 'load':
+            register = self.rng.randrange(8)
+            if self.rng.random() < 0.5:
+                return self.load_pointer(self.pick_address())
+            return {'command': 'load', 'constant': self.pick_constant(), 'address': register}
+
+        if opcode in ('read', 'write'):
+            address = self.pick_address()
+            register = self.address_register_for(address)
+            if register is None:
+                return self.load_pointer(address)
+            offset = address - self.registers[register]
+            if opcode == 'read':
+                return {'command': 'read', 'result_reg': self.rng.randint(8, 31),
+                        'offset': offset, 'address_reg': register}
+            return {'command': 'write', 'value_reg': self.rng.randrange(32),
+                    'address_reg': register, 'offset': offset}
+
+        # POW: основание и показатель берутся только из ячеек с ограниченными значениями
+        exponent_regs = [r for r in range(32)
+                         if self.in_footprint(self.registers[r])
+                         and self.memory.get(self.registers[r], 0) <= self.pow_exp_max]
+        if not exponent_regs:
+            address = self.pick_address()
+            if address > MAX_LOAD_CONSTANT or self.memory.get(address, 0) > self.pow_exp_max:
+                return self.next_command_fallback()
+            return {'command': 'load', 'constant': address, 'address': self.rng.randrange(8)}
+
+        for _ in range(4):
+            value1_addr = self.pick_address()
+            if self.memory.get(value1_addr, 0) <= self.pow_base_max:
+                break
+        else:
+            return self.next_command_fallback()
+
+        return {'command': 'pow', 'value1_addr': value1_addr,
+                'value2_reg': self.rng.choice(exponent_regs),
+                'result_reg': self.rng.randint(8, 31)}
+
+    def next_command_fallback(self):
+        # Подходящих операндов POW нет: вместо POW загружаем малую константу
+        register = self.rng.randrange(8)
+        return {'command': 'load', 'constant': self.rng.randint(0, self.pow_exp_max), 'address': register}
+
+    def commands(self, count):
+        while self.count < count:
+            yield self.emit(self.next_command())
+
+    def oracle(self):
+        return {
+            'instructions': self.count,
+            'code_size': self.code_size,
+            'data_base': self.data_base,
+            'footprint': self.footprint,
+            # Интерпретатор читает memory[code_size] как код следующей команды,
+            # поэтому данные должны начинаться строго за концом кода
+            'shared_memory_safe': self.code_size < self.data_base,
+            'opcodes': dict(self.opcode_counts),
+            'registers': list(self.registers),
+            'memory': {str(address): value for address, value in sorted(self.memory.items())},
+        }
+
+
+def command_to_yaml(command):
+    items = list(command.items())
+    lines = [f"- {items[0][0]}: {items[0][1]}"]
+    for key, value in items[1:]:
+        lines.append(f"  {key}: {value}")
+    return "\n".join(lines) + "\n\n"
+
+
+def write_outputs(generator, count, yaml_file=None, binary_file=None, oracle_file=None):
+    assembler = Assembler()
+    yaml_out = open(yaml_file, 'w', encoding='utf-8') if yaml_file else None
+    binary_out = open(binary_file, 'wb') if binary_file else None
+
+    try:
+        for command in generator.commands(count):
+            if yaml_out:
+                yaml_out.write(command_to_yaml(command))
+            if binary_out:
+                bytes_list, _ = assembler.assemble_command(command)
+                binary_out.write(bytes(bytes_list))
+    finally:
+        if yaml_out:
+            yaml_out.close()
+        if binary_out:
+            binary_out.close()
+
+    oracle = generator.oracle()
+    if oracle_file:
+        with open(oracle_file, 'w', encoding='utf-8') as f:
+            json.dump(oracle, f, indent=2)
+    return oracle
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Генератор синтетических программ УВМ')
+    parser.add_argument('count', type=int, help='Число команд в программе')
+    parser.add_argument('--yaml', help='Путь к исходному файлу YAML')
+    parser.add_argument('--binary', help='Путь к двоичному файлу программы')
+    parser.add_argument('--oracle', help='Путь к JSON-файлу с ожидаемым конечным состоянием')
+    parser.add_argument('--mix', default='load=1,read=1,write=1,pow=1',
+                        help='Веса команд, например load=1,read=2,write=2,pow=4')
+    parser.add_argument('--footprint', type=int, default=256, help='Размер области данных в ячейках')
+    parser.add_argument('--data-base', type=int, default=2048, help='Начальный адрес области данных')
+    parser.add_argument('--locality', type=float, default=0.5,
+                        help='Доля обращений рядом с предыдущим адресом (0-1)')
+    parser.add_argument('--pow-base-max', type=int, default=16, help='Максимальное основание POW')
+    parser.add_argument('--pow-exp-max', type=int, default=4, help='Максимальный показатель POW')
+    parser.add_argument('--seed', type=int, help='Начальное значение генератора случайных чисел')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if not (args.yaml or args.binary or args.oracle):
+        print("Укажите хотя бы один выходной файл: --yaml, --binary или --oracle")
+        sys.exit(2)
+
+    try:
+        generator = ProgramGenerator(parse_mix(args.mix), args.footprint, args.data_base,
+                                     args.locality, args.pow_base_max, args.pow_exp_max, args.seed)
+        oracle = write_outputs(generator, args.count, args.yaml, args.binary, args.oracle)
+    except ValueError as e:
+        print(f"Ошибка генерации: {e}")
+        sys.exit(1)
+
+    print(f"Сгенерировано команд: {oracle['instructions']} ({oracle['code_size']} байт)")
+    if not oracle['shared_memory_safe']:
+        print(f"Внимание: код пересекается с областью данных (адрес {args.data_base}), "
+              f"результат совпадет с эталоном только при раздельной памяти кода и данных")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,359 @@
+import os
 import sys
 import argparse
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+
+# Флаги доступа для точек наблюдения за памятью
+WATCH_READ = 1
+WATCH_WRITE = 2
+WATCH_POW = 4
+
+WATCH_ACCESS_FLAGS = {'r': WATCH_READ, 'w': WATCH_WRITE, 'p': WATCH_POW}
+
+MEMORY_SIZE = 65536
+
+# Ячейка памяти в файле - 32-битное беззнаковое целое в порядке байт платформы:
+# в память попадают константы LOAD и результаты POW (не более 0xFFFFFFFF)
+MEMORY_CELL_FORMAT = 'I'
+MEMORY_CELL_SIZE = 4
+
+# Размер блока чтения при потоковой выборке команд из файла
+STREAM_CHUNK_SIZE = 1 << 20
+MAX_COMMAND_SIZE = 6
+
+
+# Декодирование команды из любой индексируемой последовательности байт
+# (память УВМ, bytes, mmap); возвращает тип, параметры и длину команды
+def decode_at(data, pos):
+    decoder = DECODERS.get(data[pos])
+    if decoder is None:
+        return None, None, 3
+    return decoder(data, pos)
+
+
+def decode_load(data, pos):
+    byte2 = data[pos + 1]
+    byte3 = data[pos + 2]
+
+    constant = byte2 | ((byte3 & 0x0F) << 8)
+    address = (byte3 >> 4) & 0x07
+
+    return 'load', {'constant': constant, 'address': address}, 3
+
+
+def decode_read(data, pos):
+    byte2 = data[pos + 1]
+    byte3 = data[pos + 2]
+
+    result_reg = byte2 & 0x1F
+    address_reg = (byte2 >> 5) & 0x07
+    offset = byte3
+
+    return 'read', {'result_reg': result_reg, 'offset': offset, 'address_reg': address_reg}, 3
+
+
+def decode_write(data, pos):
+    byte2 = data[pos + 1]
+    byte3 = data[pos + 2]
+
+    value_reg = byte2 & 0x1F
+    address_reg = (byte2 >> 5) & 0x07
+    offset = byte3
+
+    return 'write', {'value_reg': value_reg, 'address_reg': address_reg, 'offset': offset}, 3
+
+
+def decode_pow(data, pos):
+    byte2 = data[pos + 1]
+    byte3 = data[pos + 2]
+    byte4 = data[pos + 3]
+    byte5 = data[pos + 4]
+    byte6 = data[pos + 5]
+
+    value2_reg = byte2
+    result_reg = byte3
+    value1_addr = (byte4 << 0) | (byte5 << 8) | (byte6 << 16)
+
+    return 'pow', {'value2_reg': value2_reg, 'result_reg': result_reg, 'value1_addr': value1_addr}, 6
+
+
+# Определяем команду по первому байту
+DECODERS = {
+    0x06: decode_load,   # LOAD
+    0x16: decode_read,   # READ
+    0x1a: decode_write,  # WRITE
+    0x2a: decode_pow,    # POW
+}
+
+
+def decode_program(binary):
+    # Предварительное декодирование линейного прохода по программе. Сохраняются
+    # только команды, целиком лежащие в двоичном файле: с остановочной команды
+    # и недописанного хвоста выполнение продолжает обычный цикл по памяти.
+    # Возвращает (code_end, команды), где команда - (next_pc, тип, параметры)
+    limit = min(len(binary), MEMORY_SIZE)
+    data = bytes(binary[:limit]) + bytes(MAX_COMMAND_SIZE)
+    instructions = []
+    pos = 0
+
+    while pos < MEMORY_SIZE - 2:
+        command_type, params, size = decode_at(data, pos)
+        if command_type is None or pos + size > limit:
+            break
+        pos += size
+        instructions.append((pos, command_type, params))
+
+    return pos, instructions
+
+
+def infer_write_set(program, memory):
+    # Статический проход по декодированной программе: переходов нет, поэтому
+    # значения регистров, загруженные LOAD, известны в каждой точке программы,
+    # а с ними и адреса WRITE. Регистры после READ и POW считаются неизвестными.
+    # Возвращает (адреса записи, полнота); неполный результат дополняется
+    # отслеживанием записей во время выполнения
+    code_end, instructions = program
+    registers = [0] * 32
+    addresses = set()
+
+    for next_pc, command_type, params in instructions:
+        if command_type == 'load':
+            registers[params['address']] = params['constant']
+        elif command_type == 'read':
+            registers[params['result_reg']] = None
+        elif command_type == 'pow':
+            # Номер регистра за пределами R0-R31 прерывает выполнение на этой команде
+            if params['value2_reg'] >= 32 or params['result_reg'] >= 32:
+                return addresses, True
+            registers[params['result_reg']] = None
+        else:
+            base = registers[params['address_reg']]
+            if base is None:
+                return addresses, False
+            address = base + params['offset']
+            if address < MEMORY_SIZE:
+                addresses.add(address)
+            # Запись в код меняет еще не выполненные команды
+            if next_pc <= address < code_end + MAX_COMMAND_SIZE:
+                return addresses, False
+
+    # После декодированной части выполнение продолжается по памяти
+    halts = code_end >= MEMORY_SIZE - 2 or memory[code_end] not in DECODERS
+    return addresses, halts
+
+
+def format_ranges(ranges):
+    return ','.join(f"{start}-{end}" for start, end in ranges)
+
+
+def address_ranges(addresses):
+    # Сортированные адреса объединяются в непрерывные интервалы (start, end)
+    ranges = []
+    for address in sorted(addresses):
+        if ranges and ranges[-1][1] == address - 1:
+            ranges[-1][1] = address
+        else:
+            ranges.append([address, address])
+    return [tuple(interval) for interval in ranges]
+
+
+class InstructionStream:
+    # Потоковая выборка команд из файла программы блоками (read или mmap).
+    # Байты за концом файла считаются нулевыми, как в памяти УВМ, поэтому
+    # недописанная последняя команда дополняется нулями, а следующая за ней
+    # нулевая команда завершает программу.
+    def __init__(self, source, chunk_size=STREAM_CHUNK_SIZE, use_mmap=False):
+        if chunk_size < MAX_COMMAND_SIZE:
+            raise ValueError(f"Размер блока чтения {chunk_size} меньше длины команды ({MAX_COMMAND_SIZE} байт)")
+        self.source = source
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+
+    def __iter__(self):
+        if not isinstance(self.source, str):
+            yield from self.iter_buffered(self.source)
+            return
+
+        with open(self.source, 'rb') as f:
+            if self.use_mmap:
+                yield from self.iter_mmap(f)
+            else:
+                yield from self.iter_buffered(f)
+
+    def iter_buffered(self, f):
+        buffer = b''
+        base = 0
+        pos = 0
+        eof = False
+
+        while True:
+            if len(buffer) - pos < MAX_COMMAND_SIZE and not eof:
+                chunk = f.read(self.chunk_size)
+                base += pos
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                if not chunk:
+                    eof = True
+                    buffer += bytes(MAX_COMMAND_SIZE)
+                continue
+
+            if len(buffer) - pos < 3:
+                return
+            command_type, params, size = decode_at(buffer, pos)
+            if command_type is None:
+                return
+            pos += size
+            yield base + pos, command_type, params
+
+    def iter_mmap(self, f):
+        import mmap
+
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data) - MAX_COMMAND_SIZE
+            pos = 0
+            while pos <= end:
+                command_type, params, size = decode_at(data, pos)
+                if command_type is None:
+                    return
+                pos += size
+                yield pos, command_type, params
+
+            # Хвост короче самой длинной команды дочитывается через буфер с нулями
+            tail = data[pos:] + bytes(MAX_COMMAND_SIZE)
+            tail_pos = 0
+            while pos + tail_pos < len(data):
+                command_type, params, size = decode_at(tail, tail_pos)
+                if command_type is None:
+                    return
+                tail_pos += size
+                yield pos + tail_pos, command_type, params
+
+
+def map_memory_file(filename, writable=False):
+    # Отображение файла памяти УВМ; возвращает mmap и представление ячеек
+    import mmap
+
+    expected_size = MEMORY_SIZE * MEMORY_CELL_SIZE
+    if writable and not os.path.exists(filename):
+        with open(filename, 'wb') as f:
+            f.truncate(expected_size)
+
+    with open(filename, 'r+b' if writable else 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size != expected_size:
+            raise ValueError(f"Файл памяти {filename} имеет размер {size} байт, ожидалось {expected_size}")
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        memory_map = mmap.mmap(f.fileno(), expected_size, access=access)
+
+    return memory_map, memoryview(memory_map).cast(MEMORY_CELL_FORMAT)
 
 
 class UVMInterpreter:
-    def __init__(self):
-        self.memory = [0] * 65536
+    def __init__(self, memory=None, memory_map=None):
+        # Готовая память (например, частная копия общего образа в batch.py)
+        # передается без выделения и заполнения списка на MEMORY_SIZE ячеек
+        self.memory = [0] * MEMORY_SIZE if memory is None else memory
+        self.memory_map = memory_map
         self.registers = [0] * 32
         self.pc = 0
         self.halted = False
+        self.steps = 0
+
+        # Отладка: карта наблюдаемых адресов строится только при наличии
+        # точек наблюдения, поэтому без них обработчики проверяют лишь None
+        self.watchpoints = []
+        self.watch_map = None
+        self.watch_hits = []
+        self.next_watch_id = 1
+        self.breakpoints = {}
+        self.break_map = None
+        self.paused = False
+        self.pause_reason = None
+
+        # Автоматический дамп: адреса записи, найденные статически, и адреса
+        # записей WRITE во время выполнения, если статического анализа мало
+        self.written = set()
+        self.dirty = None
 
     def parse_arguments(self):
         parser = argparse.ArgumentParser(description='Интерпретатор УВМ')
         parser.add_argument('binary_file', help='Путь к бинарному файлу с программой')
-        parser.add_argument('dump_file', help='Путь к файлу для дампа памяти')
-        parser.add_argument('--dump-range', required=True, help='Диапазон адресов для дампа (формат: start-end)')
+        parser.add_argument('dump_file', nargs='?', help='Путь к файлу для дампа памяти')
+        parser.add_argument('--dump-range',
+                            help='Диапазон адресов для дампа (формат: start-end); '
+                                 'без него или со значением auto в дамп попадают записанные программой ячейки')
         parser.add_argument('--quiet', action='store_true', help='Тихий режим (без отладочного вывода)')
-        return parser.parse_args()
+        parser.add_argument('--stream', action='store_true',
+                            help='Потоковая выборка команд из файла, память данных отделена от кода')
+        parser.add_argument('--fetch', choices=['buffered', 'mmap'], default='buffered',
+                            help='Способ чтения файла в потоковом режиме')
+        parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE,
+                            help='Размер блока чтения в потоковом режиме (байт)')
+        parser.add_argument('--memory-file',
+                            help='Файл памяти данных (отображается через mmap, сохраняет конечное состояние)')
+        parser.add_argument('--cache-dir', default=os.environ.get('UVM_CACHE_DIR'),
+                            help='Каталог кэша декодированных программ (по умолчанию $UVM_CACHE_DIR)')
+        parser.add_argument('--cache-size', type=int,
+                            help='Предельный размер кэша в байтах (по умолчанию 64 МБ)')
+        args = parser.parse_args()
+
+        if args.dump_file is None and args.memory_file is None:
+            parser.error("требуется путь к файлу дампа (или --memory-file)")
+        if args.dump_range is not None and args.dump_file is None:
+            parser.error("для --dump-range требуется путь к файлу дампа")
+        if args.chunk_size < MAX_COMMAND_SIZE:
+            parser.error(f"--chunk-size должен быть не меньше {MAX_COMMAND_SIZE} байт")
+        if args.dump_range == 'auto':
+            args.dump_range = None
+        return args
 
     def load_program(self, filename):
         with open(filename, 'rb') as f:
             binary_data = f.read()
 
-        for i, byte in enumerate(binary_data):
-            if i < len(self.memory):
-                self.memory[i] = byte
-
+        self.load_bytes(binary_data)
         print(f"Загружено {len(binary_data)} байт программы")
+        if len(binary_data) > len(self.memory):
+            print(f"Внимание: программа длиннее памяти ({len(self.memory)} байт), "
+                  f"остаток отброшен; используйте --stream")
+        return binary_data
+
+    def load_bytes(self, binary_data):
+        size = min(len(binary_data), len(self.memory))
+        if self.memory_map is None:
+            self.memory[:size] = binary_data[:size]
+        else:
+            from array import array
+            self.memory[:size] = array(MEMORY_CELL_FORMAT, list(binary_data[:size]))
+
+    def attach_memory_file(self, filename, writable=True):
+        # Память данных берется прямо из файла: начальный образ не копируется,
+        # а конечное состояние остается в файле без отдельного дампа
+        self.close()
+        self.memory_map, self.memory = map_memory_file(filename, writable)
+        self.rebuild_watch_map()
+        self.rebuild_break_map()
+
+    def close(self):
+        if self.memory_map is not None:
+            self.memory.release()
+            self.memory_map.flush()
+            self.memory_map.close()
+            self.memory_map = None
+            self.memory = [0] * MEMORY_SIZE
+
+    def track_writes(self, program=None):
+        # Без декодированной программы (потоковый режим) записи только отслеживаются
+        if program is None:
+            self.written, complete = set(), False
+        else:
+            self.written, complete = infer_write_set(program, self.memory)
+        self.dirty = None if complete else set()
+
+    def written_ranges(self):
+        return address_ranges(self.written | self.dirty if self.dirty else self.written)
 
     def parse_dump_range(self, dump_range):
         start, end = map(int, dump_range.split('-'))
@@ -37,70 +363,14 @@ class UVMInterpreter:
         if self.pc >= len(self.memory) - 2:
             return None, None
 
-        first_byte = self.memory[self.pc]
-
-        # Определяем команду по первому байту
-        if first_byte == 0x06:  # LOAD
-            return self.decode_load()
-        elif first_byte == 0x16:  # READ
-            return self.decode_read()
-        elif first_byte == 0x1a:  # WRITE
-            return self.decode_write()
-        elif first_byte == 0x2a:  # POW
-            return self.decode_pow()
-        else:
+        decoder = DECODERS.get(self.memory[self.pc])
+        if decoder is None:
             self.pc += 3
             return None, None
 
-    def decode_load(self):
-        byte1 = self.memory[self.pc]
-        byte2 = self.memory[self.pc + 1]
-        byte3 = self.memory[self.pc + 2]
-
-        constant = byte2 | ((byte3 & 0x0F) << 8)
-        address = (byte3 >> 4) & 0x07
-
-        self.pc += 3
-        return 'load', {'constant': constant, 'address': address}
-
-    def decode_read(self):
-        byte1 = self.memory[self.pc]
-        byte2 = self.memory[self.pc + 1]
-        byte3 = self.memory[self.pc + 2]
-
-        result_reg = byte2 & 0x1F
-        address_reg = (byte2 >> 5) & 0x07
-        offset = byte3
-
-        self.pc += 3
-        return 'read', {'result_reg': result_reg, 'offset': offset, 'address_reg': address_reg}
-
-    def decode_write(self):
-        byte1 = self.memory[self.pc]
-        byte2 = self.memory[self.pc + 1]
-        byte3 = self.memory[self.pc + 2]
-
-        value_reg = byte2 & 0x1F
-        address_reg = (byte2 >> 5) & 0x07
-        offset = byte3
-
-        self.pc += 3
-        return 'write', {'value_reg': value_reg, 'address_reg': address_reg, 'offset': offset}
-
-    def decode_pow(self):
-        byte1 = self.memory[self.pc]
-        byte2 = self.memory[self.pc + 1]
-        byte3 = self.memory[self.pc + 2]
-        byte4 = self.memory[self.pc + 3]
-        byte5 = self.memory[self.pc + 4]
-        byte6 = self.memory[self.pc + 5]
-
-        value2_reg = byte2
-        result_reg = byte3
-        value1_addr = (byte4 << 0) | (byte5 << 8) | (byte6 << 16)
-
-        self.pc += 6
-        return 'pow', {'value2_reg': value2_reg, 'result_reg': result_reg, 'value1_addr': value1_addr}
+        command_type, params, size = decoder(self.memory, self.pc)
+        self.pc += size
+        return command_type, params
 
     def execute_command(self, command_type, params):
         if command_type == 'load':
@@ -124,6 +394,8 @@ class UVMInterpreter:
 
         mem_address = self.registers[address_reg] + offset
         if mem_address < len(self.memory):
+            if self.watch_map is not None and self.watch_map[mem_address] & WATCH_READ:
+                self.watch_hit(mem_address, WATCH_READ, self.memory[mem_address])
             self.registers[result_reg] = self.memory[mem_address]
 
     def execute_write(self, params):
@@ -133,6 +405,11 @@ class UVMInterpreter:
 
         mem_address = self.registers[address_reg] + offset
         if mem_address < len(self.memory):
+            if self.watch_map is not None and self.watch_map[mem_address] & WATCH_WRITE:
+                self.watch_hit(mem_address, WATCH_WRITE, self.registers[value_reg],
+                               old_value=self.memory[mem_address])
+            if self.dirty is not None:
+                self.dirty.add(mem_address)
             self.memory[mem_address] = self.registers[value_reg]
 
     def execute_pow(self, params):
@@ -144,6 +421,12 @@ class UVMInterpreter:
         value2_addr = self.registers[value2_reg]
         value2 = self.memory[value2_addr] if value2_addr < len(self.memory) else 0
 
+        if self.watch_map is not None:
+            if value1_addr < len(self.memory) and self.watch_map[value1_addr] & WATCH_POW:
+                self.watch_hit(value1_addr, WATCH_POW, value1)
+            if value2_addr < len(self.memory) and self.watch_map[value2_addr] & WATCH_POW:
+                self.watch_hit(value2_addr, WATCH_POW, value2)
+
         try:
             if value1 < 0 or value2 < 0:
                 result = 0
@@ -158,52 +441,329 @@ class UVMInterpreter:
 
         self.registers[result_reg] = result
 
-    def create_memory_dump(self, start_addr, end_addr, filename):
-        root = Element('memory_dump')
-        root.set('start', str(start_addr))
-        root.set('end', str(end_addr))
+    def add_watchpoint(self, start_addr, end_addr, access='rwp', action='break'):
+        mask = 0
+        for flag in access:
+            if flag not in WATCH_ACCESS_FLAGS:
+                raise ValueError(f"Неизвестный тип доступа: {flag} (допустимо r, w, p)")
+            mask |= WATCH_ACCESS_FLAGS[flag]
+        if action not in ('break', 'log'):
+            raise ValueError(f"Неизвестное действие: {action} (допустимо break, log)")
+        if start_addr > end_addr:
+            raise ValueError(f"Некорректный диапазон: {start_addr}-{end_addr}")
+
+        watchpoint = {
+            'id': self.next_watch_id,
+            'start': start_addr,
+            'end': end_addr,
+            'mask': mask,
+            'access': access,
+            'action': action
+        }
+        self.next_watch_id += 1
+        self.watchpoints.append(watchpoint)
+        self.rebuild_watch_map()
+        return watchpoint['id']
+
+    def remove_watchpoint(self, watch_id):
+        before = len(self.watchpoints)
+        self.watchpoints = [wp for wp in self.watchpoints if wp['id'] != watch_id]
+        if len(self.watchpoints) == before:
+            raise ValueError(f"Точка наблюдения {watch_id} не найдена")
+        self.rebuild_watch_map()
+
+    def rebuild_watch_map(self):
+        if not self.watchpoints:
+            self.watch_map = None
+            return
+
+        watch_map = bytearray(len(self.memory))
+        for wp in self.watchpoints:
+            start = max(wp['start'], 0)
+            end = min(wp['end'], len(self.memory) - 1)
+            for addr in range(start, end + 1):
+                watch_map[addr] |= wp['mask']
+        self.watch_map = watch_map
+
+    def watch_hit(self, address, access, value, old_value=None):
+        # Обработчик уже сдвинул pc, восстанавливаем адрес самой команды
+        command_pc = self.pc - (6 if access == WATCH_POW else 3)
+
+        for wp in self.watchpoints:
+            if not (wp['mask'] & access and wp['start'] <= address <= wp['end']):
+                continue
+
+            hit = {
+                'watch_id': wp['id'],
+                'pc': command_pc,
+                'address': address,
+                'access': access,
+                'value': value,
+                'old_value': old_value
+            }
+            self.watch_hits.append(hit)
+
+            if wp['action'] == 'break':
+                self.paused = True
+                self.pause_reason = hit
+            else:
+                print(self.format_watch_hit(hit))
+
+    def format_watch_hit(self, hit):
+        names = {WATCH_READ: 'чтение', WATCH_WRITE: 'запись', WATCH_POW: 'POW'}
+        text = (f"Точка наблюдения {hit['watch_id']}: {names[hit['access']]} "
+                f"адреса {hit['address']} командой по адресу {hit['pc']}, значение {hit['value']}")
+        if hit['old_value'] is not None:
+            text += f" (было {hit['old_value']})"
+        return text
+
+    def add_breakpoint(self, pc, condition=None):
+        code = None
+        if condition:
+            code = compile(condition, '<условие>', 'eval')
+        self.breakpoints[pc] = (condition, code)
+        self.rebuild_break_map()
+
+    def remove_breakpoint(self, pc):
+        if pc not in self.breakpoints:
+            raise ValueError(f"Точка останова {pc} не найдена")
+        del self.breakpoints[pc]
+        self.rebuild_break_map()
+
+    def rebuild_break_map(self):
+        # Метки адресов команд проверяются до декодирования, без поиска в словаре
+        if not self.breakpoints:
+            self.break_map = None
+            return
+
+        break_map = bytearray(len(self.memory))
+        for pc in self.breakpoints:
+            if 0 <= pc < len(break_map):
+                break_map[pc] = 1
+        self.break_map = break_map
+
+    def breakpoint_hit(self, pc):
+        condition, code = self.breakpoints[pc]
+        if code is None:
+            return True
+        scope = {'R': self.registers, 'M': self.memory, 'pc': pc}
+        return bool(eval(code, {'__builtins__': {}}, scope))
+
+    def step(self):
+        command_type, params = self.decode_command()
+        if command_type is None:
+            self.halted = True
+            return False
+        self.execute_command(command_type, params)
+        self.steps += 1
+        return True
+
+    def execute(self, max_commands=None):
+        self.paused = False
+        self.pause_reason = None
+        if self.break_map is None and self.watch_map is None and max_commands is None:
+            return self.execute_plain()
+        return self.execute_checked(max_commands)
+
+    def execute_plain(self):
+        # Обычный путь без отладочных проверок: декодирование и выбор обработчика
+        # выполняются прямо в цикле, без промежуточных вызовов
+        memory = self.memory
+        decoders = DECODERS
+        handlers = {
+            'load': self.execute_load,
+            'read': self.execute_read,
+            'write': self.execute_write,
+            'pow': self.execute_pow
+        }
+        limit = len(memory) - 2
+        pc = self.pc
+        executed = 0
 
-        for addr in range(start_addr, end_addr + 1):
-            if addr < len(self.memory):
-                byte_elem = SubElement(root, 'byte')
-                byte_elem.set('address', str(addr))
-                byte_elem.set('value', str(self.memory[addr]))
-                byte_elem.text = f"0x{self.memory[addr]:02x}"
+        try:
+            while pc < limit:
+                decoder = decoders.get(memory[pc])
+                if decoder is None:
+                    self.pc = pc + 3
+                    self.halted = True
+                    break
+                command_type, params, size = decoder(memory, pc)
+                pc += size
+                self.pc = pc
+                handlers[command_type](params)
+                executed += 1
+            else:
+                self.halted = True
+        finally:
+            self.steps += executed
 
-        xml_str = minidom.parseString(tostring(root)).toprettyxml(indent="  ")
+        return executed
+
+    def execute_checked(self, max_commands=None):
+        break_map = self.break_map
+        decode_command = self.decode_command
+        execute_command = self.execute_command
+        memory_size = len(self.memory)
+        executed = 0
+
+        try:
+            while not self.halted and self.pc < memory_size:
+                if max_commands is not None and executed >= max_commands:
+                    break
+                if break_map is not None and break_map[self.pc] and self.breakpoint_hit(self.pc):
+                    self.paused = True
+                    self.pause_reason = {'breakpoint': self.pc}
+                    break
+
+                command_type, params = decode_command()
+                if command_type is None:
+                    self.halted = True
+                    break
+                execute_command(command_type, params)
+                executed += 1
+
+                if self.paused:
+                    break
+        finally:
+            self.steps += executed
+
+        return executed
+
+    def execute_decoded(self, program):
+        # Выполнение заранее декодированной программы (см. decode_program).
+        # Запись в еще не выполненную часть кода делает декодированные команды
+        # недействительными: дальше выполнение идет обычным циклом по памяти
+        if self.pc != 0 or self.break_map is not None or self.watch_map is not None:
+            return self.execute()
+
+        code_end, instructions = program
+        registers = self.registers
+        handlers = {
+            'load': self.execute_load,
+            'read': self.execute_read,
+            'write': self.execute_write,
+            'pow': self.execute_pow
+        }
+        executed = 0
+
+        try:
+            for next_pc, command_type, params in instructions:
+                self.pc = next_pc
+                handlers[command_type](params)
+                executed += 1
+                if command_type == 'write':
+                    address = registers[params['address_reg']] + params['offset']
+                    if next_pc <= address < code_end:
+                        break
+        finally:
+            self.steps += executed
+
+        return executed + self.execute_plain()
+
+    def execute_stream(self, stream):
+        # Команды берутся из потока, а не из памяти: код не занимает память данных
+        execute_command = self.execute_command
+        executed = 0
+
+        try:
+            for next_pc, command_type, params in stream:
+                self.pc = next_pc
+                execute_command(command_type, params)
+                executed += 1
+        finally:
+            self.steps += executed
+
+        self.halted = True
+        return executed
+
+    def create_memory_dump(self, start_addr, end_addr, filename):
+        xml_str = self.memory_dump_xml(start_addr, end_addr)
 
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(xml_str)
 
         print(f"Дамп памяти сохранен в {filename} (адреса {start_addr}-{end_addr})")
 
+    def create_ranges_dump(self, ranges, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.memory_ranges_xml(ranges))
+
+        cells = sum(end - start + 1 for start, end in ranges)
+        print(f"Дамп памяти сохранен в {filename} (записанные ячейки: {cells}, "
+              f"интервалы {format_ranges(ranges) or 'нет'})")
+
+    def memory_ranges_xml(self, ranges):
+        # Дамп только заданных интервалов: start и end - границы всех интервалов,
+        # сами интервалы перечислены в атрибуте ranges
+        memory = self.memory
+        if not ranges:
+            return '<?xml version="1.0" ?>\n<memory_dump ranges=""/>\n'
+
+        root = f'<memory_dump start="{ranges[0][0]}" end="{ranges[-1][1]}" ranges="{format_ranges(ranges)}">'
+        cells = [f'  <byte address="{addr}" value="{memory[addr]}">0x{memory[addr]:02x}</byte>'
+                 for start, end in ranges for addr in range(start, end + 1)]
+        return '\n'.join(['<?xml version="1.0" ?>', root, *cells, '</memory_dump>']) + '\n'
+
+    def memory_dump_xml(self, start_addr, end_addr):
+        # Текст собирается напрямую в том же виде, что дает minidom.toprettyxml:
+        # импорт ElementTree и minidom занимал треть времени запуска интерпретатора
+        memory = self.memory
+        root = f'<memory_dump start="{start_addr}" end="{end_addr}"'
+        cells = [f'  <byte address="{addr}" value="{memory[addr]}">0x{memory[addr]:02x}</byte>'
+                 for addr in range(start_addr, min(end_addr + 1, len(memory)))]
+
+        if not cells:
+            return f'<?xml version="1.0" ?>\n{root}/>\n'
+        return '\n'.join(['<?xml version="1.0" ?>', root + '>', *cells, '</memory_dump>']) + '\n'
+
     def run(self):
         args = self.parse_arguments()
-        self.load_program(args.binary_file)
-        start_addr, end_addr = self.parse_dump_range(args.dump_range)
+        if args.memory_file:
+            self.attach_memory_file(args.memory_file)
+        program = None
+        if not args.stream:
+            binary_data = self.load_program(args.binary_file)
+            if args.cache_dir:
+                from program_cache import ProgramCache
+                # Недоступный каталог кэша не мешает запуску: программа декодируется заново
+                try:
+                    program = ProgramCache(args.cache_dir, args.cache_size).load_file(args.binary_file, binary_data)
+                except OSError:
+                    program = decode_program(binary_data)
+        dump_range = self.parse_dump_range(args.dump_range) if args.dump_range else None
+        auto_dump = args.dump_file is not None and dump_range is None
+        if auto_dump:
+            if not args.stream and program is None:
+                program = decode_program(binary_data)
+            self.track_writes(program)
 
         if not args.quiet:
             print("Запуск интерпретатора УВМ...")
             print("=" * 50)
 
-        command_count = 0
-        while not self.halted and self.pc < len(self.memory):
-            try:
-                command_type, params = self.decode_command()
-                if command_type is None:
-                    break
-                self.execute_command(command_type, params)
-                command_count += 1
-            except Exception as e:
-                if not args.quiet:
-                    print(f"Ошибка выполнения команды по адресу {self.pc}: {e}")
-                break
+        try:
+            if args.stream:
+                self.execute_stream(InstructionStream(args.binary_file, args.chunk_size,
+                                                      args.fetch == 'mmap'))
+            elif program is not None:
+                self.execute_decoded(program)
+            else:
+                self.execute()
+        except Exception as e:
+            if not args.quiet:
+                print(f"Ошибка выполнения команды по адресу {self.pc}: {e}")
 
         if not args.quiet:
             print("=" * 50)
 
-        print(f"Выполнено команд: {command_count}")
-        self.create_memory_dump(start_addr, end_addr, args.dump_file)
+        print(f"Выполнено команд: {self.steps}")
+        if dump_range is not None:
+            start_addr, end_addr = dump_range
+            self.create_memory_dump(start_addr, end_addr, args.dump_file)
+        elif auto_dump:
+            self.create_ranges_dump(self.written_ranges(), args.dump_file)
+        if args.memory_file:
+            print(f"Состояние памяти сохранено в {args.memory_file}")
 
         if not args.quiet:
             print("\nСостояние регистров:")
@@ -211,6 +771,8 @@ class UVMInterpreter:
                 regs = [f"R[{i + j}]=0x{self.registers[i + j]:02x}" for j in range(8) if i + j < 32]
                 print("  " + " | ".join(regs))
 
+        self.close()
+
 
 def main():
     interpreter = UVMInterpreter()
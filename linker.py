@@ -0,0 +1,175 @@
+import sys
+import json
+import argparse
+from assembler import OBJECT_FORMAT, OBJECT_VERSION, AtomicFile
+from interpreter import MEMORY_SIZE
+
+
+MAX_LOAD_CONSTANT = 4095
+MAX_POW_ADDRESS = 0xFFFFFF
+
+
+def load_object(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        obj = json.load(f)
+    if not isinstance(obj, dict) or obj.get('format') != OBJECT_FORMAT or obj.get('version') != OBJECT_VERSION:
+        raise ValueError(f"{filename}: не объектный файл УВМ версии {OBJECT_VERSION}")
+    return obj
+
+
+def patch_load_const(image, pos, value):
+    # Константа LOAD: младшие 8 бит во втором байте, старшие 4 - в младшей тетраде третьего
+    if not 0 <= value <= MAX_LOAD_CONSTANT:
+        raise ValueError(f"адрес {value} не помещается в константу LOAD (максимум {MAX_LOAD_CONSTANT})")
+    image[pos + 1] = value & 0xFF
+    image[pos + 2] = (image[pos + 2] & 0xF0) | (value >> 8)
+
+
+def patch_pow_addr(image, pos, value):
+    if not 0 <= value <= MAX_POW_ADDRESS:
+        raise ValueError(f"адрес {value} не помещается в адрес POW (максимум {MAX_POW_ADDRESS})")
+    image[pos + 3] = value & 0xFF
+    image[pos + 4] = (value >> 8) & 0xFF
+    image[pos + 5] = (value >> 16) & 0xFF
+
+
+PATCHERS = {
+    'load_const': patch_load_const,
+    'pow_addr': patch_pow_addr,
+}
+
+# Команда, поле которой исправляет перемещение: код операции и длина
+RELOCATION_TARGETS = {
+    'load_const': (0x06, 3),
+    'pow_addr': (0x2a, 6),
+}
+
+
+# Обязательные поля объектного модуля, его символов и перемещений и их типы
+OBJECT_FIELDS = {'code': str, 'data_size': int, 'symbols': dict, 'relocations': list}
+SYMBOL_FIELDS = {'offset': int, 'size': int}
+RELOCATION_FIELDS = {'offset': int, 'kind': str, 'symbol': str, 'addend': int}
+
+
+def check_fields(name, what, value, fields):
+    if not isinstance(value, dict):
+        raise ValueError(f"{name}: {what}: ожидается объект JSON")
+    for field, field_type in fields.items():
+        if field not in value:
+            raise ValueError(f"{name}: {what}: нет поля {field}")
+        if type(value[field]) is not field_type:
+            raise ValueError(f"{name}: {what}: некорректный тип поля {field}: {value[field]!r}")
+
+
+def check_object(name, obj):
+    # Объектный файл мог быть изменен вручную: поля должны быть на месте и иметь
+    # нужные типы, перемещения - указывать на команду нужного вида внутри кода
+    # модуля, а данные - лежать в data_size. Возвращает код модуля
+    check_fields(name, "модуль", obj, OBJECT_FIELDS)
+    try:
+        code = bytes.fromhex(obj['code'])
+    except ValueError as e:
+        raise ValueError(f"{name}: некорректный код модуля: {e}")
+
+    data_size = obj['data_size']
+    if data_size < 0:
+        raise ValueError(f"{name}: некорректный размер данных {data_size}")
+    for symbol, info in obj['symbols'].items():
+        check_fields(name, f"символ {symbol}", info, SYMBOL_FIELDS)
+        offset, size = info['offset'], info['size']
+        if offset < 0 or size < 1 or offset + size > data_size:
+            raise ValueError(f"{name}: данные {symbol} (смещение {offset}, размер {size}) "
+                             f"выходят за пределы данных модуля ({data_size})")
+
+    for index, relocation in enumerate(obj['relocations']):
+        check_fields(name, f"перемещение {index}", relocation, RELOCATION_FIELDS)
+        kind, offset = relocation['kind'], relocation['offset']
+        if kind not in RELOCATION_TARGETS:
+            raise ValueError(f"{name}: неизвестный вид перемещения {kind}")
+        opcode, size = RELOCATION_TARGETS[kind]
+        if not 0 <= offset <= len(code) - size:
+            raise ValueError(f"{name}: перемещение по смещению {offset} выходит за пределы кода "
+                             f"({len(code)} байт)")
+        if code[offset] != opcode:
+            raise ValueError(f"{name}: перемещение {kind} по смещению {offset} указывает "
+                             f"на команду с кодом 0x{code[offset]:02x}")
+    return code
+
+
+def layout_symbols(objects, data_base):
+    # Данные модулей размещаются подряд с data_base в порядке модулей
+    addresses = {}
+    address = data_base
+    for name, obj in objects:
+        for symbol, info in obj['symbols'].items():
+            if symbol in addresses:
+                raise ValueError(f"{name}: символ {symbol} уже определен")
+            addresses[symbol] = address + info['offset']
+        address += obj['data_size']
+    return addresses, address
+
+
+def link(objects, data_base=None):
+    # objects - список (имя, объектный модуль). Код модулей копируется в один
+    # bytearray, перемещения каждого модуля исправляются сразу после копирования
+    codes = [check_object(name, obj) for name, obj in objects]
+    code_size = sum(len(code) for code in codes)
+    if data_base is None:
+        data_base = code_size
+    if data_base < code_size:
+        raise ValueError(f"Данные с адреса {data_base} пересекаются с кодом длиной {code_size} байт")
+
+    addresses, data_end = layout_symbols(objects, data_base)
+    if data_end > MEMORY_SIZE:
+        raise ValueError(f"Данные до адреса {data_end - 1} не помещаются в память ({MEMORY_SIZE} ячеек)")
+    image = bytearray(code_size)
+    pos = 0
+    for (name, obj), code in zip(objects, codes):
+        image[pos:pos + len(code)] = code
+        for relocation in obj['relocations']:
+            symbol = relocation['symbol']
+            if symbol not in addresses:
+                raise ValueError(f"{name}: неопределенный символ {symbol}")
+            try:
+                PATCHERS[relocation['kind']](image, pos + relocation['offset'],
+                                             addresses[symbol] + relocation['addend'])
+            except ValueError as e:
+                raise ValueError(f"{name}: @{symbol}{relocation['addend']:+d}: {e}")
+        pos += len(code)
+
+    return image, {'code_size': code_size, 'data_base': data_base, 'data_end': data_end,
+                   'symbols': addresses}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Компоновщик объектных файлов УВМ')
+    parser.add_argument('output_file', help='Путь к двоичному файлу-результату')
+    parser.add_argument('object_files', nargs='+', help='Объектные файлы в порядке размещения кода')
+    parser.add_argument('--data-base', type=int,
+                        help='Начальный адрес данных (по умолчанию сразу за кодом)')
+    parser.add_argument('--map', help='Путь к JSON-файлу с адресами символов')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    try:
+        objects = [(filename, load_object(filename)) for filename in args.object_files]
+        image, layout = link(objects, args.data_base)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка компоновки: {e}")
+        sys.exit(1)
+
+    with AtomicFile(args.output_file) as f:
+        f.write(image)
+    if args.map:
+        with AtomicFile(args.map) as f:
+            f.write(json.dumps(layout, indent=1).encode('utf-8'))
+
+    print(f"Скомпоновано модулей: {len(objects)}, байт кода: {layout['code_size']}, "
+          f"данные: {layout['data_end'] - layout['data_base']} ячеек с адреса {layout['data_base']}")
+
+
+if __name__ == "__main__":
+    main()
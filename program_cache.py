@@ -0,0 +1,184 @@
+import os
+import sys
+import marshal
+
+
+# Версия формата декодированной программы; увеличивается при любом изменении
+# декодирования или структуры записи, чтобы старые записи не использовались
+CACHE_VERSION = 2
+CACHE_MAGIC = b'UVMC'
+CACHE_SUFFIX = '.uvmc'
+
+# Индекс файла программы: путь, размер и время изменения -> ключ записи
+INDEX_MAGIC = b'UVMI'
+INDEX_SUFFIX = '.uvmi'
+
+# Предельный размер дискового кэша по умолчанию (байт)
+PROGRAM_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def cache_key(binary):
+    # Ключ учитывает содержимое программы, версию формата и версию Python
+    # (формат marshal зависит от интерпретатора), как у файлов .pyc.
+    # hashlib импортируется здесь, а не при загрузке модуля: без кэша он не нужен
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=32)
+    digest.update(f"{sys.implementation.cache_tag}-{CACHE_VERSION}\0".encode())
+    digest.update(binary)
+    return digest.hexdigest()
+
+
+def path_key(path):
+    # Имя файла индекса по пути программы: FNV-1a без импорта hashlib или zlib.
+    # Путь хранится в самом индексе, поэтому совпадение имен дает только промах
+    value = 0xcbf29ce484222325
+    for byte in os.fsencode(path):
+        value = ((value ^ byte) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    return f"{value:016x}"
+
+
+class ProgramCache:
+    # Дисковый кэш декодированных программ. Запись создается во временном
+    # файле и атомарно подменяется через os.replace, поэтому параллельные
+    # процессы видят либо старую, либо полную новую запись. При превышении
+    # max_size удаляются записи, к которым дольше всего не обращались.
+    # load_file проверяет файл программы по размеру и времени изменения, как
+    # Python проверяет .pyc, и хеширует содержимое только при их несовпадении
+    def __init__(self, directory, max_size=None):
+        self.directory = directory
+        self.max_size = PROGRAM_CACHE_SIZE if max_size is None else max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def load(self, binary):
+        return self.load_key(cache_key(binary), binary)
+
+    def load_file(self, filename, binary):
+        # binary - содержимое filename. При совпадении пути, размера и времени
+        # изменения с индексом ключ записи берется из индекса без хеширования
+        source = os.path.abspath(filename)
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return self.load(binary)
+        stamp = (f"{sys.implementation.cache_tag}-{CACHE_VERSION}\0{source}\0"
+                 f"{stat.st_size}\0{stat.st_mtime_ns}\0").encode('utf-8', 'surrogateescape')
+        index_name = self.index_path(source)
+
+        key = self.read_index(index_name, stamp)
+        if key is None:
+            key = cache_key(binary)
+            # Файл мог измениться после чтения: такой индекс не сохраняется
+            if stat.st_size == len(binary):
+                self.write_file(index_name, INDEX_MAGIC + stamp + key.encode())
+        return self.load_key(key, binary)
+
+    def load_key(self, key, binary):
+        program = self.read(key)
+        if program is not None:
+            self.hits += 1
+            return program
+
+        # Интерпретатор импортируется только при промахе: запущенный как скрипт,
+        # он загрузился бы второй раз под именем interpreter
+        from interpreter import decode_program
+
+        self.misses += 1
+        program = decode_program(binary)
+        if self.write_file(self.path(key), CACHE_MAGIC + CACHE_VERSION.to_bytes(4, 'little') + marshal.dumps(program)):
+            self.evict()
+        return program
+
+    def index_path(self, source):
+        return os.path.join(self.directory, path_key(source) + INDEX_SUFFIX)
+
+    def read_index(self, filename, stamp):
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        header = INDEX_MAGIC + stamp
+        key = data[len(header):]
+        # Ключ - 64 шестнадцатеричные цифры; иное содержимое считается промахом
+        if not data.startswith(header) or len(key) != 64 or key.strip(b'0123456789abcdef'):
+            return None
+        return key.decode()
+
+    def read(self, key):
+        filename = self.path(key)
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        header = CACHE_MAGIC + CACHE_VERSION.to_bytes(4, 'little')
+        if not data.startswith(header):
+            return None
+        try:
+            program = marshal.loads(data[len(header):])
+        except (EOFError, ValueError, TypeError):
+            return None
+
+        # Время доступа обновляется явно: файловая система может не вести atime
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+        return program
+
+    def write_file(self, filename, data):
+        # Запись кэша не обязательна: при ошибке возвращается False.
+        # tempfile (вместе с random и shutil) нужен только при промахе
+        import tempfile
+
+        try:
+            fd, temp_name = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_name, filename)
+        except OSError:
+            try:
+                os.remove(temp_name)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith((CACHE_SUFFIX, INDEX_SUFFIX)):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_size:
+            return
+
+        # Другой процесс мог уже удалить запись - это не ошибка
+        for _, size, filename in sorted(entries):
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_size:
+                break
@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import tempfile
+from batch import load_jobs, run_batch
+from interpreter import MEMORY_SIZE
+from testing import assemble, run_tests
+
+
+# M[600] = M[500] ^ M[501]: входные данные задания записываются в ячейки 500 и 501
+POWER_PROGRAM = [
+    {'command': 'load', 'constant': 501, 'address': 1},
+    {'command': 'pow', 'value1_addr': 500, 'value2_reg': 1, 'result_reg': 0},
+    {'command': 'load', 'constant': 600, 'address': 2},
+    {'command': 'write', 'value_reg': 0, 'address_reg': 2, 'offset': 0},
+]
+
+
+def write_binary(workdir, name, program):
+    filename = os.path.join(workdir, name)
+    with open(filename, 'wb') as f:
+        f.write(assemble(program))
+    return filename
+
+
+def write_jobs(workdir, jobs):
+    filename = os.path.join(workdir, 'jobs.json')
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({'jobs': jobs}, f)
+    return load_jobs(filename)
+
+
+def run_sorted(jobs, workers):
+    return sorted(run_batch(jobs, workers), key=lambda result: result['id'])
+
+
+def test_jobs_with_inputs():
+    print(" ТЕСТ: задания с разными программами и входными данными")
+    with tempfile.TemporaryDirectory() as workdir:
+        write_binary(workdir, 'power.bin', POWER_PROGRAM)
+        with open(os.path.join(workdir, 'vector.bin'), 'wb') as f:
+            f.write(assemble('examples/vector_pow_working.yaml'))
+
+        inputs = [(base, exp) for base in range(1, 6) for exp in range(4)]
+        jobs = [{'id': index, 'binary': 'power.bin', 'dump_range': '600-600',
+                 'patches': [{'address': 500, 'values': [base, exp]}]}
+                for index, (base, exp) in enumerate(inputs)]
+        jobs.append({'id': len(jobs), 'binary': 'vector.bin', 'dump_range': [3000, 3006]})
+        jobs = write_jobs(workdir, jobs)
+
+        for workers in (1, 2):
+            results = run_sorted(jobs, workers)
+            assert [result['values'] for result in results[:-1]] == [[base ** exp] for base, exp in inputs]
+            assert all(result['steps'] == 4 for result in results[:-1])
+            assert results[-1]['values'] == [2, 9, 64, 25, 6, 49, 512] and results[-1]['steps'] == 52
+
+
+def test_jobs_do_not_share_writes():
+    print(" ТЕСТ: записи одного задания не видны другим")
+    with tempfile.TemporaryDirectory() as workdir:
+        write_binary(workdir, 'power.bin', POWER_PROGRAM)
+        jobs = write_jobs(workdir, [
+            {'binary': 'power.bin', 'dump_range': '500-600', 'patches': [{'address': 500, 'values': [3, 3]}]},
+            {'binary': 'power.bin', 'dump_range': '500-600'},
+        ])
+        first, second = run_sorted(jobs, 1)
+        assert first['values'][0] == 3 and first['values'][-1] == 27
+        # 0 ^ 0 = 1, и ячейка 500 снова нулевая
+        assert second['values'][0] == 0 and second['values'][-1] == 1
+
+
+def test_patch_into_code_and_errors():
+    print(" ТЕСТ: входные данные поверх кода и ошибочные задания")
+    with tempfile.TemporaryDirectory() as workdir:
+        write_binary(workdir, 'power.bin', POWER_PROGRAM)
+        jobs = write_jobs(workdir, [
+            # Константа 600 первой LOAD по адресу 9 заменяется на 700: результат пишется в 700
+            {'binary': 'power.bin', 'dump_range': '700-700',
+             'patches': [{'address': 500, 'values': [2, 5]}, {'address': 10, 'values': [700 & 0xFF]}]},
+            {'binary': 'power.bin', 'dump_range': '0-0', 'patches': [{'address': 65535, 'values': [1, 2]}]},
+        ])
+        patched, failed = run_sorted(jobs, 1)
+        assert patched['values'] == [32], patched
+        assert 'error' in failed
+        print(f"   {failed['error']}")
+
+
+def test_invalid_jobs_reported():
+    print(" ТЕСТ: некорректные задания - ошибка только этих заданий")
+    with tempfile.TemporaryDirectory() as workdir:
+        write_binary(workdir, 'power.bin', POWER_PROGRAM)
+        with open(os.path.join(workdir, 'huge.bin'), 'wb') as f:
+            f.write(bytes(MEMORY_SIZE + 1))
+        jobs = write_jobs(workdir, [
+            {'binary': 'power.bin', 'dump_range': '600-600', 'patches': [{'address': 500, 'values': [2, 3]}]},
+            {'binary': 'power.bin'},
+            {'dump_range': '0-0'},
+            {'binary': 'huge.bin', 'dump_range': '0-0'},
+            {'binary': 'missing.bin', 'dump_range': '0-0'},
+            {'binary': 'power.bin', 'dump_range': 'all'},
+        ])
+        for workers in (1, 2):
+            results = run_sorted(jobs, workers)
+            assert results[0]['values'] == [8]
+            assert [result['id'] for result in results if 'error' in result] == [1, 2, 3, 4, 5]
+        print(f"   {results[1]['error']}; {results[3]['error']}")
+        assert 'dump_range' in results[1]['error'] and 'длиннее памяти' in results[3]['error']
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ПАКЕТНОГО ВЫПОЛНЕНИЯ", [
+        test_jobs_with_inputs,
+        test_jobs_do_not_share_writes,
+        test_patch_into_code_and_errors,
+        test_invalid_jobs_reported,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from benchmark import compare_results
+from testing import run_tests
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def results(**seconds):
+    return {name.replace('_', '/'): {'seconds': value} for name, value in seconds.items()}
+
+
+def test_regression_needs_ratio_and_delta():
+    print(" ТЕСТ: регрессия - превышение и порога, и минимального замедления")
+    baseline = results(slow=0.010, tiny=0.0001, same=0.010)
+    current = results(slow=0.012, tiny=0.0002, same=0.0105)
+    regressions, missing = compare_results(baseline, current, 0.10, 0.0005)
+    # tiny вдвое медленнее, но на 0.1 мс; same медленнее на 5% - в пределах порога
+    assert regressions == ['slow'] and missing == []
+
+    regressions, _ = compare_results(baseline, current, 0.10, 0.0)
+    assert regressions == ['slow', 'tiny']
+    regressions, _ = compare_results(baseline, current, 0.25, 0.0)
+    assert regressions == ['tiny']
+
+
+def test_speedup_missing_and_new_entries():
+    print(" ТЕСТ: ускорения, пропущенные и новые замеры")
+    baseline = results(fast=0.010, gone=0.010, zero=0.0)
+    current = results(fast=0.002, new=1.0, zero=0.005)
+    regressions, missing = compare_results(baseline, current, 0.10, 0.0)
+    # Нулевая база и новые замеры не считаются регрессией
+    assert regressions == []
+    assert missing == ['gone']
+
+
+def test_cli_exit_code():
+    print(" ТЕСТ: код выхода при регрессии")
+    with tempfile.TemporaryDirectory() as workdir:
+        base_file = os.path.join(workdir, 'base.json')
+        with open(base_file, 'w', encoding='utf-8') as f:
+            json.dump({'results': results(dump_small=1e-9)}, f)
+
+        cmd = [sys.executable, os.path.join(HERE, 'benchmark.py'), '--groups', 'dump', '--repeat', '1',
+               '--compare', base_file, '--min-delta', '0']
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        assert result.returncode == 1, result.stdout + result.stderr
+        assert 'dump/small' in result.stdout and 'РЕГРЕССИЯ' in result.stdout
+
+        result = subprocess.run(cmd[:-2] + ['--min-delta', '10'], capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_optional_modules_not_imported():
+    print(" ТЕСТ: модули отдельных групп не загружаются при импорте")
+    code = "import sys, benchmark; print(sorted({'batch', 'program_cache', 'generator'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=HERE)
+    assert result.stdout.strip() == '[]', result.stdout + result.stderr
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ СРАВНЕНИЯ БЕНЧМАРКОВ", [
+        test_regression_needs_ratio_and_delta,
+        test_speedup_missing_and_new_entries,
+        test_cli_exit_code,
+        test_optional_modules_not_imported,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
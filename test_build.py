@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+from build import build, collect_directory, collect_manifest
+from linker import link, load_object
+from testing import assemble, run_tests
+
+
+PROGRAMS = ['simple_calc.yaml', 'copy_array.yaml', 'pow_simple.yaml', 'vector_pow_working.yaml']
+
+
+def make_sources(workdir):
+    source_dir = os.path.join(workdir, 'src')
+    os.makedirs(source_dir)
+    for name in PROGRAMS:
+        shutil.copy(os.path.join('examples', name), source_dir)
+    return source_dir
+
+
+def test_incremental_rebuild():
+    print(" ТЕСТ: пересобираются только измененные программы")
+    with tempfile.TemporaryDirectory() as workdir:
+        source_dir = make_sources(workdir)
+        state_file = os.path.join(workdir, 'state.json')
+        _, targets = collect_directory(source_dir, os.path.join(workdir, 'out'))
+
+        result = build(targets, state_file, workers=2)
+        assert len(result['built']) == len(PROGRAMS) and result['errors'] == []
+        for source, output in targets:
+            with open(output, 'rb') as f:
+                assert f.read() == assemble(source), output
+
+        # Результаты и файл состояния получают права с учетом umask, как при обычном open
+        if os.name == 'posix':
+            umask = os.umask(0o022)
+            os.umask(umask)
+            for filename in [state_file] + [output for _, output in targets]:
+                assert os.stat(filename).st_mode & 0o777 == 0o666 & ~umask, filename
+
+        result = build(targets, state_file, workers=2)
+        assert result['built'] == [] and result['unchanged'] == len(PROGRAMS)
+
+        # Касание файла без изменения содержимого сборки не вызывает
+        touched = os.path.join(source_dir, 'copy_array.yaml')
+        os.utime(touched, ns=(0, 0))
+        changed = os.path.join(source_dir, 'simple_calc.yaml')
+        with open(changed, 'a', encoding='utf-8') as f:
+            f.write("\n- command: load\n  constant: 9\n  address: 7\n")
+
+        result = build(targets, state_file, workers=1)
+        assert result['built'] == [changed], result['built']
+
+        # Удаленный результат собирается заново
+        os.remove(targets[0][1])
+        assert len(build(targets, state_file, workers=1)['built']) == 1
+
+
+def test_errors_are_retried():
+    print(" ТЕСТ: ошибки сборки попадают в итог и повторяются")
+    with tempfile.TemporaryDirectory() as workdir:
+        source_dir = make_sources(workdir)
+        shutil.copy('examples/test_load.yaml', source_dir)
+        state_file = os.path.join(workdir, 'state.json')
+        _, targets = collect_directory(source_dir, os.path.join(workdir, 'out'))
+
+        for _ in range(2):
+            result = build(targets, state_file, workers=1)
+            assert [os.path.basename(source) for source, _ in result['errors']] == ['test_load.yaml']
+        assert result['unchanged'] == len(PROGRAMS)
+
+        with open(state_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)['entries']
+        assert len(entries) == len(PROGRAMS)
+
+
+def test_manifest():
+    print(" ТЕСТ: сборка по манифесту")
+    with tempfile.TemporaryDirectory() as workdir:
+        make_sources(workdir)
+        manifest_file = os.path.join(workdir, 'build.json')
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump({'output_dir': 'bin', 'programs': [
+                'src/pow_simple.yaml',
+                {'source': 'src/copy_array.yaml', 'output': 'lib/copy.bin'},
+            ]}, f)
+
+        output_dir, targets = collect_manifest(manifest_file)
+        assert output_dir == os.path.join(workdir, 'bin')
+        assert [output for _, output in targets] == [os.path.join(workdir, 'bin', 'pow_simple.bin'),
+                                                     os.path.join(workdir, 'bin', 'lib', 'copy.bin')]
+
+        result = build(targets, os.path.join(output_dir, 'state.json'), workers=1)
+        assert len(result['built']) == 2
+        assert os.path.exists(os.path.join(workdir, 'bin', 'lib', 'copy.bin'))
+
+
+def test_output_inside_sources():
+    print(" ТЕСТ: каталог вывода, состояние и манифест не считаются исходниками")
+    with tempfile.TemporaryDirectory() as workdir:
+        source_dir = make_sources(workdir)
+        with open(os.path.join(source_dir, 'build.json'), 'w', encoding='utf-8') as f:
+            json.dump({'programs': PROGRAMS}, f)
+        with open(os.path.join(source_dir, 'load.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'command': 'load', 'constant': 5, 'address': 1}], f)
+        output_dir = os.path.join(source_dir, 'build')
+        state_file = os.path.join(output_dir, '.uvm_build_state.json')
+
+        for built in (len(PROGRAMS) + 1, 0):
+            _, targets = collect_directory(source_dir, output_dir)
+            names = sorted(os.path.basename(source) for source, _ in targets)
+            assert names == sorted(PROGRAMS + ['load.json']), names
+            result = build(targets, state_file, workers=1)
+            assert result['errors'] == [] and len(result['built']) == built
+
+        with open(os.path.join(output_dir, 'load.bin'), 'rb') as f:
+            assert f.read() == bytes([0x06, 5, 0x10])
+
+
+def test_modules_build_objects():
+    print(" ТЕСТ: модули собираются в объектные файлы для компоновщика")
+    with tempfile.TemporaryDirectory() as workdir:
+        output_dir, targets = collect_directory('examples/modules', os.path.join(workdir, 'out'))
+        state_file = os.path.join(workdir, 'state.json')
+        result = build(targets, state_file, workers=1)
+        assert result['errors'] == [] and len(result['built']) == 2
+
+        objects = [(name, load_object(os.path.join(output_dir, name + '.uvmo')))
+                   for name in ('vectors', 'vector_pow')]
+        image, _ = link(objects, data_base=1000)
+        assert bytes(image) == assemble('examples/vector_pow_working.yaml')
+        assert not os.path.exists(os.path.join(output_dir, 'vectors.bin'))
+        assert build(targets, state_file, workers=1)['unchanged'] == 2
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ИНКРЕМЕНТАЛЬНОЙ СБОРКИ", [
+        test_incremental_rebuild,
+        test_errors_are_retried,
+        test_manifest,
+        test_output_inside_sources,
+        test_modules_build_objects,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
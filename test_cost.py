@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import random
+import tempfile
+from interpreter import decode_program
+from cost import estimate_cost, estimate_patched, initial_memory, simulate_makespan
+from generator import ProgramGenerator
+from batch import SharedImages, SCHEDULES, load_jobs, run_batch, plan_batches
+from testing import assemble, run_tests
+
+
+# M[4002] = M[60000] ^ M[4001], как в test_batch, но с данными за пределами кода
+POWER_PROGRAM = [
+    {'command': 'load', 'constant': 4001, 'address': 1},
+    {'command': 'pow', 'value1_addr': 60000, 'value2_reg': 1, 'result_reg': 0},
+    {'command': 'load', 'constant': 4002, 'address': 2},
+    {'command': 'write', 'value_reg': 0, 'address_reg': 2, 'offset': 0},
+]
+
+
+def estimate(binary, overlay=None):
+    return estimate_cost(decode_program(binary), initial_memory(binary), overlay)
+
+
+def test_counts_and_known_operands():
+    print(" ТЕСТ: счетчики команд и операнды POW векторной программы")
+    binary = assemble('examples/vector_pow_working.yaml')
+    result = estimate(binary)
+    assert result['commands'] == {'load': 24, 'read': 0, 'write': 21, 'pow': 7}
+    assert (result['pow_known'], result['pow_unknown']) == (7, 0)
+    assert result['seconds'] > 0
+
+
+def test_pow_operands_drive_cost():
+    print(" ТЕСТ: стоимость растет с длиной результата POW")
+    binary = assemble(POWER_PROGRAM)
+    small = estimate(binary, {60000: 3, 4001: 10})
+    large = estimate(binary, {60000: 3, 4001: 200000})
+    shift = estimate(binary, {60000: 2, 4001: 200000})
+    assert large['seconds'] > 100 * small['seconds']
+    assert small['seconds'] < shift['seconds'] < large['seconds']
+
+    # Результат POW, записанный в память, известен следующему POW
+    chained = POWER_PROGRAM + [
+        {'command': 'load', 'constant': 4002, 'address': 3},
+        {'command': 'pow', 'value1_addr': 60000, 'value2_reg': 3, 'result_reg': 4},
+    ]
+    result = estimate(assemble(chained), {60000: 3, 4001: 2})
+    assert (result['pow_known'], result['pow_unknown']) == (2, 0)
+
+    # Образ памяти неизвестен: после записи по адресу из памяти неизвестны
+    # и значения, заданные поверх образа
+    clobbering = [
+        {'command': 'load', 'constant': 4000, 'address': 1},
+        {'command': 'read', 'result_reg': 2, 'address_reg': 1, 'offset': 0},
+        {'command': 'write', 'value_reg': 1, 'address_reg': 2, 'offset': 0},
+    ] + POWER_PROGRAM
+    program = decode_program(assemble(clobbering))
+    result = estimate_cost(program, None, {60000: 3, 4001: 2})
+    assert (result['pow_known'], result['pow_unknown']) == (0, 1)
+    result = estimate_cost(program, None, {60000: 3, 4001: 2, 4000: 5000})
+    assert (result['pow_known'], result['pow_unknown']) == (1, 0)
+
+
+def test_patched_estimate_matches_full_pass():
+    print(" ТЕСТ: оценка задания по профилю совпадает с полным проходом")
+    rng = random.Random(5)
+    # Адрес записи берется из входных данных: такие задания оцениваются заново
+    indirect = [
+        {'command': 'load', 'constant': 4003, 'address': 1},
+        {'command': 'read', 'result_reg': 2, 'address_reg': 1, 'offset': 0},
+        {'command': 'load', 'constant': 9, 'address': 3},
+        {'command': 'write', 'value_reg': 3, 'address_reg': 2, 'offset': 0},
+    ] + POWER_PROGRAM
+    programs = [assemble(list(ProgramGenerator(seed=seed).commands(300))) for seed in range(3)]
+    programs.append(assemble(indirect))
+    changed = 0
+
+    for binary in programs:
+        program = decode_program(binary)
+        memory = initial_memory(binary)
+        profile = estimate_cost(program, memory)
+        print(f"   POW: {len(profile['pows'])}, входных ячеек: {len(profile['inputs'])}, "
+              f"адресных: {len(profile['address_inputs'])}")
+        for _ in range(50):
+            patches = [{'address': rng.choice([4001, 4003, 60000, rng.randrange(2040, 2310)]),
+                        'values': [rng.choice([0, 2, 3, 7, 1000, 4001]) for _ in range(rng.randint(1, 40))]}
+                       for _ in range(rng.randint(0, 3))]
+            overlay = {}
+            for patch in patches:
+                for index, value in enumerate(patch['values']):
+                    overlay[patch['address'] + index] = value
+            expected = estimate_cost(program, memory, overlay)['seconds']
+            actual = estimate_patched(profile, program, memory, patches)
+            assert abs(actual - expected) <= 1e-9 * expected, (patches, actual, expected)
+            changed += actual != profile['seconds']
+    print(f"   Заданий с другой оценкой: {changed}")
+    assert changed >= 20
+
+
+def test_longest_job_first_schedule():
+    print(" ТЕСТ: расписание LJF короче FIFO")
+    costs = [1.0] * 12 + [6.0]
+    assert simulate_makespan(costs, 3) == 10.0
+    assert simulate_makespan(sorted(costs, reverse=True), 3) == 6.0
+
+    jobs = [{'id': index, 'estimate': cost} for index, cost in enumerate(costs)]
+    batches = plan_batches(jobs, 3)
+    assert batches[0] == [jobs[-1]]
+    assert sorted(job['id'] for batch in batches for job in batch) == list(range(13))
+    batch_costs = [sum(job['estimate'] for job in batch) for batch in batches]
+    assert simulate_makespan(batch_costs, 3) == 6.0
+
+
+def test_batch_with_estimates():
+    print(" ТЕСТ: пакетное выполнение по оценке стоимости")
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, 'power.bin'), 'wb') as f:
+            f.write(assemble(POWER_PROGRAM))
+        exponents = [2, 30000, 5, 10000]
+        jobs = [{'id': index, 'binary': 'power.bin', 'dump_range': '4002-4002',
+                 'patches': [{'address': 60000, 'values': [3]}, {'address': 4001, 'values': [exponent]}]}
+                for index, exponent in enumerate(exponents)]
+        filename = os.path.join(workdir, 'jobs.json')
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(jobs, f)
+        jobs = load_jobs(filename)
+
+        for workers in (1, 2):
+            results = list(run_batch(jobs, workers, schedule='ljf'))
+            if workers == 1:
+                assert [result['id'] for result in results] == [1, 3, 2, 0]
+            results.sort(key=lambda result: result['id'])
+            assert [result['values'] for result in results] == [[9], [0xFFFFFFFF], [243], [0xFFFFFFFF]]
+            assert results[1]['estimate'] > results[3]['estimate'] > results[2]['estimate']
+
+
+def test_batch_with_bad_patches():
+    print(" ТЕСТ: некорректные входные данные - ошибка одного задания")
+    with tempfile.TemporaryDirectory() as workdir:
+        binary_file = os.path.join(workdir, 'power.bin')
+        with open(binary_file, 'wb') as f:
+            f.write(assemble(POWER_PROGRAM))
+        patches = [[{'address': 60000, 'values': [3]}, {'address': 4001, 'values': [2]}],
+                   [{'address': 60000, 'values': [1.5]}, {'address': 4001, 'values': [2]}],
+                   [{'address': 60000}]]
+        jobs = [{'id': index, 'binary': binary_file, 'dump_range': (4002, 4002), 'patches': job_patches}
+                for index, job_patches in enumerate(patches)]
+
+        for schedule in SCHEDULES:
+            results = sorted(run_batch(jobs, 1, schedule=schedule), key=lambda result: result['id'])
+            assert results[0]['values'] == [9], schedule
+            assert 'error' in results[1] and 'error' in results[2], schedule
+            if schedule == 'ljf':
+                assert results[1]['estimate'] == results[2]['estimate'] == 0.0
+
+        # Профиль стоимости строится только для оценки заданий
+        images = SharedImages()
+        try:
+            images.add(binary_file)
+            assert images.profiles == {}
+            images.estimate(jobs[0])
+            assert list(images.profiles) == [binary_file]
+        finally:
+            images.close()
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ОЦЕНКИ СТОИМОСТИ", [
+        test_counts_and_known_operands,
+        test_pow_operands_drive_cost,
+        test_patched_estimate_matches_full_pass,
+        test_longest_job_first_schedule,
+        test_batch_with_estimates,
+        test_batch_with_bad_patches,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
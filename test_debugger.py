@@ -0,0 +1,194 @@
+import io
+import os
+import sys
+import tempfile
+import contextlib
+from debugger import Debugger
+from interpreter import UVMInterpreter, WATCH_READ, WATCH_WRITE, WATCH_POW
+from testing import assemble, run_tests
+
+
+def load_interpreter(yaml_file):
+    fd, bin_file = tempfile.mkstemp(suffix='.bin')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(assemble(yaml_file))
+
+    interpreter = UVMInterpreter()
+    try:
+        interpreter.load_program(bin_file)
+    finally:
+        os.remove(bin_file)
+    return interpreter
+
+
+def test_write_watchpoint_breaks():
+    print(" ТЕСТ: точка наблюдения на запись")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    interpreter.add_watchpoint(2000, 2002, 'w')
+
+    interpreter.execute()
+    hit = interpreter.pause_reason
+    print(f"   Остановка: {hit}")
+
+    assert interpreter.paused
+    assert hit['address'] == 2000 and hit['access'] == WATCH_WRITE
+    assert hit['value'] == 10 and hit['old_value'] == 0
+    assert interpreter.memory[2000] == 10
+    assert interpreter.memory[2001] == 0
+
+
+def test_log_watchpoint_does_not_stop():
+    print(" ТЕСТ: точка наблюдения в режиме журнала")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    interpreter.add_watchpoint(1000, 1002, 'r', 'log')
+
+    interpreter.execute()
+
+    assert interpreter.halted and not interpreter.paused
+    assert [hit['address'] for hit in interpreter.watch_hits] == [1000, 1001, 1002]
+    assert all(hit['access'] == WATCH_READ for hit in interpreter.watch_hits)
+    assert interpreter.memory[2000:2003] == [10, 20, 30]
+
+
+def test_pow_watchpoint():
+    print(" ТЕСТ: точка наблюдения на операнды POW")
+    interpreter = load_interpreter('examples/pow_test.yaml')
+    interpreter.add_watchpoint(0, 65535, 'p', 'log')
+
+    interpreter.execute()
+
+    pow_hits = [hit for hit in interpreter.watch_hits if hit['access'] == WATCH_POW]
+    print(f"   Обращений POW: {len(pow_hits)}")
+    assert len(pow_hits) == 4
+    assert interpreter.registers[0] == 8 and interpreter.registers[1] == 25
+
+
+def test_conditional_breakpoint():
+    print(" ТЕСТ: условная точка останова")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    interpreter.add_breakpoint(6, 'R[0] == 99')
+    interpreter.add_breakpoint(9, 'R[2] == 30')
+
+    interpreter.execute()
+
+    assert interpreter.paused
+    assert interpreter.pause_reason == {'breakpoint': 9}
+    assert interpreter.pc == 9 and interpreter.steps == 3
+
+    interpreter.remove_breakpoint(9)
+    interpreter.execute()
+    assert interpreter.halted and interpreter.steps == 14
+
+
+def test_no_watchpoints_no_map():
+    print(" ТЕСТ: без точек наблюдения карта не строится")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    watch_id = interpreter.add_watchpoint(10, 20)
+    interpreter.remove_watchpoint(watch_id)
+
+    assert interpreter.watch_map is None
+    interpreter.execute()
+    assert interpreter.watch_hits == []
+
+
+def run_debugger(debugger, *lines):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for line in lines:
+            debugger.execute_line(line)
+    return output.getvalue()
+
+
+def test_debugger_continue_past_breakpoint():
+    print(" ТЕСТ: отладчик продолжает выполнение с точки останова")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    debugger = Debugger(interpreter)
+
+    output = run_debugger(debugger, 'break 9', 'continue')
+    assert 'Остановка в точке останова 9' in output
+    assert interpreter.pc == 9 and interpreter.steps == 3
+
+    # Повторный continue не должен снова остановиться на той же команде
+    output = run_debugger(debugger, 'continue')
+    assert 'Программа завершена, выполнено команд: 14' in output
+    assert interpreter.halted and interpreter.memory[2000:2003] == [10, 20, 30]
+
+
+def test_debugger_step_across_breakpoint():
+    print(" ТЕСТ: пошаговое выполнение через точку останова")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    debugger = Debugger(interpreter)
+
+    run_debugger(debugger, 'break 9', 'step 5')
+    assert interpreter.paused and interpreter.pc == 9 and interpreter.steps == 3
+
+    run_debugger(debugger, 'step 2')
+    assert not interpreter.paused and interpreter.pc == 15 and interpreter.steps == 5
+
+    run_debugger(debugger, 'step')
+    assert interpreter.steps == 6
+
+
+def test_debugger_resume_after_watch_break():
+    print(" ТЕСТ: продолжение после остановки по точке наблюдения")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    debugger = Debugger(interpreter)
+
+    output = run_debugger(debugger, 'watch 2000-2002 w', 'continue')
+    assert 'запись адреса 2000' in output
+    assert interpreter.memory[2000:2003] == [10, 0, 0]
+
+    output = run_debugger(debugger, 'continue')
+    assert 'запись адреса 2001' in output
+    assert interpreter.memory[2000:2003] == [10, 20, 0]
+
+    output = run_debugger(debugger, 'unwatch 1', 'continue')
+    assert 'Программа завершена' in output
+    assert interpreter.memory[2000:2003] == [10, 20, 30]
+
+
+def test_debugger_breakpoint_after_watch_break():
+    print(" ТЕСТ: точка останова после остановки по точке наблюдения")
+    interpreter = load_interpreter('examples/array_copy.yaml')
+    debugger = Debugger(interpreter)
+
+    output = run_debugger(debugger, 'watch 2000 w', 'continue')
+    assert 'запись адреса 2000' in output
+    stop_pc = interpreter.pc
+
+    # Остановка была по точке наблюдения: точка останова на том же pc срабатывает
+    output = run_debugger(debugger, f'break {stop_pc}', 'continue')
+    assert f'Остановка в точке останова {stop_pc}' in output
+    assert interpreter.pc == stop_pc
+
+    output = run_debugger(debugger, 'continue')
+    assert 'Программа завершена' in output
+
+
+def test_debugger_reports_bad_input():
+    print(" ТЕСТ: ошибки ввода в отладчике")
+    debugger = Debugger(load_interpreter('examples/array_copy.yaml'))
+
+    output = run_debugger(debugger, 'watch 10-20 x', 'break', 'frobnicate')
+    assert output.count('Ошибка') == 2
+    assert 'Неизвестная команда: frobnicate' in output
+    assert debugger.execute_line('quit') is False
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ОТЛАДОЧНЫХ СРЕДСТВ", [
+        test_write_watchpoint_breaks,
+        test_log_watchpoint_does_not_stop,
+        test_pow_watchpoint,
+        test_conditional_breakpoint,
+        test_no_watchpoints_no_map,
+        test_debugger_continue_past_breakpoint,
+        test_debugger_step_across_breakpoint,
+        test_debugger_resume_after_watch_break,
+        test_debugger_breakpoint_after_watch_break,
+        test_debugger_reports_bad_input,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
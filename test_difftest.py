@@ -0,0 +1,82 @@
+import sys
+import difftest
+from interpreter import UVMInterpreter
+from testing import run_tests
+
+
+def test_engines_agree():
+    print(" ТЕСТ: движки совпадают на случайных программах")
+    engines = list(difftest.ENGINES)
+    results = list(difftest.run_campaign(range(100), 150, engines, workers=1))
+    differences = [(seed, difference) for seed, difference in results if difference]
+    print(f"   Программ: {len(results)}, движки: {', '.join(engines)}")
+    assert differences == [], differences[0]
+
+
+def run_faulty(commands, binary):
+    # Намеренная ошибка: запись значения 0 игнорируется
+    interpreter = UVMInterpreter()
+    original_write = interpreter.execute_write
+
+    def execute_write(params):
+        if interpreter.registers[params['value_reg']] != 0:
+            original_write(params)
+
+    interpreter.execute_write = execute_write
+    interpreter.memory[:len(binary)] = binary
+    interpreter.execute()
+    return difftest.state_from_interpreter(interpreter, len(binary))
+
+
+def test_shrink_finds_minimal_counterexample():
+    print(" ТЕСТ: сокращение контрпримера")
+    difftest.ENGINES['faulty'] = run_faulty
+    try:
+        engines = ['reference', 'faulty']
+        commands = [
+            {'command': 'load', 'constant': 500, 'address': 1},
+            {'command': 'load', 'constant': 7, 'address': 0},
+            {'command': 'write', 'value_reg': 0, 'address_reg': 1, 'offset': 0},
+            {'command': 'load', 'constant': 0, 'address': 2},
+            {'command': 'load', 'constant': 3, 'address': 3},
+            {'command': 'write', 'value_reg': 2, 'address_reg': 1, 'offset': 0},
+            {'command': 'read', 'result_reg': 9, 'offset': 0, 'address_reg': 1},
+        ]
+        assert difftest.check_program(commands, engines) is not None
+
+        minimal = difftest.shrink(commands, engines)
+        print(f"   {len(commands)} -> {len(minimal)} команд")
+        assert len(minimal) == 4
+        assert [command['command'] for command in minimal] == ['load', 'load', 'write', 'write']
+    finally:
+        del difftest.ENGINES['faulty']
+
+
+def test_unsafe_candidates_rejected():
+    print(" ТЕСТ: недопустимые сокращенные программы отбрасываются")
+    # Запись по адресу 0 попадает в область кода
+    assert not difftest.is_safe([{'command': 'write', 'value_reg': 0, 'address_reg': 0, 'offset': 0}])
+    assert difftest.is_safe([{'command': 'load', 'constant': 100, 'address': 0},
+                             {'command': 'write', 'value_reg': 0, 'address_reg': 0, 'offset': 0}])
+
+    # Запись 6 в ячейку сразу за кодом (адрес 9) выполняется как лишняя команда LOAD
+    commands = [{'command': 'load', 'constant': 6, 'address': 0},
+                {'command': 'load', 'constant': 9, 'address': 1},
+                {'command': 'write', 'value_reg': 0, 'address_reg': 1, 'offset': 0}]
+    assert 'steps' in difftest.check_program(commands, ['reference', 'oracle'])
+    assert not difftest.is_safe(commands)
+    commands[1]['constant'] = 10
+    assert difftest.is_safe(commands)
+    assert difftest.check_program(commands, list(difftest.ENGINES)) is None
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ДИФФЕРЕНЦИАЛЬНОГО ТЕСТИРОВАНИЯ", [
+        test_engines_agree,
+        test_shrink_finds_minimal_counterexample,
+        test_unsafe_candidates_rejected,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
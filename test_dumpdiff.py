@@ -0,0 +1,169 @@
+import os
+import sys
+import tempfile
+import subprocess
+from dumpdiff import diff_ranges
+from interpreter import UVMInterpreter, decode_program, map_memory_file
+from testing import assemble, run_tests
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def write_dump(filename, memory, start, end):
+    interpreter = UVMInterpreter()
+    interpreter.memory[:len(memory)] = memory
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(interpreter.memory_dump_xml(start, end))
+
+
+def write_memory_file(filename, cells):
+    memory_map, memory = map_memory_file(filename, writable=True)
+    for address, value in cells.items():
+        memory[address] = value
+    memory.release()
+    memory_map.close()
+
+
+def test_xml_dumps():
+    print(" ТЕСТ: расхождение XML-дампов из репозитория")
+    stats = {}
+    ranges = list(diff_ranges('vector_dump.xml', 'vector_dump_fixed.xml', stats))
+    assert [(r['start'], r['end'], r['kind']) for r in ranges] == [(3000, 3006, 'value')]
+    assert (ranges[0]['first'], ranges[0]['second']) == (2, 4)
+    assert stats['compared'] == 2007 and stats['different'] == 7
+
+    assert list(diff_ranges('vector_dump_fixed.xml', 'vector_dump_fixed.xml')) == []
+
+
+def test_ranges_and_missing_cells():
+    print(" ТЕСТ: диапазоны значений и ячейки только в одном дампе")
+    memory = [0] * 100
+    changed = list(memory)
+    changed[10:13] = [1, 2, 3]
+    changed[40] = 5
+    with tempfile.TemporaryDirectory() as workdir:
+        first = os.path.join(workdir, 'first.xml')
+        second = os.path.join(workdir, 'second.xml')
+        write_dump(first, memory, 0, 49)
+        write_dump(second, changed, 5, 60)
+
+        # По умолчанию сравниваются только адреса 5-49, общие для обоих дампов
+        stats = {}
+        ranges = [(r['start'], r['end'], r['kind']) for r in diff_ranges(first, second, stats)]
+        assert ranges == [(10, 12, 'value'), (40, 40, 'value')]
+        assert stats == {'compared': 45, 'different': 4, 'only_first': 0, 'only_second': 0,
+                         'first_covered': 50, 'second_covered': 56}
+
+        stats = {}
+        ranges = [(r['start'], r['end'], r['kind']) for r in diff_ranges(first, second, stats, missing=True)]
+        assert ranges == [(0, 4, 'only_first'), (10, 12, 'value'), (40, 40, 'value'),
+                          (50, 60, 'only_second')]
+        assert stats == {'compared': 45, 'different': 4, 'only_first': 5, 'only_second': 11,
+                         'first_covered': 0, 'second_covered': 0}
+
+
+def test_memory_files():
+    print(" ТЕСТ: файлы памяти и смешанное сравнение с XML")
+    with tempfile.TemporaryDirectory() as workdir:
+        first = os.path.join(workdir, 'first.mem')
+        second = os.path.join(workdir, 'second.mem')
+        write_memory_file(first, {3000: 2, 3001: 9})
+        write_memory_file(second, {3000: 2, 3001: 8, 3002: 7, 65535: 1})
+
+        stats = {}
+        ranges = [(r['start'], r['end'], r['kind']) for r in diff_ranges(first, second, stats)]
+        assert ranges == [(3001, 3002, 'value'), (65535, 65535, 'value')]
+        assert stats['compared'] == 65536 and stats['different'] == 3
+
+        # XML-дамп покрывает часть памяти: файл сравнивается только на ней,
+        # остальные ячейки файла - "только во втором" лишь с missing
+        dump = os.path.join(workdir, 'dump.xml')
+        memory = [0] * 3002
+        memory[3000:3002] = [2, 9]
+        write_dump(dump, memory, 3000, 3001)
+        stats = {}
+        assert list(diff_ranges(dump, first, stats)) == [] and stats['compared'] == 2
+        ranges = [(r['start'], r['end'], r['kind']) for r in diff_ranges(dump, first, missing=True)]
+        assert ranges == [(0, 2999, 'only_second'), (3002, 65535, 'only_second')]
+
+
+def test_automatic_dumps():
+    print(" ТЕСТ: автоматический дамп сравнивается с дампом диапазона того же запуска")
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(assemble('examples/vector_pow_working.yaml'))
+    interpreter.track_writes(decode_program(assemble('examples/vector_pow_working.yaml')))
+    interpreter.execute()
+    with tempfile.TemporaryDirectory() as workdir:
+        auto = os.path.join(workdir, 'auto.xml')
+        fixed = os.path.join(workdir, 'fixed.xml')
+        empty = os.path.join(workdir, 'empty.xml')
+        interpreter.create_ranges_dump(interpreter.written_ranges(), auto)
+        interpreter.create_memory_dump(2990, 3010, fixed)
+        interpreter.create_ranges_dump([], empty)
+
+        stats = {}
+        assert list(diff_ranges(auto, fixed, stats)) == []
+        print(f"   Сравнено ячеек: {stats['compared']}")
+        assert stats['compared'] == 7
+
+        # Пустой автоматический дамп не покрывает ни одного адреса
+        for first, second in [(empty, fixed), (fixed, empty), (empty, empty)]:
+            stats = {}
+            assert list(diff_ranges(first, second, stats)) == [] and stats['compared'] == 0
+        assert len(list(diff_ranges(empty, fixed, missing=True))) == 1
+
+
+def test_early_exit():
+    print(" ТЕСТ: первое расхождение выдается без чтения всего дампа")
+    memory = [0] * 60000
+    changed = list(memory)
+    changed[5] = 1
+    changed[10] = 1
+    with tempfile.TemporaryDirectory() as workdir:
+        first = os.path.join(workdir, 'first.xml')
+        second = os.path.join(workdir, 'second.xml')
+        write_dump(first, memory, 0, 59999)
+        write_dump(second, changed, 0, 59999)
+        # Испорченный конец файла: полный разбор закончился бы ошибкой
+        with open(second, 'a', encoding='utf-8') as f:
+            f.write('<broken')
+
+        ranges = diff_ranges(first, second)
+        assert next(ranges)['start'] == 5
+        ranges.close()
+
+        try:
+            list(diff_ranges(first, second))
+        except SyntaxError:
+            return
+        assert False, "испорченный дамп разобран полностью"
+
+
+def test_disjoint_dumps_fail():
+    print(" ТЕСТ: дампы без общих адресов не считаются совпадающими")
+    stats = {}
+    assert list(diff_ranges('pow_dump.xml', 'vector_dump.xml', stats)) == []
+    assert stats['compared'] == 0 and stats['first_covered'] and stats['second_covered']
+
+    command = [sys.executable, os.path.join(HERE, 'dumpdiff.py'), 'pow_dump.xml', 'vector_dump.xml']
+    result = subprocess.run(command, capture_output=True, text=True, cwd=HERE)
+    assert result.returncode == 2 and 'не пересекаются' in result.stdout, result.stdout
+
+    result = subprocess.run(command + ['--missing'], capture_output=True, text=True, cwd=HERE)
+    assert result.returncode == 1 and 'только во втором' in result.stdout, result.stdout
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ СРАВНЕНИЯ ДАМПОВ", [
+        test_xml_dumps,
+        test_ranges_and_missing_cells,
+        test_memory_files,
+        test_automatic_dumps,
+        test_early_exit,
+        test_disjoint_dumps_fail,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+from interpreter import UVMInterpreter
+from generator import ProgramGenerator, write_outputs
+from testing import assemble, run_tests
+
+
+def run_generated(count, seed, **options):
+    with tempfile.TemporaryDirectory() as workdir:
+        yaml_file = os.path.join(workdir, 'program.yaml')
+        bin_file = os.path.join(workdir, 'program.bin')
+        oracle = write_outputs(ProgramGenerator(seed=seed, **options), count, yaml_file, bin_file)
+
+        binary_code = assemble(yaml_file)
+        with open(bin_file, 'rb') as f:
+            generated_binary = f.read()
+
+        interpreter = UVMInterpreter()
+        interpreter.load_program(bin_file)
+        interpreter.execute()
+
+    return oracle, interpreter, binary_code, generated_binary
+
+
+def check_oracle(oracle, interpreter):
+    assert oracle['shared_memory_safe']
+    assert interpreter.steps == oracle['instructions']
+    assert interpreter.registers == oracle['registers']
+    for address, value in oracle['memory'].items():
+        assert interpreter.memory[int(address)] == value, f"адрес {address}"
+
+
+def test_oracle_matches_interpreter():
+    print(" ТЕСТ: эталон генератора совпадает с выполнением")
+    for seed in range(5):
+        oracle, interpreter, binary_code, generated_binary = run_generated(300, seed)
+        print(f"   seed={seed}: команд {oracle['instructions']}, ячеек {len(oracle['memory'])}")
+
+        assert binary_code == generated_binary
+        check_oracle(oracle, interpreter)
+
+
+def test_pow_heavy_mix():
+    print(" ТЕСТ: смесь с преобладанием POW")
+    oracle, interpreter, _, _ = run_generated(
+        200, 42, mix={'pow': 8, 'load': 1, 'write': 2}, pow_base_max=5, pow_exp_max=3)
+
+    check_oracle(oracle, interpreter)
+    print(f"   Команды: {oracle['opcodes']}")
+    assert oracle['opcodes']['pow'] > oracle['instructions'] // 2
+
+
+def test_invalid_options():
+    print(" ТЕСТ: недопустимые параметры генератора")
+    for options in [{'data_base': 4200, 'footprint': 256}, {'locality': 2}, {'mix': {'load': 0}}]:
+        try:
+            ProgramGenerator(**options)
+        except ValueError:
+            continue
+        assert False, f"параметры {options} приняты"
+
+
+def test_data_right_after_code_unsafe():
+    print(" ТЕСТ: данные сразу за кодом небезопасны")
+    program = [{'command': 'load', 'constant': 6, 'address': 0},
+               {'command': 'load', 'constant': 9, 'address': 1},
+               {'command': 'write', 'value_reg': 0, 'address_reg': 1, 'offset': 0}]
+    for data_base, safe in [(9, False), (10, True)]:
+        generator = ProgramGenerator(data_base=data_base)
+        for command in program:
+            generator.emit(command)
+        oracle = generator.oracle()
+        assert oracle['code_size'] == 9 and oracle['shared_memory_safe'] == safe, data_base
+
+    # Записанная в ячейку 9 шестерка выполняется как LOAD: лишняя команда
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(assemble(program))
+    interpreter.execute()
+    assert interpreter.steps == 4
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ГЕНЕРАТОРА ПРОГРАММ", [
+        test_oracle_matches_interpreter,
+        test_pow_heavy_mix,
+        test_invalid_options,
+        test_data_right_after_code_unsafe,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
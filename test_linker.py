@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from assembler import Assembler
+from interpreter import UVMInterpreter
+from linker import link, load_object, patch_load_const
+from testing import assemble, run_tests
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def assemble_module(filename):
+    assembler = Assembler()
+    return filename, assembler.assemble_object(assembler.load_program(filename))
+
+
+def test_modules_link_to_original_bytes():
+    print(" ТЕСТ: скомпонованные модули совпадают с цельной программой")
+    expected = assemble('examples/vector_pow_working.yaml')
+    objects = [assemble_module('examples/modules/vectors.yaml'),
+               assemble_module('examples/modules/vector_pow.yaml')]
+
+    image, layout = link(objects, data_base=1000)
+    print(f"   Символы: {layout['symbols']}")
+    assert layout['symbols'] == {'vec_a': 1000, 'vec_b': 2000, 'vec_c': 3000}
+    assert bytes(image) == bytes(expected)
+
+
+def test_default_data_base_follows_code():
+    print(" ТЕСТ: данные по умолчанию размещаются сразу за кодом")
+    objects = [assemble_module('examples/modules/vectors.yaml'),
+               assemble_module('examples/modules/vector_pow.yaml')]
+    image, layout = link(objects)
+    assert layout['data_base'] == layout['code_size'] == len(image) == 177
+
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(bytes(image))
+    interpreter.execute()
+    vec_c = layout['symbols']['vec_c']
+    assert interpreter.memory[vec_c:vec_c + 7] == [2, 9, 64, 25, 6, 49, 512]
+
+
+def test_link_errors():
+    print(" ТЕСТ: ошибки компоновки")
+    assembler = Assembler()
+    user = assembler.assemble_object([{'command': 'load', 'constant': '@buffer+1', 'address': 2}])
+    owner = assembler.assemble_object([{'data': 'buffer', 'size': 4}])
+    big = assembler.assemble_object([{'data': 'padding', 'size': 5000}])
+
+    cases = [
+        ([('user', user)], None),
+        ([('owner', owner), ('owner2', owner), ('user', user)], None),
+        ([('user', user), ('owner', owner)], 4095),
+        ([('big', big), ('user', user), ('owner', owner)], None),
+        ([('user', user), ('owner', owner)], 1),
+    ]
+    for objects, data_base in cases:
+        try:
+            link(objects, data_base)
+        except ValueError as e:
+            print(f"   {e}")
+            continue
+        assert False, f"компоновка {[name for name, _ in objects]} принята"
+
+    image, layout = link([('user', user), ('owner', owner)])
+    assert layout['symbols'] == {'buffer': 3}
+    assert list(image) == [0x06, 4, 0x20]
+
+    try:
+        assembler.assemble_object([{'command': 'write', 'value_reg': 0, 'address_reg': 0, 'offset': '@buffer'}])
+    except ValueError:
+        pass
+    else:
+        assert False, "ссылка на символ в поле offset принята"
+
+
+def test_bad_objects():
+    print(" ТЕСТ: испорченные объектные файлы отклоняются")
+    assembler = Assembler()
+    user = assembler.assemble_object([{'command': 'load', 'constant': '@buffer+1', 'address': 2},
+                                      {'command': 'pow', 'value2_reg': 0, 'result_reg': 1,
+                                       'value1_addr': '@buffer'}])
+    owner = assembler.assemble_object([{'data': 'buffer', 'size': 4}])
+    link([('user', user), ('owner', owner)])
+
+    def damaged(obj, **changes):
+        obj = json.loads(json.dumps(obj))
+        for path, value in changes.items():
+            target = obj
+            keys = path.split('__')
+            for key in keys[:-1]:
+                target = target[int(key) if isinstance(target, list) else key]
+            target[keys[-1]] = value
+        return obj
+
+    cases = [
+        (damaged(user, relocations__0__offset=7), owner),
+        (damaged(user, relocations__1__offset=6), owner),
+        (damaged(user, relocations__1__offset=-3), owner),
+        (damaged(user, relocations__0__offset=3), owner),
+        (damaged(user, relocations__0__kind='jump'), owner),
+        (user, damaged(owner, symbols__buffer__size=5)),
+        (user, damaged(owner, symbols__buffer__offset=-1)),
+        (user, damaged(owner, data_size=70000, symbols__buffer__size=70000)),
+        (damaged(user, relocations__0__addend='1'), owner),
+        (damaged(user, relocations__0__symbol=None), owner),
+        (damaged(user, code='0g'), owner),
+        (damaged(user, code=None), owner),
+        (user, damaged(owner, data_size=True)),
+        (user, damaged(owner, symbols__buffer='buffer')),
+        (user, {key: value for key, value in owner.items() if key != 'symbols'}),
+        ({key: value for key, value in user.items() if key != 'relocations'}, owner),
+    ]
+    for user_obj, owner_obj in cases:
+        try:
+            link([('user', user_obj), ('owner', owner_obj)])
+        except ValueError as e:
+            print(f"   {e}")
+            continue
+        assert False, f"объект {user_obj} / {owner_obj} принят"
+
+    try:
+        assembler.assemble(assembler.load_program('examples/modules/vector_pow.yaml'))
+    except ValueError as e:
+        print(f"   {e}")
+        assert '--object' in str(e)
+    else:
+        assert False, "модуль собран без --object"
+
+
+def test_patch_keeps_register():
+    print(" ТЕСТ: исправление константы LOAD сохраняет номер регистра")
+    image = bytearray([0x06, 0x00, 0x70])
+    patch_load_const(image, 0, 0xABC)
+    assert list(image) == [0x06, 0xBC, 0x7A]
+
+
+def test_outputs_written_atomically():
+    print(" ТЕСТ: объектные файлы и результат компоновки пишутся через временный файл")
+    assembler = Assembler()
+    with tempfile.TemporaryDirectory() as workdir:
+        names = []
+        for module in ('vectors', 'vector_pow'):
+            filename = os.path.join(workdir, module + '.uvmo')
+            assembler.save_object(assemble_module(f'examples/modules/{module}.yaml')[1], filename)
+            names.append(filename)
+        assert load_object(names[1])['relocations']
+
+        output = os.path.join(workdir, 'program.bin')
+        map_file = os.path.join(workdir, 'program.map.json')
+        result = subprocess.run([sys.executable, os.path.join(HERE, 'linker.py'), output] + names +
+                                ['--data-base', '1000', '--map', map_file], capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout + result.stderr
+        with open(output, 'rb') as f:
+            assert f.read() == bytes(assemble('examples/vector_pow_working.yaml'))
+        with open(map_file, encoding='utf-8') as f:
+            assert json.load(f)['symbols']['vec_c'] == 3000
+
+        assert sorted(os.listdir(workdir)) == ['program.bin', 'program.map.json', 'vector_pow.uvmo', 'vectors.uvmo']
+        if os.name == 'posix':
+            umask = os.umask(0o022)
+            os.umask(umask)
+            for name in os.listdir(workdir):
+                assert os.stat(os.path.join(workdir, name)).st_mode & 0o777 == 0o666 & ~umask, name
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ КОМПОНОВЩИКА", [
+        test_modules_link_to_original_bytes,
+        test_default_data_base_follows_code,
+        test_link_errors,
+        test_bad_objects,
+        test_patch_keeps_register,
+        test_outputs_written_atomically,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
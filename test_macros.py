@@ -0,0 +1,143 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+from assembler import Assembler
+from testing import run_tests
+
+
+def test_macro_example_matches_original():
+    print(" ТЕСТ: vector_pow_macro.yaml собирается в те же байты")
+    assembler = Assembler()
+    expected, _ = assembler.assemble(assembler.load_program('examples/vector_pow_working.yaml'))
+    program = assembler.load_program('examples/vector_pow_macro.yaml')
+    actual, intermediate = assembler.assemble(program)
+    print(f"   Команд: {len(intermediate)}, байт: {len(actual)}")
+    assert actual == expected
+
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'vector.bin')
+        assert assembler.assemble_to_file(program, filename) == (52, len(expected))
+        with open(filename, 'rb') as f:
+            assert f.read() == bytes(expected)
+
+
+def test_repeat_substitution():
+    print(" ТЕСТ: подстановка индексов во вложенных repeat")
+    program = [
+        {'repeat': 2, 'var': 'row', 'body': [
+            {'repeat': 3, 'var': 'col', 'body': [
+                {'command': 'load', 'constant': '100 * row + col', 'address': 'col % 2'},
+            ]},
+        ]},
+        {'repeat': 1, 'body': [{'command': 'write', 'value_reg': 1, 'address_reg': 2, 'offset': '-(-7) // 2'}]},
+    ]
+    commands = list(Assembler().expand(program))
+    assert [(c['constant'], c['address']) for c in commands[:-1]] == \
+        [(0, 0), (1, 1), (2, 0), (100, 0), (101, 1), (102, 0)]
+    assert commands[-1]['offset'] == 3
+
+
+def test_expansion_is_lazy():
+    print(" ТЕСТ: раскрытие не строит полный список команд")
+    program = [{'repeat': 10 ** 12, 'body': [{'command': 'load', 'constant': 'i % 4096', 'address': 0}]}]
+    commands = Assembler().expand(program)
+    assert [next(commands)['constant'] for _ in range(3)] == [0, 1, 2]
+
+    program = [{'repeat': 100000, 'body': [{'command': 'load', 'constant': 'i % 4096', 'address': 'i % 8'}]}]
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'big.bin')
+        tracemalloc.start()
+        try:
+            count, size = Assembler().assemble_to_file(program, filename)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        print(f"   Команд: {count}, пик памяти: {peak // 1024} КБ")
+        assert (count, size) == (100000, 300000)
+        assert peak < 1024 * 1024
+
+
+def test_macro_errors():
+    print(" ТЕСТ: ошибки в макросах и выражениях")
+    twice = {'macro': 'twice', 'params': ['value'], 'body': [
+        {'command': 'load', 'constant': 'value', 'address': 0},
+        {'command': 'load', 'constant': 'value', 'address': 1},
+    ]}
+    loop = {'macro': 'loop', 'body': [{'call': 'loop'}]}
+    bad_programs = [
+        [{'call': 'missing'}],
+        [twice, {'call': 'twice'}],
+        [twice, {'call': 'twice', 'args': {'value': 1, 'other': 2}}],
+        [loop, {'call': 'loop'}],
+        [{'repeat': 1, 'body': [{'command': 'load', 'constant': "__import__('os').getpid()", 'address': 0}]}],
+        [{'repeat': 1, 'body': [{'command': 'load', 'constant': 'undefined + 1', 'address': 0}]}],
+        [{'repeat': 1, 'body': [twice]}],
+        [twice, {'call': 'twice', 'args': {'value': {'a': 1}}}],
+        [{'macro': 'pick', 'params': ['v'], 'body': [{'command': 'load', 'constant': 'v[5]', 'address': 0}]},
+         {'call': 'pick', 'args': {'v': {'a': 1}}}],
+        [{'repeat': 'count', 'body': []}],
+        [twice, twice, {'call': 'twice', 'args': {'value': 1}}],
+    ]
+    for program in bad_programs:
+        try:
+            Assembler().assemble(program)
+        except ValueError as e:
+            print(f"   {e}")
+            # Ошибка сообщается с номером элемента программы или команды
+            assert 'элементе программы' in str(e) or 'команде' in str(e)
+            continue
+        assert False, f"программа {program} принята"
+
+    binary_code, _ = Assembler().assemble([twice, {'call': 'twice', 'args': {'value': '2 * 3'}}])
+    assert binary_code == [0x06, 6, 0x00, 0x06, 6, 0x10]
+
+
+def test_failed_build_keeps_output():
+    print(" ТЕСТ: ошибка сборки не портит прежний двоичный файл")
+    bad_program = [{'command': 'load', 'constant': 1, 'address': 0},
+                   {'command': 'load', 'constant': 5000, 'address': 0}]
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'program.bin')
+        with open(filename, 'wb') as f:
+            f.write(b'old')
+        try:
+            Assembler().assemble_to_file(bad_program, filename)
+        except ValueError as e:
+            print(f"   {e}")
+        else:
+            assert False, "константа 5000 принята"
+        with open(filename, 'rb') as f:
+            assert f.read() == b'old'
+        assert os.listdir(workdir) == ['program.bin']
+
+        # Новый файл получает права с учетом umask, как при обычном open
+        new_file = os.path.join(workdir, 'new.bin')
+        Assembler().assemble_to_file(bad_program[:1], new_file)
+        assert sorted(os.listdir(workdir)) == ['new.bin', 'program.bin']
+        if os.name == 'posix':
+            umask = os.umask(0o022)
+            os.umask(umask)
+            assert os.stat(new_file).st_mode & 0o777 == 0o666 & ~umask
+
+        # Ошибка открытия не подменяется ошибкой очистки
+        try:
+            Assembler().assemble_to_file(bad_program[:1], os.path.join(workdir, 'missing', 'program.bin'))
+        except FileNotFoundError:
+            pass
+        else:
+            assert False, "запись в несуществующий каталог принята"
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ МАКРОСОВ АССЕМБЛЕРА", [
+        test_macro_example_matches_original,
+        test_repeat_substitution,
+        test_expansion_is_lazy,
+        test_macro_errors,
+        test_failed_build_keeps_output,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+from interpreter import UVMInterpreter, map_memory_file, MEMORY_SIZE, MEMORY_CELL_SIZE
+from testing import assemble, run_tests
+
+
+def test_state_persists_in_file():
+    print(" ТЕСТ: конечное состояние сохраняется в файле памяти")
+    binary = assemble('examples/vector_pow_working.yaml')
+    with tempfile.TemporaryDirectory() as workdir:
+        memory_file = os.path.join(workdir, 'vector.mem')
+
+        interpreter = UVMInterpreter()
+        interpreter.attach_memory_file(memory_file)
+        interpreter.load_bytes(binary)
+        interpreter.execute()
+        interpreter.close()
+
+        assert os.path.getsize(memory_file) == MEMORY_SIZE * MEMORY_CELL_SIZE
+
+        # Несколько читателей отображают один и тот же результат
+        readers = [map_memory_file(memory_file) for _ in range(2)]
+        try:
+            for memory_map, memory in readers:
+                assert memory.readonly
+                assert list(memory[3000:3007]) == [2, 9, 64, 25, 6, 49, 512]
+                assert list(memory[:len(binary)]) == list(binary)
+        finally:
+            for memory_map, memory in readers:
+                memory.release()
+                memory_map.close()
+
+
+def test_existing_image_is_initial_state():
+    print(" ТЕСТ: существующий файл служит начальным образом памяти")
+    with tempfile.TemporaryDirectory() as workdir:
+        memory_file = os.path.join(workdir, 'image.mem')
+        memory_map, memory = map_memory_file(memory_file, writable=True)
+        memory[500] = 7
+        memory[600] = 2
+        memory.release()
+        memory_map.close()
+
+        # LOAD 600 -> R0; POW R1 = M[500] ^ M[R0]
+        binary = bytes([0x06, 0x58, 0x02, 0x2a, 0x00, 0x01, 0xf4, 0x01, 0x00])
+        interpreter = UVMInterpreter()
+        interpreter.attach_memory_file(memory_file)
+        interpreter.load_bytes(binary)
+        interpreter.execute()
+        interpreter.close()
+
+        assert interpreter.registers[:2] == [600, 49]
+
+
+def test_wrong_size_rejected():
+    print(" ТЕСТ: файл неверного размера отвергается")
+    with tempfile.TemporaryDirectory() as workdir:
+        memory_file = os.path.join(workdir, 'short.mem')
+        with open(memory_file, 'wb') as f:
+            f.write(bytes(100))
+        try:
+            map_memory_file(memory_file)
+        except ValueError:
+            return
+        assert False, "файл неверного размера принят"
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ФАЙЛОВОЙ ПАМЯТИ", [
+        test_state_persists_in_file,
+        test_existing_image_is_initial_state,
+        test_wrong_size_rejected,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import os
+import sys
+import tempfile
+import subprocess
+from multiprocessing.pool import ThreadPool
+from interpreter import UVMInterpreter, decode_program
+from program_cache import ProgramCache, CACHE_SUFFIX, INDEX_SUFFIX
+from testing import assemble, run_tests
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_plain(binary):
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary)
+    interpreter.execute()
+    return interpreter
+
+
+def run_decoded(binary, program):
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary)
+    interpreter.execute_decoded(program)
+    return interpreter
+
+
+def test_cache_hit_matches_execution():
+    print(" ТЕСТ: повторная загрузка берется из кэша")
+    binary = assemble('examples/vector_pow_working.yaml')
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = ProgramCache(workdir)
+        first = cache.load(binary)
+        second = ProgramCache(workdir).load(binary)
+        assert (cache.hits, cache.misses) == (0, 1)
+        assert first == second
+
+        reference = run_plain(binary)
+        interpreter = run_decoded(binary, second)
+        assert interpreter.steps == reference.steps == 52
+        assert interpreter.registers == reference.registers
+        assert interpreter.memory == reference.memory
+
+
+def test_self_modifying_code():
+    print(" ТЕСТ: запись в область кода возвращает выполнение в обычный цикл")
+    binary = bytes([
+        0x06, 10, 0x00,     # LOAD 10 -> R0
+        0x06, 77, 0x10,     # LOAD 77 -> R1
+        0x1a, 0x01, 0x00,   # WRITE R1 -> M[R0]: константа следующей команды
+        0x06, 5, 0x20,      # LOAD 5 -> R2 (станет LOAD 77)
+    ])
+    program = decode_program(binary)
+    assert program[0] == 12 and len(program[1]) == 4
+
+    reference = run_plain(binary)
+    interpreter = run_decoded(binary, program)
+    assert reference.registers[2] == 77
+    assert interpreter.registers == reference.registers
+    assert interpreter.steps == reference.steps == 4
+
+    # Запись за концом декодированного кода: остановочная команда становится LOAD
+    binary = bytes([0x06, 9, 0x00, 0x06, 0x06, 0x10, 0x1a, 0x01, 0x00])
+    reference = run_plain(binary)
+    interpreter = run_decoded(binary, decode_program(binary))
+    assert interpreter.steps == reference.steps == 4
+    assert interpreter.registers == reference.registers
+
+
+def test_truncated_tail_not_cached():
+    print(" ТЕСТ: недописанная последняя команда не декодируется заранее")
+    binary = bytes([0x06, 0x07, 0x00, 0x06, 0x08])
+    code_end, instructions = decode_program(binary)
+    assert code_end == 3 and len(instructions) == 1
+
+    reference = run_plain(binary)
+    interpreter = run_decoded(binary, (code_end, instructions))
+    assert interpreter.steps == reference.steps == 2
+    assert interpreter.registers == reference.registers
+
+
+def test_corrupted_entry_replaced():
+    print(" ТЕСТ: поврежденная запись кэша пересоздается")
+    binary = assemble('examples/simple_calc.yaml')
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = ProgramCache(workdir)
+        expected = cache.load(binary)
+        [name] = os.listdir(workdir)
+        with open(os.path.join(workdir, name), 'r+b') as f:
+            f.truncate(20)
+
+        assert cache.load(binary) == expected
+        assert (cache.hits, cache.misses) == (0, 2)
+        assert cache.load(binary) == expected and cache.hits == 1
+
+
+def test_concurrent_writers_and_eviction():
+    print(" ТЕСТ: параллельная запись и вытеснение старых записей")
+    binaries = [bytes([0x06, value, 0x00]) * (value + 1) for value in range(40)]
+    with tempfile.TemporaryDirectory() as workdir:
+        ProgramCache(workdir).load(binaries[0])
+        [name] = os.listdir(workdir)
+        entry_size = os.path.getsize(os.path.join(workdir, name))
+
+        def load(binary):
+            return ProgramCache(workdir).load(binary) == decode_program(binary)
+
+        with ThreadPool(8) as pool:
+            assert all(pool.map(load, binaries * 4))
+        assert not [name for name in os.listdir(workdir) if not name.endswith(CACHE_SUFFIX)]
+
+        # Индексы файлов программ учитываются в размере кэша наравне с записями
+        filename = os.path.join(workdir, 'program.bin')
+        with open(filename, 'wb') as f:
+            f.write(binaries[1])
+        ProgramCache(workdir).load_file(filename, binaries[1])
+        os.remove(filename)
+        assert [name for name in os.listdir(workdir) if name.endswith(INDEX_SUFFIX)]
+
+        small = ProgramCache(workdir, max_size=entry_size * 10)
+        small.load(bytes([0x06, 0xff, 0x0f]))
+        total = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+        assert total <= small.max_size
+        assert small.load(bytes([0x06, 0xff, 0x0f])) and small.hits == 1
+
+
+def test_file_index_skips_hashing():
+    print(" ТЕСТ: повторный запуск файла не хеширует программу")
+    binary = assemble('examples/vector_pow_working.yaml')
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'vector.bin')
+        cache_dir = os.path.join(workdir, 'cache')
+        with open(filename, 'wb') as f:
+            f.write(binary)
+        cache = ProgramCache(cache_dir)
+        expected = cache.load_file(filename, binary)
+        assert (cache.hits, cache.misses) == (0, 1)
+
+        # Попадание по индексу обходится без hashlib
+        script = ("import sys; from program_cache import ProgramCache; "
+                  "cache = ProgramCache(sys.argv[1]); "
+                  "program = cache.load_file(sys.argv[2], open(sys.argv[2], 'rb').read()); "
+                  "print(cache.hits, program[0], 'hashlib' in sys.modules)")
+        result = subprocess.run([sys.executable, '-c', script, cache_dir, filename],
+                                cwd=HERE, capture_output=True, text=True, check=True)
+        assert result.stdout.split() == ['1', str(expected[0]), 'False'], result.stdout
+
+        # Измененный файл не совпадает с индексом и декодируется заново
+        changed = binary[:-3] + bytes([0x06, 0x07, 0x00])
+        with open(filename, 'wb') as f:
+            f.write(changed)
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        cache = ProgramCache(cache_dir)
+        assert cache.load_file(filename, changed) == decode_program(changed)
+        assert (cache.hits, cache.misses) == (0, 1)
+        assert cache.load_file(filename, changed) == decode_program(changed) and cache.hits == 1
+
+        # Поврежденный индекс считается промахом
+        [index] = [name for name in os.listdir(cache_dir) if name.endswith(INDEX_SUFFIX)]
+        with open(os.path.join(cache_dir, index), 'ab') as f:
+            f.write(b'/../x')
+        cache = ProgramCache(cache_dir)
+        assert cache.load_file(filename, changed) == decode_program(changed) and cache.hits == 1
+
+
+def test_unwritable_cache_falls_back():
+    print(" ТЕСТ: недоступный каталог кэша не мешает запуску")
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, 'program.bin')
+        with open(filename, 'wb') as f:
+            f.write(bytes(assemble('examples/simple_calc.yaml')))
+        # Каталог кэша внутри обычного файла не может быть создан никем, даже root
+        cache_dir = os.path.join(filename, 'cache')
+        dump_file = os.path.join(workdir, 'dump.xml')
+        expected = subprocess.run([sys.executable, 'interpreter.py', filename, dump_file, '--quiet'],
+                                  cwd=HERE, capture_output=True, text=True)
+        result = subprocess.run([sys.executable, 'interpreter.py', filename, dump_file, '--quiet',
+                                 '--cache-dir', cache_dir],
+                                cwd=HERE, capture_output=True, text=True)
+        assert result.returncode == expected.returncode == 0, result.stderr
+        assert result.stdout == expected.stdout
+        with open(dump_file) as f:
+            assert '<memory_dump' in f.read()
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ КЭША ДЕКОДИРОВАННЫХ ПРОГРАММ", [
+        test_cache_hit_matches_execution,
+        test_self_modifying_code,
+        test_truncated_tail_not_cached,
+        test_corrupted_entry_replaced,
+        test_concurrent_writers_and_eviction,
+        test_file_index_skips_hashing,
+        test_unwritable_cache_falls_back,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
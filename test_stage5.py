@@ -1,235 +1,107 @@
 #!/usr/bin/env python3
-import os
-import subprocess
 import sys
+import xml.etree.ElementTree as ET
+from assembler import Assembler
+from interpreter import UVMInterpreter
+from testing import run_tests
 
-def run_command(cmd, description):
-    print(f" {description}")
-    print(f"   Команда: {' '.join(cmd)}")
-
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return True, result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        error_msg = e.stderr.strip() if e.stderr else str(e)
-        return False, error_msg
-
-
-def test_example(yaml_file, description, mem_range, expected_commands=None):
-    print(f"\n{'=' * 60}")
-    print(f" ТЕСТ: {description}")
-    print(f"{'=' * 60}")
-
-    if not os.path.exists(yaml_file):
-        print(f"    Файл {yaml_file} не найден")
-        return False
-
-    bin_file = "temp_test.bin"
-    dump_file = "temp_test.xml"
-
-    # Ассемблирование
-    success, output = run_command([
-        sys.executable, 'assembler.py',
-        yaml_file,
-        bin_file
-    ], "Ассемблирование")
-
-    if not success:
-        print(f"    {output}")
-        return False
-
-    print(f"    {output}")
-
-    # Проверка количества команд если указано
-    if expected_commands and output:
-        cmd_count = output.split(": ")[-1] if ": " in output else output
-        if cmd_count.isdigit() and int(cmd_count) == expected_commands:
-            print(f"    Ожидаемое количество команд: {expected_commands}")
-        else:
-            print(f"   ️  Неожиданное количество команд: {cmd_count} (ожидалось: {expected_commands})")
-
-    # Запуск интерпретатора с диапазоном памяти
-    success, output = run_command([
-        sys.executable, 'interpreter.py',
-        bin_file,
-        dump_file,
-        '--dump-range', mem_range
-    ], "Выполнение программы")
-
-    if not success:
-        print(f"    {output}")
-        # Очистка
-        for f in [bin_file, dump_file]:
-            if os.path.exists(f): os.remove(f)
-        return False
-
-    print(f"    {output}")
-
-    # Показываем краткий результат из дампа
-    if os.path.exists(dump_file):
-        print("    Результаты в памяти:")
-        try:
-            with open(dump_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Ищем не нулевые значения
-                lines = [line for line in content.split('\n') if 'value="0"' not in line and 'byte address' in line]
-                for line in lines[:10]:  # Показываем первые 10 ненулевых
-                    print(f"      {line.strip()}")
-                if len(lines) > 10:
-                    print(f"      ... и еще {len(lines) - 10} значений")
-        except Exception as e:
-            print(f"  ️  Не удалось прочитать дамп: {e}")
-
-    # Очистка
-    for f in [bin_file, dump_file]:
-        if os.path.exists(f): os.remove(f)
-
-    return True
+
+def assemble_and_run(yaml_file):
+    # Ассемблирование и выполнение целиком в памяти процесса, без временных файлов
+    assembler = Assembler()
+    binary_code, intermediate_repr = assembler.assemble(assembler.load_program(yaml_file))
+
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(bytes(binary_code))
+    interpreter.execute()
+    return interpreter, len(intermediate_repr)
+
+
+def dump_values(interpreter, start_addr, end_addr):
+    root = ET.fromstring(interpreter.memory_dump_xml(start_addr, end_addr))
+    assert root.tag == 'memory_dump'
+    assert (int(root.get('start')), int(root.get('end'))) == (start_addr, end_addr)
+    return {int(elem.get('address')): int(elem.get('value')) for elem in root.findall('byte')}
+
+
+def check_example(yaml_file, mem_range, expected_commands, expected_memory):
+    interpreter, command_count = assemble_and_run(yaml_file)
+    start_addr, end_addr = mem_range
+
+    assert command_count == expected_commands, \
+        f"ассемблировано {command_count} команд, ожидалось {expected_commands}"
+    assert interpreter.steps == expected_commands, \
+        f"выполнено {interpreter.steps} команд, ожидалось {expected_commands}"
+
+    values = dump_values(interpreter, start_addr, end_addr)
+    assert sorted(values) == list(range(start_addr, end_addr + 1))
+
+    nonzero = {addr: value for addr, value in values.items() if value}
+    assert nonzero == expected_memory, f"память {nonzero}, ожидалось {expected_memory}"
+    return nonzero
+
+
+def check_simple_calc():
+    return check_example('examples/simple_calc.yaml', (1000, 1005), 7,
+                         {1000: 2, 1001: 3, 1002: 4})
+
+
+def check_copy_array():
+    return check_example('examples/copy_array.yaml', (500, 600), 14,
+                         {500: 10, 501: 20, 502: 30, 600: 10})
+
+
+def check_pow_simple():
+    # 2^2 = 4 и 3^2 = 9: показатель берется из ячейки 2000 (значение 2)
+    return check_example('examples/pow_simple.yaml', (1000, 3001), 13,
+                         {1000: 2, 1001: 3, 2000: 2, 2001: 3, 3000: 4, 3001: 9})
+
+
+def check_vector_pow():
+    interpreter, command_count = assemble_and_run('examples/vector_pow_working.yaml')
+    values = dump_values(interpreter, 1000, 3006)
+
+    vector_a = [values[addr] for addr in range(1000, 1007)]
+    vector_b = [values[addr] for addr in range(2000, 2007)]
+    vector_c = [values[addr] for addr in range(3000, 3007)]
+
+    assert vector_a == [2, 3, 4, 5, 6, 7, 8]
+    assert vector_b == [1, 2, 3, 2, 1, 2, 3]
+    assert vector_c == [a ** b for a, b in zip(vector_a, vector_b)]
+    assert interpreter.steps == command_count
+    return {'A': vector_a, 'B': vector_b, 'C': vector_c}
+
+
+def test_simple_calc():
+    print(" ТЕСТ: Простые арифметические операции")
+    print(f"   Результат: {check_simple_calc()}")
+
+
+def test_copy_array():
+    print(" ТЕСТ: Копирование массива")
+    print(f"   Результат: {check_copy_array()}")
+
+
+def test_pow_simple():
+    print(" ТЕСТ: Простые вычисления степеней")
+    print(f"   Результат: {check_pow_simple()}")
 
 
 def test_vector_pow():
-    print(f"\n{'=' * 60}")
-    print(f" Поэлементный POW над векторами")
-    print(f"{'=' * 60}")
-
-    yaml_file = 'examples/vector_pow_working.yaml'
-    if not os.path.exists(yaml_file):
-        print(f" Файл {yaml_file} не найден")
-        return False
-
-    bin_file = "vector_test.bin"
-    dump_file = "vector_test.xml"
-
-    # Ассемблирование
-    success, output = run_command([
-        sys.executable, 'assembler.py',
-        yaml_file,
-        bin_file
-    ], "Ассемблирование основной задачи")
-
-    if not success:
-        print(f" {output}")
-        return False
-
-    print(f" {output}")
-
-    # Запуск интерпретатора с конкретным диапазоном
-    success, output = run_command([
-        sys.executable, 'interpreter.py',
-        bin_file,
-        dump_file,
-        '--dump-range', '1000-3006'
-    ], "Выполнение программы с дампом памяти")
-
-    if not success:
-        print(f" {output}")
-        # Очистка
-        for f in [bin_file, dump_file]:
-            if os.path.exists(f): os.remove(f)
-        return False
-
-    print(f" {output}")
-
-    # Анализ результатов
-    print("\n АНАЛИЗ РЕЗУЛЬТАТОВ:")
-
-    try:
-        with open(dump_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Извлекаем значения векторов
-        vector_a = []
-        vector_b = []
-        vector_c = []
-
-        for line in content.split('\n'):
-            if 'byte address' in line:
-                addr_start = line.find('address="') + 9
-                addr_end = line.find('"', addr_start)
-                addr = int(line[addr_start:addr_end])
-
-                value_start = line.find('value="') + 7
-                value_end = line.find('"', value_start)
-                value = int(line[value_start:value_end])
-
-                if 1000 <= addr <= 1006:
-                    vector_a.append(value)
-                elif 2000 <= addr <= 2006:
-                    vector_b.append(value)
-                elif 3000 <= addr <= 3006:
-                    vector_c.append(value)
-
-        print(f"   Вектор A (основания): {vector_a}")
-        print(f"   Вектор B (показатели): {vector_b}")
-        print(f"   Вектор C (результаты): {vector_c}")
-
-        # Проверяем вычисления
-        expected_results = [
-            vector_a[0] ** vector_b[0],  # 2^1 = 2
-            vector_a[1] ** vector_b[1],  # 3^2 = 9
-            vector_a[2] ** vector_b[2],  # 4^3 = 64
-            vector_a[3] ** vector_b[3],  # 5^2 = 25
-            vector_a[4] ** vector_b[4],  # 6^1 = 6
-            vector_a[5] ** vector_b[5],  # 7^2 = 49
-            vector_a[6] ** vector_b[6],  # 8^3 = 512
-        ]
-
-        print(f"   Ожидаемые результаты: {expected_results}")
-
-        if vector_c == expected_results:
-            print("    ВСЕ ВЫЧИСЛЕНИЯ КОРРЕКТНЫ!")
-            success = True
-        else:
-            print("    Ошибка в вычислениях!")
-            success = False
-
-    except Exception as e:
-        print(f"    Ошибка анализа: {e}")
-        success = False
-
-    # Очистка
-    for f in [bin_file, dump_file]:
-        if os.path.exists(f): os.remove(f)
-
-    return success
+    print(" ТЕСТ: Поэлементный POW над векторами")
+    print(f"   Результат: {check_vector_pow()}")
 
 
 def main():
-
-    print(" ТЕСТИРОВАНИЕ ЭТАПА 5: Выполнение тестовой задачи")
-    print("=" * 70)
-    # Тестируем три примера программ с правильными диапазонами памяти
-    examples = [
-        ('examples/simple_calc.yaml', 'Простые арифметические операции', '1000-1005', 7),
-        ('examples/copy_array.yaml', 'Копирование массива', '500-600', 14),
-        ('examples/pow_simple.yaml', 'Простые вычисления степеней', '1000-3001', 13),
-    ]
-
-    success_count = 0
-    total_count = len(examples)
-
-    for yaml_file, description, mem_range, expected_cmds in examples:
-        if test_example(yaml_file, description, mem_range, expected_cmds):
-            success_count += 1
-            print("    ТЕСТ ПРОЙДЕН")
-        else:
-            print("    ТЕСТ ПРОВАЛЕН")
-
-    # Тестируем основную задачу
-    if test_vector_pow():
-        success_count += 1
-
-    total_count += 1
-    print(f"\n{'=' * 70}")
-    print(f" ИТОГИ ТЕСТИРОВАНИЯ ЭТАПА 5:")
-    print(f"   Пройдено тестов: {success_count}/{total_count}")
-
-    if success_count == total_count:
-        print("   ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
-    else:
-        print("     Некоторые тесты не пройдены")
-    print(f"{'=' * 70}")
+    # Проверки выполняются по очереди: все вместе занимают десятки миллисекунд,
+    # а запуск пула процессов дороже самих проверок
+    return run_tests("ТЕСТИРОВАНИЕ ЭТАПА 5: Выполнение тестовой задачи", [
+        test_simple_calc,
+        test_copy_array,
+        test_pow_simple,
+        test_vector_pow,
+    ])
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import sys
+import tempfile
+from check_startup import BUDGETS, entry_points, import_report, parse_importtime
+from testing import run_tests
+
+
+def test_parse_importtime():
+    print(" ТЕСТ: разбор вывода -X importtime")
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       100 |        150 |   _locale\n"
+              "import time:       800 |        950 | locale\n")
+    modules = parse_importtime(stderr)
+    assert modules == {'_locale': (150, False), 'locale': (950, True)}
+
+
+def test_heavy_modules_not_loaded():
+    print(" ТЕСТ: точки входа не загружают лишних модулей")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, cmd in entry_points(workdir).items():
+            _, modules = import_report(cmd, 1)
+            for forbidden in BUDGETS[name]['forbidden']:
+                loaded = [module for module in modules
+                          if module == forbidden or module.startswith(forbidden + '.')]
+                assert not loaded, f"{name}: загружены {loaded}"
+            print(f"   {name}: модулей {len(modules)}")
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ВРЕМЕНИ ЗАПУСКА", [
+        test_parse_importtime,
+        test_heavy_modules_not_loaded,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+import tempfile
+import subprocess
+import contextlib
+from interpreter import UVMInterpreter, InstructionStream
+from generator import ProgramGenerator, write_outputs
+from testing import run_tests
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def check_oracle(interpreter, oracle):
+    assert interpreter.steps == oracle['instructions']
+    assert interpreter.registers == oracle['registers']
+    for address, value in oracle['memory'].items():
+        assert interpreter.memory[int(address)] == value, f"адрес {address}"
+
+
+def test_program_larger_than_memory():
+    print(" ТЕСТ: программа длиннее памяти УВМ")
+    with tempfile.TemporaryDirectory() as workdir:
+        bin_file = os.path.join(workdir, 'big.bin')
+        # Код (~80 КБ) длиннее памяти и перекрывает область данных в общей памяти
+        oracle = write_outputs(ProgramGenerator(data_base=1024, seed=7), 25000, binary_file=bin_file)
+        print(f"   Команд: {oracle['instructions']}, байт кода: {oracle['code_size']}")
+        assert oracle['code_size'] > 65536
+
+        for use_mmap in (False, True):
+            interpreter = UVMInterpreter()
+            interpreter.execute_stream(InstructionStream(bin_file, chunk_size=4096, use_mmap=use_mmap))
+            check_oracle(interpreter, oracle)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            UVMInterpreter().load_program(bin_file)
+        assert 'остаток отброшен' in output.getvalue()
+
+
+def test_truncated_last_command():
+    print(" ТЕСТ: недописанная последняя команда дополняется нулями")
+    # LOAD 5 -> R0, затем POW R1 = M[0] ^ M[R0] без последних трех байт адреса
+    binary = bytes([0x06, 0x05, 0x00, 0x2a, 0x00, 0x01])
+
+    for chunk_size in (6, 7, 8, 1024):
+        interpreter = UVMInterpreter()
+        interpreter.execute_stream(InstructionStream(io.BytesIO(binary), chunk_size=chunk_size))
+        # Память данных пуста: 0^0 = 1
+        assert interpreter.steps == 2
+        assert interpreter.registers[:2] == [5, 1]
+
+
+def test_unknown_opcode_stops():
+    print(" ТЕСТ: неизвестный код команды завершает поток")
+    binary = bytes([0x06, 0x07, 0x00, 0xff, 0x00, 0x00, 0x06, 0x09, 0x00])
+    interpreter = UVMInterpreter()
+    interpreter.execute_stream(InstructionStream(io.BytesIO(binary)))
+    assert interpreter.steps == 1 and interpreter.registers[0] == 7 and interpreter.halted
+
+
+def test_chunk_size_below_command_rejected():
+    print(" ТЕСТ: блок чтения меньше длины команды отклоняется")
+    for chunk_size in (-1, 0, 5):
+        try:
+            InstructionStream(io.BytesIO(b''), chunk_size=chunk_size)
+        except ValueError:
+            pass
+        else:
+            assert False, f"размер блока {chunk_size} принят"
+
+    result = subprocess.run([sys.executable, os.path.join(HERE, 'interpreter.py'), 'missing.bin', 'dump.xml',
+                             '--stream', '--chunk-size', '0'], capture_output=True, text=True)
+    assert result.returncode == 2 and '--chunk-size' in result.stderr, result.stderr
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ ПОТОКОВОЙ ВЫБОРКИ КОМАНД", [
+        test_program_larger_than_memory,
+        test_truncated_last_command,
+        test_unknown_opcode_stops,
+        test_chunk_size_below_command_rejected,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import sys
+from interpreter import UVMInterpreter, decode_program, infer_write_set, address_ranges
+from testing import assemble, run_tests
+
+
+def load(constant, register):
+    return bytes([0x06, constant & 0xFF, (constant >> 8) | (register << 4)])
+
+
+def read(result_reg, address_reg, offset):
+    return bytes([0x16, result_reg | (address_reg << 5), offset])
+
+
+def write(value_reg, address_reg, offset):
+    return bytes([0x1a, value_reg | (address_reg << 5), offset])
+
+
+def run_tracked(binary):
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary)
+    program = decode_program(binary)
+    interpreter.track_writes(program)
+    interpreter.execute_decoded(program)
+    return interpreter
+
+
+def test_static_write_set():
+    print(" ТЕСТ: адреса записи векторной программы находятся статически")
+    binary = assemble('examples/vector_pow_working.yaml')
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary)
+    addresses, complete = infer_write_set(decode_program(binary), interpreter.memory)
+    assert complete
+    assert address_ranges(addresses) == [(1000, 1006), (2000, 2006), (3000, 3006)]
+
+    interpreter = run_tracked(binary)
+    assert interpreter.dirty is None
+    assert interpreter.written_ranges() == [(1000, 1006), (2000, 2006), (3000, 3006)]
+    xml = interpreter.memory_ranges_xml(interpreter.written_ranges())
+    assert 'ranges="1000-1006,2000-2006,3000-3006"' in xml
+    assert xml.count('<byte ') == 21
+    assert '<byte address="3006" value="512">' in xml
+
+
+def test_runtime_address_tracked():
+    print(" ТЕСТ: адрес из памяти отслеживается во время выполнения")
+    # R1 = 700; M[700] = 700; R2 = M[R1] (неизвестен статически); M[R2 + 5] = R1
+    binary = load(700, 1) + write(1, 1, 0) + read(2, 1, 0) + write(1, 2, 5) + load(9, 3) + write(3, 1, 1)
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary)
+    addresses, complete = infer_write_set(decode_program(binary), interpreter.memory)
+    assert not complete and addresses == {700}
+
+    interpreter = run_tracked(binary)
+    assert interpreter.dirty == {700, 705, 701}
+    assert interpreter.written_ranges() == [(700, 701), (705, 705)]
+
+
+def test_self_modification_and_tail():
+    print(" ТЕСТ: запись в код и продолжение за программой")
+    # Запись в еще не выполненную команду: статический проход прекращается
+    binary = load(0x06, 0) + load(9, 1) + write(0, 1, 0) + bytes(3)
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary)
+    addresses, complete = infer_write_set(decode_program(binary), interpreter.memory)
+    assert not complete and addresses == {9}
+
+    # Память за программой не пуста (например, образ из --memory-file)
+    binary = load(5, 1) + write(1, 1, 0)
+    interpreter = UVMInterpreter()
+    interpreter.load_bytes(binary + load(6, 1) + write(1, 1, 0))
+    addresses, complete = infer_write_set(decode_program(binary), interpreter.memory)
+    assert not complete and addresses == {5}
+
+    interpreter.track_writes(decode_program(binary))
+    interpreter.execute_decoded(decode_program(binary))
+    assert interpreter.written_ranges() == [(5, 6)]
+
+
+def test_empty_write_set():
+    print(" ТЕСТ: программа без записей дает пустой дамп")
+    interpreter = run_tracked(load(1, 0) + load(2, 1))
+    assert interpreter.written_ranges() == []
+    assert interpreter.memory_ranges_xml([]) == '<?xml version="1.0" ?>\n<memory_dump ranges=""/>\n'
+
+
+def main():
+    return run_tests("ТЕСТИРОВАНИЕ АВТОМАТИЧЕСКОГО ДИАПАЗОНА ДАМПА", [
+        test_static_write_set,
+        test_runtime_address_tracked,
+        test_self_modification_and_tail,
+        test_empty_write_set,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
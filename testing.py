@@ -0,0 +1,31 @@
+from assembler import Assembler
+
+
+# Общие средства тестов: ассемблирование и запуск набора тестовых функций
+
+
+def assemble(source):
+    # source - путь к исходному файлу (.yaml, .json) или уже загруженная программа
+    assembler = Assembler()
+    program = assembler.load_program(source) if isinstance(source, str) else source
+    binary_code, _ = assembler.assemble(program)
+    return bytes(binary_code)
+
+
+def run_tests(title, tests):
+    # Тест проходит, если не вызвал AssertionError; возвращает код выхода
+    print(title)
+    print("=" * 60)
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print("   ТЕСТ ПРОЙДЕН")
+            passed += 1
+        except AssertionError as e:
+            print(f"   ТЕСТ НЕ ПРОЙДЕН {e}")
+
+    print("=" * 60)
+    print(f"ИТОГ: {passed}/{len(tests)} тестов пройдено")
+    return 0 if passed == len(tests) else 1